@@ -1,82 +1,120 @@
-"""
-Gerador de Escala Médica — UAI Luizote (Psiquiatria)
-Interface Web — Streamlit
-
-Deploy gratuito: https://share.streamlit.io
-"""
-
-import io, sys, os, tempfile, datetime
-import streamlit as st
-
-sys.path.insert(0, os.path.dirname(__file__))
-from gerador_escala import (
-    gerar_escala, gerar_excel, nome_periodo,
-    MESES_ABREV, MESES_PT
-)
-
-# ============================================================
-st.set_page_config(
-    page_title="Escala UAI Luizote — Psiquiatria",
-    page_icon="🏥",
-    layout="centered",
-)
-
-st.title("🏥 Escala UAI Luizote — Psiquiatria")
-st.caption("Gerador institucional · Período: dia 16 → dia 15 do mês seguinte")
-st.divider()
-
-# ── Parâmetros ───────────────────────────────────────────────
-MESES_NOMES = {
-    1:"Janeiro", 2:"Fevereiro", 3:"Março", 4:"Abril",
-    5:"Maio", 6:"Junho", 7:"Julho", 8:"Agosto",
-    9:"Setembro", 10:"Outubro", 11:"Novembro", 12:"Dezembro"
-}
-
-hoje = datetime.date.today()
-
-col1, col2 = st.columns(2)
-with col1:
-    mes = st.selectbox(
-        "Mês de referência",
-        options=list(MESES_NOMES.keys()),
-        format_func=lambda x: MESES_NOMES[x],
-        index=hoje.month - 1,
-    )
-with col2:
-    ano = st.number_input("Ano", min_value=2024, max_value=2030,
-                          value=hoje.year, step=1)
-
-mariana_ativa = not st.checkbox(
-    "Mariana em atestado (desativar plantões)",
-    value=True,
-)
-
-st.divider()
-
-# ── Geração e download ───────────────────────────────────────
-if st.button("🗓️ Gerar Escala", type="primary", use_container_width=True):
-    with st.spinner("Gerando escala..."):
-        dados = gerar_escala(ano, mes, mariana_ativa=mariana_ativa)
-
-        with tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False) as tmp:
-            tmp_path = tmp.name
-        gerar_excel(dados, tmp_path)
-        with open(tmp_path, 'rb') as f:
-            excel_bytes = f.read()
-        os.unlink(tmp_path)
-
-    if mes == 12:
-        nome_arquivo = f"ESCALA UAI {MESES_ABREV[mes]}_{MESES_PT[1]} {ano+1}.xlsx"
-    else:
-        nome_arquivo = f"ESCALA UAI {MESES_ABREV[mes]}_{MESES_PT[mes+1]} {ano}.xlsx"
-
-    st.success(f"✅ {nome_periodo(ano, mes)} — escala gerada.")
-
-    st.download_button(
-        label=f"⬇️ Baixar {nome_arquivo}",
-        data=excel_bytes,
-        file_name=nome_arquivo,
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        use_container_width=True,
-        type="primary",
-    )
+"""
+Gerador de Escala Médica — UAI Luizote (Psiquiatria)
+Interface Web — Streamlit
+
+Deploy gratuito: https://share.streamlit.io
+"""
+
+import io, sys, os, datetime, hashlib, json
+import streamlit as st
+
+sys.path.insert(0, os.path.dirname(__file__))
+from gerador_escala import (
+    gerar_escala, gerar_excel, nome_periodo, nome_arquivo_excel,
+    UNIDADE_PADRAO,
+)
+from escala_validacao import validar_escala
+
+# ── Cache ────────────────────────────────────────────────────
+# Chave = parâmetros + hash da configuração da unidade: editar a
+# equipe invalida o cache sem precisar reiniciar o app.
+CACHE_TTL_S = 60 * 60
+CACHE_MAX_ENTRIES = 64
+
+
+def hash_config():
+    bruto = json.dumps(UNIDADE_PADRAO, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(bruto.encode('utf-8')).hexdigest()
+
+
+@st.cache_data(ttl=CACHE_TTL_S, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def escala_em_cache(ano, mes, mariana_ativa, engine, config_hash):
+    return gerar_escala(ano, mes, mariana_ativa=mariana_ativa, engine=engine)
+
+
+@st.cache_data(ttl=CACHE_TTL_S, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def excel_em_cache(ano, mes, mariana_ativa, engine, config_hash):
+    dados = escala_em_cache(ano, mes, mariana_ativa, engine, config_hash)
+    return gerar_excel(dados, backend='streaming')
+
+
+# ============================================================
+st.set_page_config(
+    page_title="Escala UAI Luizote — Psiquiatria",
+    page_icon="🏥",
+    layout="centered",
+)
+
+st.title("🏥 Escala UAI Luizote — Psiquiatria")
+st.caption("Gerador institucional · Período: dia 16 → dia 15 do mês seguinte")
+st.divider()
+
+# ── Parâmetros ───────────────────────────────────────────────
+MESES_NOMES = {
+    1:"Janeiro", 2:"Fevereiro", 3:"Março", 4:"Abril",
+    5:"Maio", 6:"Junho", 7:"Julho", 8:"Agosto",
+    9:"Setembro", 10:"Outubro", 11:"Novembro", 12:"Dezembro"
+}
+
+hoje = datetime.date.today()
+
+col1, col2 = st.columns(2)
+with col1:
+    mes = st.selectbox(
+        "Mês de referência",
+        options=list(MESES_NOMES.keys()),
+        format_func=lambda x: MESES_NOMES[x],
+        index=hoje.month - 1,
+    )
+with col2:
+    ano = st.number_input("Ano", min_value=2024, max_value=2030,
+                          value=hoje.year, step=1)
+
+mariana_ativa = not st.checkbox(
+    "Mariana em atestado (desativar plantões)",
+    value=True,
+)
+
+engine = st.radio(
+    "Motor de geração",
+    options=["greedy", "cp"],
+    format_func=lambda x: {"greedy": "Regras em sequência (rápido)",
+                           "cp": "Otimizado (restrições — menos turnos vagos)"}[x],
+    horizontal=True,
+)
+
+st.divider()
+
+# ── Geração e download ───────────────────────────────────────
+# Depois do primeiro clique, trocar mês/ano/opções reexibe a escala direto
+# do cache; o .xlsx só é montado quando o download é de fato pedido.
+if st.button("🗓️ Gerar Escala", type="primary", use_container_width=True):
+    st.session_state['gerar'] = True
+
+if st.session_state.get('gerar'):
+    ano = int(ano)
+    chave = (ano, mes, mariana_ativa, engine, hash_config())
+    with st.spinner("Gerando escala..."):
+        dados = escala_em_cache(*chave)
+
+    nome_arquivo = nome_arquivo_excel(ano, mes)
+
+    vagos = sum(len(v) for v in dados['slots_vagos'].values())
+    st.success(f"✅ {nome_periodo(ano, mes)} — escala gerada · {vagos} turno(s) vago(s).")
+
+    violacoes = validar_escala(dados)
+    if violacoes:
+        with st.expander(f"⚠️ {len(violacoes)} ponto(s) fora das regras"):
+            for v in violacoes:
+                icone = "🔴" if v['gravidade'] == 'erro' else "🟡"
+                st.markdown(f"{icone} {v['mensagem']}")
+
+    st.download_button(
+        label=f"⬇️ Baixar {nome_arquivo}",
+        data=lambda: excel_em_cache(*chave),
+        file_name=nome_arquivo,
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        on_click="ignore",
+        use_container_width=True,
+        type="primary",
+    )
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Benchmarks dos caminhos quentes do Gerador de Escala (geração, Excel, relatórios)
+
+Roda offline sobre todos os períodos de 2024 a 2030, com Mariana ativa e em
+atestado, e mede média, p95 e pico de memória (tracemalloc) de cada etapa.
+
+Uso: python3 bench_escala.py [--saida bench.json] [--baseline base.json]
+Exemplo: python3 bench_escala.py --saida atual.json --baseline base.json --limiar 0.2
+         → sai com código 1 se alguma etapa ficou >20% mais lenta que a baseline
+Importação: python3 bench_escala.py --so-importacao
+         → sai com código 1 se `import gerador_escala` estourar o orçamento
+           (python -X importtime) ou carregar openpyxl
+"""
+
+from datetime import datetime
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import gerador_escala as ge
+from escala_rpa import alocar_rpa
+from gerador_escala import (
+    get_periodo, gerar_escala, gerar_excel, GradeEscala,
+    regra_bruna, regra_gustavo, regra_mariana, regra_mauricio, regra_faim,
+    regra_melissa, regra_valquiria,
+    exibir_contador_plantoes, exibir_relatorio_rpa, exibir_sequencia_plantoes,
+    _cor, ANSI_BOLD, ANSI_CYAN, ANSI_GRAY, ANSI_GREEN, ANSI_RED, ANSI_WHITE,
+)
+
+ANOS = range(2024, 2031)
+LIMIAR_PADRAO = 0.20   # +20% na média = regressão
+
+# Orçamento de importação: `import gerador_escala` (CLI de texto, API, app)
+# não pode passar disso nem carregar a camada Excel
+ORCAMENTO_IMPORT_MS = 30.0
+MODULOS_PROIBIDOS_NO_IMPORT = ('openpyxl', 'escala_excel', 'escala_cp')
+
+
+# ============================================================
+# ENTRADAS POR PERÍODO
+# ============================================================
+def periodos_bench():
+    return [(ano, mes, ativa) for ano in ANOS for mes in range(1, 13)
+            for ativa in (False, True)]
+
+
+def contexto_regras(ano, mes, ativa, executor=None):
+    """
+    Roda o PLANO_REGRAS como gerar_escala e guarda a saída de cada regra,
+    para que cada regra_* possa ser cronometrada isoladamente. executor:
+    repassado a PlanoRegras.executar (regras de um mesmo nível em paralelo).
+    """
+    dias = get_periodo(ano, mes)
+    grade = GradeEscala(dias)
+    por_regra = ge.medicos_por_regra(ge.UNIDADE_PADRAO)
+
+    def gravar(regra, escala, cnt):
+        if not regra.medico:
+            return escala
+        return grade.aplicar(por_regra[regra.nome]['nome'], escala)
+
+    ctx = ge.PLANO_REGRAS.executar(ge.ContextoRegras(dias, ativa, por_regra=por_regra), gravar,
+                                   executor=executor)
+    ctx.update({'dias': dias, 'ativa': ativa})
+    return ctx
+
+
+# ============================================================
+# ETAPAS MEDIDAS
+# ============================================================
+def checar_executor(periodos):
+    """
+    Períodos em que o PLANO_REGRAS com executor (threads por nível) diverge
+    da execução em sequência — lista vazia = mesma saída.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        return [p for p in periodos if contexto_regras(*p, executor=executor) != contexto_regras(*p)]
+
+
+def _silencioso(func):
+    """Roda um exibir_* descartando a saída ANSI."""
+    def rodar(dados):
+        with contextlib.redirect_stdout(io.StringIO()):
+            func(dados)
+    return rodar
+
+
+def _get_periodo_frio(ano, mes):
+    get_periodo.cache_clear()
+    return get_periodo(ano, mes)
+
+
+# nome → (tipo de entrada, função). Tipos: 'periodo' recebe (ano, mes, ativa),
+# 'regras' recebe o contexto de contexto_regras, 'dados' recebe a saída de gerar_escala.
+ETAPAS = {
+    'get_periodo':           ('periodo', lambda a, m, at: _get_periodo_frio(a, m)),
+    'get_periodo[cache]':    ('periodo', lambda a, m, at: get_periodo(a, m)),
+    'regra_bruna':           ('regras', lambda c: regra_bruna(c['dias'])),
+    'regra_gustavo':         ('regras', lambda c: regra_gustavo(c['dias'])),
+    'regra_mariana':         ('regras', lambda c: regra_mariana(c['dias'], ativa=c['ativa'])),
+    'regra_mauricio':        ('regras', lambda c: regra_mauricio(c['dias'])),
+    'regra_faim':            ('regras', lambda c: regra_faim(c['dias'], c['mauricio'])),
+    'regra_melissa':         ('regras', lambda c: regra_melissa(
+        c['dias'], c['mauricio'], c['faim'], c['mariana'], c['gustavo'], c['valquiria_quintas'])),
+    'regra_valquiria':       ('regras', lambda c: regra_valquiria(
+        c['dias'], c['mariana'], escala_gustavo=c['gustavo'],
+        escala_mauricio=c['mauricio'], escala_faim=c['faim'])),
+    'gerar_escala':          ('periodo', lambda a, m, at: gerar_escala(a, m, mariana_ativa=at)),
+    'gerar_escala[cp]':      ('periodo', lambda a, m, at: gerar_escala(a, m, mariana_ativa=at, engine='cp')),
+    'alocar_rpa':            ('dados', lambda d: alocar_rpa(d)),
+    'gerar_excel':           ('dados', lambda d: gerar_excel(d)),
+    'gerar_excel[streaming]': ('dados', lambda d: gerar_excel(d, backend='streaming')),
+    'exibir_contador_plantoes':  ('dados', _silencioso(exibir_contador_plantoes)),
+    'exibir_relatorio_rpa':      ('dados', _silencioso(exibir_relatorio_rpa)),
+    'exibir_sequencia_plantoes': ('dados', _silencioso(exibir_sequencia_plantoes)),
+}
+
+# Etapas lentas que só rodam quando pedidas explicitamente em --etapas
+ETAPAS_OPCIONAIS = {'gerar_escala[cp]'}
+
+# Etapas que medem o caminho em cache: uma passada sem cronômetro antes
+ETAPAS_AQUECIDAS = {'get_periodo[cache]'}
+
+
+def _p95(amostras):
+    ordenadas = sorted(amostras)
+    return ordenadas[max(0, math.ceil(0.95 * len(ordenadas)) - 1)]
+
+
+def medir(func, entradas, repeticoes, aquecer=False):
+    """
+    Cronometra func(*entrada) para cada entrada × repetição, depois faz uma
+    passada separada sob tracemalloc (que distorce o tempo) para o pico.
+    """
+    if aquecer:
+        for args in entradas:
+            func(*args)
+    amostras = []
+    for _ in range(repeticoes):
+        for args in entradas:
+            t0 = time.perf_counter()
+            func(*args)
+            amostras.append(time.perf_counter() - t0)
+
+    pico = 0
+    tracemalloc.start()
+    try:
+        for args in entradas:
+            tracemalloc.reset_peak()
+            func(*args)
+            pico = max(pico, tracemalloc.get_traced_memory()[1])
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'n': len(amostras),
+        'media_ms': round(1000 * sum(amostras) / len(amostras), 4),
+        'p95_ms': round(1000 * _p95(amostras), 4),
+        'pico_kb': round(pico / 1024, 1),
+    }
+
+
+def rodar_bench(etapas, repeticoes=1):
+    import openpyxl
+
+    periodos = periodos_bench()
+    entradas = {
+        'periodo': periodos,
+        'regras': [(contexto_regras(*p),) for p in periodos],
+        'dados': [(gerar_escala(a, m, mariana_ativa=at),) for (a, m, at) in periodos],
+    }
+    divergentes = checar_executor(periodos)
+    for (a, m, at) in divergentes:
+        print(_cor(f"   ✗ PlanoRegras.executar com executor diverge em {a}-{m:02d} "
+                   f"(mariana_ativa={at})", ANSI_RED), file=sys.stderr)
+    resultados = {}
+    for nome in etapas:
+        tipo, func = ETAPAS[nome]
+        resultados[nome] = medir(func, entradas[tipo], repeticoes,
+                                 aquecer=nome in ETAPAS_AQUECIDAS)
+        r = resultados[nome]
+        print(f"  {nome:<28}{r['media_ms']:>10.3f} ms{r['p95_ms']:>10.3f} ms{r['pico_kb']:>10.1f} KB",
+              file=sys.stderr)
+    return {
+        'meta': {
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'openpyxl': openpyxl.__version__,
+            'periodos': len(periodos),
+            'repeticoes': repeticoes,
+        },
+        'resultados': resultados,
+        'executor_divergente': [list(p) for p in divergentes],
+    }
+
+
+# ============================================================
+# ORÇAMENTO DE IMPORTAÇÃO (python -X importtime)
+# ============================================================
+def medir_importacao(modulo='gerador_escala', repeticoes=5):
+    """
+    Roda `python -X importtime -c "import <modulo>"` em subprocessos e devolve
+    o menor tempo cumulativo (ms) e os módulos proibidos que foram carregados.
+    A primeira execução grava o bytecode; as seguintes medem o caso real.
+    """
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    pasta = os.path.dirname(os.path.abspath(__file__))
+    tempos = []
+    carregados = set()
+    for _ in range(repeticoes + 1):
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {modulo}'],
+            cwd=pasta, env=env, capture_output=True, text=True, check=True)
+        for linha in proc.stderr.splitlines():
+            if not linha.startswith('import time:') or '|' not in linha:
+                continue
+            _, cumulativo, nome = linha.split('|')
+            if nome.strip() == modulo and nome[1:2] != ' ':
+                tempos.append(int(cumulativo) / 1000)
+            if nome.strip().split('.')[0] in MODULOS_PROIBIDOS_NO_IMPORT:
+                carregados.add(nome.strip().split('.')[0])
+    return {
+        'modulo': modulo,
+        'import_ms': round(min(tempos[1:] or tempos), 3),
+        'proibidos': sorted(carregados),
+    }
+
+
+def checar_importacao(medida, orcamento_ms=ORCAMENTO_IMPORT_MS):
+    """Lista de violações do orçamento de importação (vazia = ok)."""
+    violacoes = []
+    if medida['import_ms'] > orcamento_ms:
+        violacoes.append(f"import {medida['modulo']}: {medida['import_ms']:.1f} ms "
+                         f"> orçamento de {orcamento_ms:.1f} ms")
+    for nome in medida['proibidos']:
+        violacoes.append(f"import {medida['modulo']} carregou {nome}")
+    return violacoes
+
+
+# ============================================================
+# COMPARAÇÃO COM BASELINE
+# ============================================================
+def comparar(atual, baseline, limiar=LIMIAR_PADRAO):
+    """Lista (nome, média base, média atual, razão, regrediu) das etapas em comum."""
+    linhas = []
+    base = baseline['resultados']
+    for nome, r in atual['resultados'].items():
+        if nome not in base:
+            continue
+        razao = r['media_ms'] / base[nome]['media_ms'] if base[nome]['media_ms'] else 1.0
+        linhas.append((nome, base[nome]['media_ms'], r['media_ms'], razao, razao > 1 + limiar))
+    return linhas
+
+
+def exibir_comparacao(linhas, limiar):
+    larg = 72
+    print()
+    print(_cor('═' * larg, ANSI_CYAN))
+    print(_cor(f"  COMPARAÇÃO COM BASELINE  —  limiar +{limiar:.0%}", ANSI_BOLD + ANSI_CYAN))
+    print(_cor('═' * larg, ANSI_CYAN))
+    print(_cor(f"  {'Etapa':<28}{'Base (ms)':>12}{'Atual (ms)':>12}{'Razão':>9}", ANSI_BOLD + ANSI_WHITE))
+    print(_cor('─' * larg, ANSI_GRAY))
+    for nome, base, atual, razao, regrediu in linhas:
+        cor = ANSI_RED if regrediu else ANSI_GREEN
+        marca = '  ✗ REGRESSÃO' if regrediu else ''
+        print(_cor(f"  {nome:<28}{base:>12.3f}{atual:>12.3f}{razao:>8.2f}x{marca}", cor))
+    print(_cor('─' * larg, ANSI_GRAY))
+    print()
+
+
+# ============================================================
+# MAIN
+# ============================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmarks de geração, Excel e relatórios (2024–2030, Mariana ativa/atestado).')
+    parser.add_argument('--saida', default='bench_escala.json', help='arquivo JSON de resultados')
+    parser.add_argument('--baseline', help='JSON de uma execução anterior para comparar')
+    parser.add_argument('--limiar', type=float, default=LIMIAR_PADRAO,
+                        help='aumento relativo da média considerado regressão (padrão: 0.2)')
+    parser.add_argument('--repeticoes', type=int, default=1,
+                        help='passadas cronometradas por período (padrão: 1)')
+    parser.add_argument('--orcamento-import', type=float, default=ORCAMENTO_IMPORT_MS,
+                        help='tempo máximo de `import gerador_escala` em ms (padrão: 30)')
+    parser.add_argument('--so-importacao', action='store_true',
+                        help='mede apenas o orçamento de importação')
+    parser.add_argument('--etapas', help='etapas separadas por vírgula (padrão: todas menos '
+                        + ', '.join(sorted(ETAPAS_OPCIONAIS)) + ')')
+    args = parser.parse_args(argv)
+
+    if args.etapas:
+        etapas = [e.strip() for e in args.etapas.split(',')]
+        desconhecidas = [e for e in etapas if e not in ETAPAS]
+        if desconhecidas:
+            parser.error(f"etapa(s) desconhecida(s): {', '.join(desconhecidas)}")
+    else:
+        etapas = [e for e in ETAPAS if e not in ETAPAS_OPCIONAIS]
+
+    importacao = medir_importacao()
+    violacoes = checar_importacao(importacao, args.orcamento_import)
+    cor = ANSI_RED if violacoes else ANSI_GREEN
+    print(_cor(f"  import gerador_escala: {importacao['import_ms']:.1f} ms "
+               f"(orçamento {args.orcamento_import:.1f} ms)", cor), file=sys.stderr)
+    for v in violacoes:
+        print(_cor(f"   ✗ {v}", ANSI_RED), file=sys.stderr)
+    if args.so_importacao:
+        return 1 if violacoes else 0
+
+    print(f"  {'Etapa':<28}{'Média':>13}{'p95':>13}{'Pico':>13}", file=sys.stderr)
+    resultado = rodar_bench(etapas, repeticoes=args.repeticoes)
+    resultado['importacao'] = importacao
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(_cor(f"  Resultados em: {args.saida}", ANSI_BOLD + ANSI_GREEN), file=sys.stderr)
+
+    regrediu = False
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        linhas = comparar(resultado, baseline, args.limiar)
+        exibir_comparacao(linhas, args.limiar)
+        regrediu = any(l[4] for l in linhas)
+    return 1 if (violacoes or regrediu or resultado['executor_divergente']) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
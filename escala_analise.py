@@ -0,0 +1,209 @@
+"""
+Análise de vários períodos — cobertura e carga com NumPy e pandas
+
+empilhar() junta escalas geradas em arrays (período × pessoa × dia) com os
+códigos inteiros da grade; as contas são reduções vetorizadas sobre eles:
+
+    blocos    = BLOCOS_POR_COD[codigos]                 (P × pessoa × dia)
+    cobertura = OR de blocos ao longo das pessoas        (P × dia)
+    vagos     = blocos M/T/N fora da cobertura           (P × dia × 3)
+
+Períodos têm de 28 a 31 dias; as colunas que sobram ficam com código 0 e
+são descartadas pela máscara `valido`. Os resultados saem como DataFrames.
+
+Uso:
+    pilha = empilhar_periodos(periodos_entre((2026, 1), (2027, 12)))
+    vagos_por_dia_semana(pilha)   # noites vagas por dia da semana, etc.
+    carga_por_medico(pilha)
+"""
+
+import numpy as np
+import pandas as pd
+
+from gerador_escala import (
+    BLOCO_M, BLOCO_T, BLOCO_N, BLOCOS_POR_COD, MEIOS_POR_COD, DIAS_SEMANA_PT,
+    config_de_dados, gerar_escala, grade_de_dados, regras_com_alerta,
+)
+
+BLOCOS = ('M', 'T', 'N')
+_BITS = np.array([BLOCO_M, BLOCO_T, BLOCO_N], dtype=np.uint8)
+_LUT_BLOCOS = np.array(BLOCOS_POR_COD, dtype=np.uint8)
+_LUT_MEIOS = np.array(MEIOS_POR_COD, dtype=np.int16)
+
+
+class PilhaEscalas:
+    """
+    Escalas de vários períodos em arrays alinhados:
+        codigos     uint8   (P, pessoas, dias)  código da grade (0 = sem turno)
+        presente    bool    (P, pessoas)        a pessoa tem linha no período
+        valido      bool    (P, dias)           a coluna é um dia do período
+        dia_semana  int8    (P, dias)           0=Seg ... 6=Dom (-1 fora do período)
+        meta        float   (P, pessoas)        meta em plantões (NaN = sem meta)
+        alerta      bool    (P, pessoas)        a meta conta como déficit
+    periodos: [(ano, mes, mariana_ativa)]; nomes: pessoas na ordem da 1ª aparição.
+    """
+
+    __slots__ = ('periodos', 'nomes', 'codigos', 'presente', 'valido', 'dia_semana',
+                 'meta', 'alerta')
+
+    def __init__(self, periodos, nomes, codigos, presente, valido, dia_semana, meta, alerta):
+        self.periodos = periodos
+        self.nomes = nomes
+        self.codigos = codigos
+        self.presente = presente
+        self.valido = valido
+        self.dia_semana = dia_semana
+        self.meta = meta
+        self.alerta = alerta
+
+    def __repr__(self):
+        return f"PilhaEscalas({len(self.periodos)} período(s), {len(self.nomes)} pessoa(s))"
+
+    def blocos(self):
+        """Máscara de blocos de cada célula (P, pessoas, dias)."""
+        return _LUT_BLOCOS[self.codigos]
+
+    def vagos(self):
+        """Blocos M/T/N sem ninguém (P, dias, 3), só nos dias do período."""
+        cobertura = np.bitwise_or.reduce(self.blocos(), axis=1)
+        return ((cobertura[..., None] & _BITS) == 0) & self.valido[..., None]
+
+    def rotulos(self):
+        return [f"{ano}-{mes:02d}" for ano, mes, _ in self.periodos]
+
+
+# ============================================================
+# MONTAGEM
+# ============================================================
+def empilhar(lista_dados):
+    """PilhaEscalas a partir de dicts `dados` (gerar_escala, ler_excel, ...)."""
+    lista_dados = list(lista_dados)
+    nomes, idx = [], {}
+    for dados in lista_dados:
+        for nome in dados['escalas']:
+            if nome not in idx:
+                idx[nome] = len(nomes)
+                nomes.append(nome)
+    n_p, n_u = len(lista_dados), len(nomes)
+    n_d = max((len(d['dias']) for d in lista_dados), default=0)
+
+    codigos = np.zeros((n_p, n_u, n_d), dtype=np.uint8)
+    presente = np.zeros((n_p, n_u), dtype=bool)
+    valido = np.zeros((n_p, n_d), dtype=bool)
+    dia_semana = np.full((n_p, n_d), -1, dtype=np.int8)
+    meta = np.full((n_p, n_u), np.nan)
+    alerta = np.zeros((n_p, n_u), dtype=bool)
+    periodos = []
+
+    for p, dados in enumerate(lista_dados):
+        grade = grade_de_dados(dados)
+        n = len(grade.dias)
+        linhas = [idx[nome] for nome in grade.nomes]
+        codigos[p, linhas, :n] = np.frombuffer(grade.matriz(), dtype=np.uint8).reshape(len(linhas), n)
+        presente[p, linhas] = True
+        valido[p, :n] = True
+        dia_semana[p, :n] = [d.weekday() for d in grade.dias]
+        periodos.append((dados['ano'], dados['mes'], dados['mariana_ativa']))
+
+        config = config_de_dados(dados)
+        com_alerta = regras_com_alerta(config)
+        for cfg in config['medicos']:
+            u = idx.get(cfg['nome'])
+            if u is None or cfg.get('meta') is None:
+                continue
+            meta[p, u] = cfg['meta']
+            alerta[p, u] = (cfg['regra'] in com_alerta
+                            and not (cfg['regra'] == 'mariana' and not dados['mariana_ativa']))
+
+    return PilhaEscalas(periodos, nomes, codigos, presente, valido, dia_semana, meta, alerta)
+
+
+def empilhar_periodos(periodos, mariana_ativa=False, config=None, engine='greedy'):
+    """Gera a escala de cada (ano, mes) e empilha; ver empilhar()."""
+    return empilhar(gerar_escala(ano, mes, mariana_ativa=mariana_ativa, engine=engine, config=config)
+                    for (ano, mes) in periodos)
+
+
+# ============================================================
+# COBERTURA
+# ============================================================
+def vagos_por_dia_semana(pilha):
+    """
+    Por dia da semana: dias somados em todos os períodos, blocos vagos M/T/N
+    e taxa de vacância de cada bloco (vagos / dias).
+    """
+    vagos = pilha.vagos()
+    semana = pilha.dia_semana[..., None] == np.arange(7)          # (P, dias, 7)
+    dias = semana.sum(axis=(0, 1))
+    contagem = np.einsum('pdk,pdb->kb', semana.astype(np.int32), vagos.astype(np.int32))
+    tabela = pd.DataFrame(contagem, index=pd.Index(DIAS_SEMANA_PT, name='dia_semana'),
+                          columns=list(BLOCOS))
+    tabela.insert(0, 'dias', dias)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for k, b in enumerate(BLOCOS):
+            tabela[f'taxa_{b}'] = contagem[:, k] / dias
+    return tabela
+
+
+def vagos_por_periodo(pilha):
+    """Por período: dias, blocos vagos M/T/N, total e taxa de vacância (vagos / blocos)."""
+    vagos = pilha.vagos()
+    contagem = vagos.sum(axis=1)                                    # (P, 3)
+    dias = pilha.valido.sum(axis=1)
+    tabela = pd.DataFrame(contagem, index=pd.Index(pilha.rotulos(), name='periodo'),
+                          columns=list(BLOCOS))
+    tabela.insert(0, 'dias', dias)
+    tabela['total'] = contagem.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        tabela['taxa'] = tabela['total'] / (dias * len(BLOCOS))
+    return tabela
+
+
+# ============================================================
+# CARGA POR MÉDICO
+# ============================================================
+def _carga(pilha):
+    """Arrays (P, pessoas): meios plantões, noites, turnos de fds e déficit em meios."""
+    blocos = pilha.blocos()
+    meios = _LUT_MEIOS[pilha.codigos].sum(axis=2)
+    noites = ((blocos & BLOCO_N) != 0).sum(axis=2)
+    fds = ((blocos != 0) & (pilha.dia_semana >= 5)[:, None, :]).sum(axis=2)
+    teto = np.where(np.isnan(pilha.meta), 0, np.round(pilha.meta * 2))
+    deficit = np.where(pilha.alerta, np.maximum(teto - meios, 0), 0)
+    return meios, noites, fds, deficit
+
+
+def carga_medicos(pilha):
+    """
+    Uma linha por (período, pessoa presente): plantões, noites, turnos de
+    fim de semana, meta e déficit (plantões que faltam, só para quem tem
+    alerta de meta).
+    """
+    meios, noites, fds, deficit = _carga(pilha)
+    p, u = np.nonzero(pilha.presente)
+    rotulos = np.array(pilha.rotulos(), dtype=object)
+    return pd.DataFrame({
+        'periodo': rotulos[p],
+        'medico': np.array(pilha.nomes, dtype=object)[u],
+        'plantoes': meios[p, u] / 2,
+        'noites': noites[p, u],
+        'fds': fds[p, u],
+        'meta': pilha.meta[p, u],
+        'deficit': deficit[p, u] / 2,
+    })
+
+
+def carga_por_medico(pilha):
+    """
+    Totais por pessoa em todos os períodos: períodos presentes, plantões,
+    noites, turnos de fds, déficit e períodos com déficit.
+    """
+    meios, noites, fds, deficit = _carga(pilha)
+    return pd.DataFrame({
+        'periodos': pilha.presente.sum(axis=0),
+        'plantoes': meios.sum(axis=0) / 2,
+        'noites': noites.sum(axis=0),
+        'fds': fds.sum(axis=0),
+        'deficit': deficit.sum(axis=0) / 2,
+        'periodos_com_deficit': (deficit > 0).sum(axis=0),
+    }, index=pd.Index(pilha.nomes, name='medico'))
@@ -0,0 +1,162 @@
+"""
+Cenários "e se" — comparar combinações de disponibilidade de uma vez
+
+explorar_cenarios() recebe eixos {ajuste: [valores]}, monta o produto
+cartesiano e gera a escala de cada combinação (gerar_escala) num
+ProcessPoolExecutor. Devolve uma tabela compacta ordenada por slots vagos,
+déficit em relação às metas e número de alertas.
+
+Ajustes:
+    'mariana_ativa':   True/False (como na CLI principal)
+    'MEDICO.meta':     meta em plantões (ex.: 'Valquiria.meta': [14.5, 12])
+    'MEDICO.regra':    regra embutida ou de config['regras'] (ex.: Laura
+                       voltando da licença, Melissa com fins de semana)
+    'MEDICO.fora':     True tira o médico da unidade no cenário
+MEDICO é o nome completo ou o apelido (medico_por_nome).
+
+Uso:
+    tabela = explorar_cenarios(2026, 2, {
+        'mariana_ativa': [False, True],
+        'Valquiria.meta': [14.5, 12, 10],
+    })
+"""
+
+from itertools import product
+import os
+
+from gerador_escala import (
+    UNIDADE_PADRAO, contar_meios_plantoes, gerar_escala, get_periodo, medico_por_nome,
+    plantoes_de_meios, regras_com_alerta, validar_config,
+)
+
+CAMPOS_MEDICO = ('meta', 'regra', 'fora')
+
+
+def cenarios_de_eixos(eixos):
+    """Produto cartesiano dos eixos → [{ajuste: valor}], na ordem dos eixos."""
+    chaves = list(eixos)
+    return [dict(zip(chaves, valores)) for valores in product(*(eixos[k] for k in chaves))]
+
+
+def _campo(config, chave):
+    """(config do médico, campo) de um ajuste 'MEDICO.campo'; ValueError se não existir."""
+    medico, _, campo = chave.rpartition('.')
+    if not medico or campo not in CAMPOS_MEDICO:
+        raise ValueError(f"ajuste desconhecido {chave!r} "
+                         f"(use mariana_ativa ou MEDICO.{'|'.join(CAMPOS_MEDICO)})")
+    return medico_por_nome(config, medico), campo
+
+
+def aplicar_cenario(config, cenario):
+    """
+    (config, mariana_ativa) com os ajustes do cenário aplicados a uma cópia
+    de `config`. Ajuste desconhecido ou combinação inválida → ValueError.
+    """
+    config = dict(config, medicos=[dict(m) for m in config['medicos']])
+    mariana_ativa = bool(cenario.get('mariana_ativa', False))
+    fora = set()
+    for chave, valor in cenario.items():
+        if chave == 'mariana_ativa':
+            continue
+        cfg, campo = _campo(config, chave)
+        if campo == 'fora':
+            if valor:
+                fora.add(cfg['nome'])
+        elif campo == 'meta':
+            if valor is not None and (isinstance(valor, bool) or not isinstance(valor, (int, float))):
+                raise ValueError(f"{chave}: meta deve ser um número: {valor!r}")
+            cfg['meta'] = valor
+        else:
+            cfg['regra'] = valor
+    config['medicos'] = [m for m in config['medicos'] if m['nome'] not in fora]
+    return validar_config(config), mariana_ativa
+
+
+def deficit_meios(dados, config):
+    """Meios plantões que faltam para as metas dos médicos com alerta de meta."""
+    com_alerta = regras_com_alerta(config)
+    falta = 0
+    for cfg in config['medicos']:
+        if cfg['regra'] not in com_alerta or not cfg.get('meta'):
+            continue
+        if cfg['regra'] == 'mariana' and not dados['mariana_ativa']:
+            continue
+        falta += max(0, round(cfg['meta'] * 2) - contar_meios_plantoes(dados['escalas'][cfg['nome']]))
+    return falta
+
+
+# ============================================================
+# WORKERS
+# ============================================================
+# A configuração base e o período vão uma vez por worker (initializer); as
+# tarefas carregam só (índice, cenário).
+_base_cenarios = None
+
+
+def _iniciar_worker_cenarios(base):
+    global _base_cenarios
+    _base_cenarios = base
+    get_periodo(base[1], base[2])
+
+
+def _avaliar_cenario(tarefa):
+    i, cenario = tarefa
+    config, ano, mes, engine = _base_cenarios
+    linha = {'cenario': cenario, 'indice': i, 'erro': None, 'vagos': None,
+             'total_vagos': None, 'deficit': None, 'alertas': []}
+    try:
+        config, mariana_ativa = aplicar_cenario(config, cenario)
+    except ValueError as e:
+        linha['erro'] = str(e)
+        return linha
+    dados = gerar_escala(ano, mes, mariana_ativa=mariana_ativa, engine=engine, config=config)
+    vagos = {b: len(dados['slots_vagos'][b]) for b in ('M', 'T', 'N')}
+    linha.update({
+        'vagos': vagos,
+        'total_vagos': sum(vagos.values()),
+        'deficit': plantoes_de_meios(deficit_meios(dados, config)),
+        'alertas': dados['alertas'],
+    })
+    return linha
+
+
+# ============================================================
+# API
+# ============================================================
+def explorar_cenarios(ano, mes, eixos, config=None, engine='greedy', workers=None):
+    """
+    Avalia cada combinação dos eixos e retorna as linhas ordenadas (melhor
+    primeiro) por slots vagos, déficit e alertas; cenários inválidos vêm por
+    último com 'erro'. Cada linha: cenario, posicao, vagos {M, T, N},
+    total_vagos, deficit (plantões), alertas, erro. Ajuste desconhecido
+    nos eixos → ValueError antes de gerar qualquer escala.
+
+    O calendário do período é montado aqui, antes do pool: com fork os
+    workers já o herdam em cache (get_periodo); nos demais, cada worker o
+    monta uma vez no initializer.
+    """
+    config = validar_config(config or UNIDADE_PADRAO)
+    for chave in eixos:
+        if chave != 'mariana_ativa':
+            _campo(config, chave)
+    cenarios = cenarios_de_eixos(eixos)
+    get_periodo(ano, mes)
+    base = (config, ano, mes, engine)
+    tarefas = list(enumerate(cenarios))
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tarefas) <= 1:
+        _iniciar_worker_cenarios(base)
+        linhas = [_avaliar_cenario(t) for t in tarefas]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        chunksize = max(1, len(tarefas) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_worker_cenarios,
+                                 initargs=(base,)) as pool:
+            linhas = list(pool.map(_avaliar_cenario, tarefas, chunksize=chunksize))
+
+    linhas.sort(key=lambda l: (l['erro'] is not None, l['total_vagos'] or 0, l['deficit'] or 0,
+                               len(l['alertas']), l['indice']))
+    for posicao, linha in enumerate(linhas, 1):
+        linha['posicao'] = posicao
+        del linha['indice']
+    return linhas
@@ -0,0 +1,424 @@
+"""
+Motor de restrições (CP) da escala — alternativa ao encadeamento fixo das
+funções regra_* de gerar_escala.
+
+Cada médico recebe, para cada dia do período, um domínio de turnos possíveis
+guardado como bitset sobre TURNOS_CP. A busca percorre as variáveis
+(dia × médico) em ordem cronológica, propaga conflitos de bloco (M/T/N) e os
+tetos de plantões, e faz branch-and-bound minimizando, nesta ordem:
+turnos vagos, déficit em relação à meta e penalidade de preferência.
+
+Uso: gerar_escala(ano, mes, engine='cp')
+"""
+
+import time
+
+from gerador_escala import (
+    UNIDADE_PADRAO, TURNOS, ORDEM_LINHAS, Ausencias, GradeEscala, get_periodo, como_calendario,
+    contar_meios_plantoes, plantoes_de_meios, validar_config, apelido_medico, aplicar_ausencias,
+    regras_com_alerta,
+)
+from escala_regras import regras_declarativas
+
+# ============================================================
+# TURNOS DO MODELO
+# ============================================================
+# Turnos que as regras podem atribuir; blocos e peso vêm do registro TURNOS.
+FOLGA = 0
+TURNOS_CP = [(None, 0, 0)] + [   # 0 = folga
+    (cod, TURNOS[cod]['blocos'], TURNOS[cod]['meios'])
+    for cod in ('M', 'T', 'N', 'D', 'D/N', 'T/N')
+]
+IDX_TURNO = {cod: i for i, (cod, _, _) in enumerate(TURNOS_CP) if cod}
+BLOCOS_TURNO = [b for (_, b, _) in TURNOS_CP]
+MEIOS_TURNO = [m for (_, _, m) in TURNOS_CP]
+_BITS_POPCOUNT = [bin(b).count('1') for b in range(8)]
+
+# Bitset dos turnos compatíveis com cada máscara de blocos já ocupados.
+COMPATIVEIS = [
+    sum(1 << i for i, b in enumerate(BLOCOS_TURNO) if b & ocup == 0)
+    for ocup in range(8)
+]
+
+# Peso do objetivo (lexicográfico): vagos ≫ déficit ≫ preferência.
+PESO_VAGO = 1_000_000
+PESO_DEFICIT = 1_000
+
+
+def _bits(*codigos):
+    """Bitset de domínio com os códigos informados (None = folga)."""
+    total = 0
+    for cod in codigos:
+        total |= 1 << (FOLGA if cod is None else IDX_TURNO[cod])
+    return total
+
+
+# ============================================================
+# MODELO: DOMÍNIOS POR MÉDICO
+# ============================================================
+class _MedicoCP:
+    """Domínios, preferências e tetos de um médico no modelo CP."""
+
+    __slots__ = ('nome', 'regra', 'teto', 'alvo', 'dominios', 'penalidades', 'grupos')
+
+    def __init__(self, nome, regra, teto, alvo, num_dias):
+        self.nome = nome
+        self.regra = regra
+        self.teto = teto            # máximo de meios plantões (None = sem teto)
+        self.alvo = alvo            # meta em meios plantões (None = sem meta)
+        self.dominios = [0] * num_dias
+        self.penalidades = {}       # (i_dia, i_turno) -> penalidade
+        self.grupos = []            # [(conjunto de i_dia, máximo de turnos)]
+
+    def permitir(self, i, codigos, penalidade=0, obrigatorio=False):
+        dom = _bits(*codigos)
+        if not obrigatorio:
+            dom |= 1 << FOLGA
+        self.dominios[i] |= dom
+        for cod in codigos:
+            self.penalidades[(i, IDX_TURNO[cod])] = penalidade
+
+
+def montar_modelo(cal, mariana_ativa=False, config=None, ausencias=None):
+    """
+    Traduz as regras de cada médico de config['medicos'] em domínios CP.
+    Dias em `ausencias` (Ausencias) ficam sem variável para o médico.
+    Retorna lista de _MedicoCP na mesma ordem.
+    """
+    config = config or UNIDADE_PADRAO
+    cal = como_calendario(cal)
+    idx = cal.index
+    primeiro_sab = cal.primeiro_do_mes_novo(5)
+    declarativas = regras_declarativas(config)
+    medicos = []
+
+    for cfg in config['medicos']:
+        regra = cfg['regra']
+        meta = cfg['meta']
+        meios = round(meta * 2) if meta else 0
+        med = _MedicoCP(cfg['nome'], regra, meios if meta is not None else None,
+                        meios if meta else None, len(cal))
+
+        if regra == 'bruna':
+            for d in cal.uteis:
+                med.permitir(idx(d), ['M'], obrigatorio=True)
+
+        elif regra == 'gustavo':
+            for d in cal.por_weekday(0):
+                med.permitir(idx(d), ['N'], obrigatorio=True)
+            for k, d in enumerate(cal.por_weekday(5)):
+                med.permitir(idx(d), ['D/N'], penalidade=0 if k == 3 else 3)
+            for k, d in enumerate(cal.por_weekday(6)):
+                med.permitir(idx(d), ['D'], penalidade=1 if k in (1, 3) else 2)
+
+        elif regra == 'mariana':
+            if not mariana_ativa:
+                med.alvo = None
+            else:
+                for d in cal.por_weekday(3):
+                    med.permitir(idx(d), ['N'])
+                for d in cal.por_weekday(6):
+                    med.permitir(idx(d), ['N'], penalidade=1)
+
+        elif regra == 'mauricio':
+            proibidas = cal.ultimos_no_periodo(4)
+            sextas = [d for d in cal.por_weekday(4) if d not in proibidas]
+            for d in sextas:
+                med.permitir(idx(d), ['N'])
+            med.grupos.append((frozenset(idx(d) for d in sextas), 3))
+            if primeiro_sab is not None:
+                med.permitir(idx(primeiro_sab), ['D'])
+
+        elif regra == 'faim':
+            proibidas = cal.ultimos_no_periodo(2)
+            quartas = [d for d in cal.por_weekday(2) if d not in proibidas]
+            for d in quartas:
+                med.permitir(idx(d), ['N'])
+            med.grupos.append((frozenset(idx(d) for d in quartas), 3))
+            if primeiro_sab is not None:
+                med.permitir(idx(primeiro_sab), ['N'])
+
+        elif regra == 'melissa':
+            # Mesmas faixas de prioridade de regra_melissa
+            for wd, prio in ((1, 0), (2, 0), (4, 0), (6, 1), (3, 2), (5, 3)):
+                for d in cal.por_weekday(wd):
+                    med.permitir(idx(d), ['N'], penalidade=prio)
+
+        elif regra == 'valquiria':
+            for i, d in enumerate(cal):
+                if d.weekday() == 3:
+                    med.permitir(i, ['T', 'T/N'])
+                elif d.weekday() < 5:
+                    med.permitir(i, ['T'])
+                else:
+                    med.permitir(i, ['D/N', 'D', 'T'], penalidade=1)
+
+        elif regra in declarativas:
+            # Faixa do passo como penalidade; 'max' do passo vira grupo
+            dominios, grupos = declarativas[regra].permitidos(cal)
+            for i, codigos, prio in dominios:
+                med.permitir(i, codigos, penalidade=prio)
+            med.grupos += grupos
+
+        # 'licenca' e regras desconhecidas: domínio vazio (sem plantões)
+        if ausencias:
+            for d in ausencias.no_periodo(cfg['nome'], cal):
+                med.dominios[idx(d)] = 0
+        if med.teto is not None:
+            # Como no guloso, os turnos obrigatórios param na meta: os que
+            # passariam do teto (em ordem de data) ficam opcionais.
+            obrig = 0
+            for i, dom in enumerate(med.dominios):
+                if dom and not dom & (1 << FOLGA):
+                    meios = min(MEIOS_TURNO[t] for t in range(1, len(TURNOS_CP)) if dom >> t & 1)
+                    if obrig + meios <= med.teto:
+                        obrig += meios
+                    else:
+                        med.dominios[i] |= 1 << FOLGA
+        medicos.append(med)
+
+    return medicos
+
+
+# ============================================================
+# BUSCA (branch-and-bound com propagação por bitsets)
+# ============================================================
+class _TempoEsgotado(Exception):
+    pass
+
+
+class _Busca:
+    """Estado da busca; variáveis ordenadas por (dia, domínio, médico)."""
+
+    def __init__(self, medicos, num_dias, limite_s):
+        self.medicos = medicos
+        self.num_dias = num_dias
+        self.prazo = time.perf_counter() + limite_s
+        self.nos = 0
+
+        variaveis = []
+        for j, med in enumerate(medicos):
+            for i, dom in enumerate(med.dominios):
+                if dom:
+                    obrigatorio = not dom & (1 << FOLGA)
+                    variaveis.append((i, 0 if obrigatorio else 1, j, dom))
+        variaveis.sort()
+        self.vars = [(i, j, dom) for (i, _, j, dom) in variaveis]
+        n = len(self.vars)
+
+        # Grupos com limite de contagem: (médico, índice do grupo) por dia
+        self.grupo_do_dia = [dict() for _ in medicos]
+        for j, med in enumerate(medicos):
+            for g, (conj, _) in enumerate(med.grupos):
+                for i in conj:
+                    self.grupo_do_dia[j][i] = g
+
+        # Dia que fecha após a variável k (última variável daquele dia)
+        self.fecha = [None] * n
+        for k in range(n):
+            if k == n - 1 or self.vars[k + 1][0] != self.vars[k][0]:
+                self.fecha[k] = self.vars[k][0]
+        dias_com_var = {v[0] for v in self.vars}
+        self.vagos_base = 3 * (num_dias - len(dias_com_var))
+
+        # Sufixos estáticos para os limites inferiores
+        nm = len(medicos)
+        self.pot = [[0] * (n + 1) for _ in range(nm)]    # meios possíveis
+        self.obrig = [[0] * (n + 1) for _ in range(nm)]  # meios obrigatórios
+        self.cob = [[0] * (n + 1) for _ in range(nm)]    # blocos cobríveis
+        self.razao = [(0, 1)] * nm                        # blocos por meio (máx.)
+        for j, med in enumerate(medicos):
+            melhor = (0, 1)
+            for i_t in range(1, len(TURNOS_CP)):
+                if any(dom >> i_t & 1 for dom in med.dominios):
+                    b, m = _BITS_POPCOUNT[BLOCOS_TURNO[i_t]], MEIOS_TURNO[i_t]
+                    if b * melhor[1] > melhor[0] * m:
+                        melhor = (b, m)
+            self.razao[j] = melhor
+        for k in range(n - 1, -1, -1):
+            i, jv, dom = self.vars[k]
+            for j in range(nm):
+                self.pot[j][k] = self.pot[j][k + 1]
+                self.cob[j][k] = self.cob[j][k + 1]
+                self.obrig[j][k] = self.obrig[j][k + 1]
+            m_max = 0
+            blocos = 0
+            for i_t in range(1, len(TURNOS_CP)):
+                if dom >> i_t & 1:
+                    m_max = max(m_max, MEIOS_TURNO[i_t])
+                    blocos |= BLOCOS_TURNO[i_t]
+            self.pot[jv][k] += m_max
+            self.cob[jv][k] += _BITS_POPCOUNT[blocos]
+            if not dom & (1 << FOLGA):
+                self.obrig[jv][k] += min(MEIOS_TURNO[i_t] for i_t in range(1, len(TURNOS_CP))
+                                         if dom >> i_t & 1)
+        # Dias ainda abertos a partir da variável k (inclui o dia de k)
+        self.dias_abertos = [0] * (n + 1)
+        for k in range(n - 1, -1, -1):
+            self.dias_abertos[k] = self.dias_abertos[k + 1] + (1 if self.fecha[k] is not None else 0)
+
+        self.ocup = [0] * num_dias
+        self.usado = [0] * nm
+        self.contagem = [[0] * len(med.grupos) for med in medicos]
+        self.escolha = [FOLGA] * n
+        self.melhor_custo = None
+        self.melhor = None
+
+    # ── limite inferior do custo a partir da variável k ──
+    def _limite(self, k, vagos, penal):
+        deficit = 0
+        capacidade = 0
+        for j, med in enumerate(self.medicos):
+            usado = self.usado[j]
+            if med.alvo is not None:
+                falta = med.alvo - usado - self.pot[j][k]
+                if falta > 0:
+                    deficit += falta
+            cob = self.cob[j][k]
+            if med.teto is not None:
+                num, den = self.razao[j]
+                cap = (med.teto - usado) * num // den
+                if cap < cob:
+                    cob = cap
+            capacidade += cob
+        # Blocos ainda abertos menos o máximo que a capacidade restante cobre
+        i = self.vars[k][0]
+        abertos = 3 * (self.dias_abertos[k] - 1) + 3 - _BITS_POPCOUNT[self.ocup[i]]
+        vagos_fut = abertos - capacidade
+        if vagos_fut < 0:
+            vagos_fut = 0
+        return (vagos + vagos_fut) * PESO_VAGO + deficit * PESO_DEFICIT + penal
+
+    def _custo_final(self, vagos, penal):
+        deficit = 0
+        for j, med in enumerate(self.medicos):
+            if med.alvo is not None and self.usado[j] < med.alvo:
+                deficit += med.alvo - self.usado[j]
+        return vagos * PESO_VAGO + deficit * PESO_DEFICIT + penal
+
+    def _candidatos(self, k):
+        i, j, dom = self.vars[k]
+        med = self.medicos[j]
+        ocup = self.ocup[i]
+        dom &= COMPATIVEIS[ocup]
+        g = self.grupo_do_dia[j].get(i)
+        if g is not None and self.contagem[j][g] >= med.grupos[g][1]:
+            dom &= 1 << FOLGA
+        # Reserva o teto para os turnos obrigatórios ainda por vir
+        restante = None if med.teto is None else (
+            med.teto - self.usado[j] - self.obrig[j][k + 1])
+        cands = []
+        for i_t in range(1, len(TURNOS_CP)):
+            if dom >> i_t & 1 and (restante is None or MEIOS_TURNO[i_t] <= restante):
+                novos = _BITS_POPCOUNT[BLOCOS_TURNO[i_t] & ~ocup]
+                cands.append((-novos, med.penalidades.get((i, i_t), 0), MEIOS_TURNO[i_t], i_t))
+        cands.sort()
+        saida = [c[3] for c in cands]
+        if dom & (1 << FOLGA):
+            saida.append(FOLGA)
+        return saida
+
+    def _dfs(self, k, vagos, penal):
+        self.nos += 1
+        if self.nos & 0x3FF == 0 and time.perf_counter() > self.prazo:
+            raise _TempoEsgotado
+        if k == len(self.vars):
+            custo = self._custo_final(vagos, penal)
+            if self.melhor_custo is None or custo < self.melhor_custo:
+                self.melhor_custo = custo
+                self.melhor = list(self.escolha)
+            return
+        if self.melhor_custo is not None and self._limite(k, vagos, penal) >= self.melhor_custo:
+            return
+
+        i, j, _ = self.vars[k]
+        med = self.medicos[j]
+        g = self.grupo_do_dia[j].get(i)
+        fecha = self.fecha[k]
+        for i_t in self._candidatos(k):
+            blocos = BLOCOS_TURNO[i_t]
+            meios = MEIOS_TURNO[i_t]
+            self.ocup[i] |= blocos
+            self.usado[j] += meios
+            if g is not None and i_t != FOLGA:
+                self.contagem[j][g] += 1
+            self.escolha[k] = i_t
+            v = vagos
+            if fecha is not None:
+                v += 3 - _BITS_POPCOUNT[self.ocup[i]]
+            try:
+                self._dfs(k + 1, v, penal + med.penalidades.get((i, i_t), 0))
+            finally:
+                self.ocup[i] &= ~blocos
+                self.usado[j] -= meios
+                if g is not None and i_t != FOLGA:
+                    self.contagem[j][g] -= 1
+        self.escolha[k] = FOLGA
+
+    def resolver(self):
+        try:
+            self._dfs(0, self.vagos_base, 0)
+        except _TempoEsgotado:
+            pass
+        return self.melhor
+
+
+# ============================================================
+# API
+# ============================================================
+def resolver_escala(ano, mes, mariana_ativa=False, limite_s=0.3, config=None, ausencias=None):
+    """
+    Resolve o período pelo modelo CP dentro do tempo limite (em segundos)
+    e retorna o mesmo dict `dados` de gerar_escala. Sem solução dentro do
+    limite, retorna a escala do motor guloso (com um alerta).
+    """
+    config = validar_config(config or UNIDADE_PADRAO)
+    ausencias = ausencias if ausencias is not None else Ausencias.de_config(config)
+    dias = get_periodo(ano, mes)
+    medicos = montar_modelo(dias, mariana_ativa=mariana_ativa, config=config, ausencias=ausencias)
+    busca = _Busca(medicos, len(dias), limite_s)
+    solucao = busca.resolver()
+    if solucao is None:
+        from gerador_escala import gerar_escala
+        dados = gerar_escala(ano, mes, mariana_ativa=mariana_ativa, config=config,
+                             ausencias=ausencias)
+        dados['alertas'].insert(0, "Motor CP sem solução no tempo limite: escala do motor guloso")
+        return dados
+
+    por_medico = {med.nome: {} for med in medicos}
+    for (i, j, _), i_t in zip(busca.vars, solucao):
+        if i_t != FOLGA:
+            por_medico[medicos[j].nome][dias[i]] = TURNOS_CP[i_t][0]
+
+    # Mesma ordem de linhas do motor guloso
+    ordem = ORDEM_LINHAS
+    grade = GradeEscala(dias)
+    for med in sorted(medicos, key=lambda m: ordem.index(m.regra) if m.regra in ordem else len(ordem)):
+        grade.aplicar(med.nome, por_medico[med.nome])
+    aplicar_ausencias(grade, config, ausencias)
+    for rpa in config['rpa']:
+        grade.aplicar(rpa['nome'], {})
+    resultado = grade.escalas()
+
+    alertas = []
+    com_alerta = regras_com_alerta(config)
+    for cfg, med in zip(config['medicos'], medicos):
+        if med.regra not in com_alerta or med.alvo is None:
+            continue
+        meios = contar_meios_plantoes(resultado[med.nome])
+        if meios < med.alvo:
+            falta = plantoes_de_meios(med.alvo - meios)
+            alertas.append(f"{apelido_medico(cfg)}: faltam {falta} plantão(ões)")
+
+    return {
+        'dias': dias,
+        'escalas': resultado,
+        'alertas': alertas,
+        'slots_vagos': grade.vagos(),
+        'ano': ano,
+        'mes': mes,
+        'mariana_ativa': mariana_ativa,
+        'grade': grade,
+        'config': config,
+        'ausencias': ausencias,
+    }
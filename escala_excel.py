@@ -0,0 +1,521 @@
+"""
+Camada Excel do Gerador de Escala — estilos, layout (PlanoPlanilha) e backends
+
+Importado sob demanda por gerador_escala.gerar_excel: o openpyxl e os objetos
+de estilo (Font/PatternFill/Border) só são carregados quando uma planilha é
+de fato gerada, e os relatórios de texto e a API não pagam esse custo.
+"""
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
+from openpyxl.styles.borders import DEFAULT_BORDER
+from openpyxl.styles.fills import DEFAULT_EMPTY_FILL
+from openpyxl.styles.fonts import DEFAULT_FONT
+from openpyxl.worksheet.cell_range import CellRange
+from openpyxl.utils import get_column_letter
+
+from escala_perfil import span
+from gerador_escala import (
+    DIAS_SEMANA_PT, TURNOS, CODIGOS_TURNO, COD_TURNO,
+    COR_VERDE_ESCURO, COR_VERDE_CLARO, COR_BRANCO, COR_CINZA,
+    COR_ROSA_LICENCA, COR_AMARELO_ATESTADO, COR_LARANJA_VAZIO,
+    COR_AZUL_FERIAS, COR_LILAS_SINDICATO,
+    grade_de_dados, config_de_dados, contar_plantoes, nome_periodo,
+)
+
+# ============================================================
+# ESTILOS
+# ============================================================
+# Fontes
+FONT_BOLD = Font(bold=True, size=9, color='FF000000')
+FONT_NORMAL = Font(bold=False, size=9, color='FF000000')
+FONT_SHIFT = Font(bold=True, size=9, color='FF000000')
+FONT_TITLE = Font(bold=True, size=11, color='FF000000')
+FONT_HEADER = Font(bold=True, size=9, color='FF000000')
+
+# Alinhamentos
+ALIGN_CENTER = Alignment(horizontal='center', vertical='center')
+ALIGN_LEFT = Alignment(horizontal='left', vertical='center')
+
+# Fills
+FILL_VERDE_ESCURO = PatternFill('solid', fgColor=COR_VERDE_ESCURO)
+FILL_VERDE_CLARO = PatternFill('solid', fgColor=COR_VERDE_CLARO)
+FILL_BRANCO = PatternFill('solid', fgColor=COR_BRANCO)
+FILL_CINZA = PatternFill('solid', fgColor=COR_CINZA)
+FILL_ROSA = PatternFill('solid', fgColor=COR_ROSA_LICENCA)
+FILL_AMARELO = PatternFill('solid', fgColor=COR_AMARELO_ATESTADO)
+FILL_LARANJA = PatternFill('solid', fgColor=COR_LARANJA_VAZIO)
+FILL_AZUL = PatternFill('solid', fgColor=COR_AZUL_FERIAS)
+FILL_LILAS = PatternFill('solid', fgColor=COR_LILAS_SINDICATO)
+
+# Bordas
+THIN_BORDER = Border(
+    left=Side(style='thin', color='FF999999'),
+    right=Side(style='thin', color='FF999999'),
+    top=Side(style='thin', color='FF999999'),
+    bottom=Side(style='thin', color='FF999999')
+)
+
+# Bloco "DATAS PARA PREENCHER" (canto superior direito)
+FILL_LARANJA_TITULO = PatternFill('solid', fgColor='FFE65100')           # laranja escuro
+FILL_LARANJA_LINHA  = PatternFill('solid', fgColor='FFFFF3E0')           # laranja muito claro
+FILL_FDS_RPA        = PatternFill('solid', fgColor='FFFFE0B2')           # laranja/amarelo FDS
+FILL_RPA_CABECALHO  = PatternFill('solid', fgColor='FFFFCC80')
+FONT_RPA_TITULO     = Font(bold=True,  size=9, color='FFFFFFFF')
+FONT_RPA_CAB        = Font(bold=True,  size=8, color='FF7F3000')
+FONT_RPA_DATA       = Font(bold=False, size=8, color='FF212121')
+FONT_RPA_TURNO      = Font(bold=True,  size=8, color='FFE65100')
+FONT_ALERTA         = Font(bold=False, size=8, color='FFFF0000')
+THIN_BORDER_RPA = Border(
+    left=Side(style='thin', color='FFFFCC80'),
+    right=Side(style='thin', color='FFFFCC80'),
+    top=Side(style='thin', color='FFFFCC80'),
+    bottom=Side(style='thin', color='FFFFCC80'),
+)
+
+# ============================================================
+# REGISTRO DE ESTILOS DO EXCEL
+# ============================================================
+# Cada célula da planilha recebe exatamente um estilo deste registro.
+# O backend padrão aplica os atributos diretamente; o backend
+# 'streaming' registra cada entrada como NamedStyle no workbook.
+ESTILOS_EXCEL = {
+    # Cabeçalho e legenda de horários
+    'titulo':        {'font': FONT_TITLE, 'alignment': ALIGN_CENTER, 'fill': FILL_BRANCO},
+    'cabecalho':     {'font': FONT_BOLD, 'alignment': ALIGN_CENTER, 'fill': FILL_BRANCO},
+    'dia_semana':    {'font': FONT_BOLD, 'alignment': ALIGN_CENTER,
+                      'fill': FILL_VERDE_ESCURO, 'border': THIN_BORDER},
+    'dia_numero':    {'font': FONT_BOLD, 'alignment': ALIGN_CENTER,
+                      'fill': FILL_VERDE_CLARO, 'border': THIN_BORDER},
+
+    # Linhas de médicos: nome, matrícula e total
+    'nome':                 {'font': FONT_NORMAL, 'alignment': ALIGN_LEFT, 'fill': FILL_BRANCO},
+    'nome_licenca':         {'font': FONT_NORMAL, 'alignment': ALIGN_LEFT, 'fill': FILL_ROSA},
+    'nome_atestado':        {'font': FONT_NORMAL, 'alignment': ALIGN_LEFT, 'fill': FILL_AMARELO},
+    'matricula':            {'font': FONT_NORMAL, 'alignment': ALIGN_CENTER},
+    'matricula_licenca':    {'font': FONT_NORMAL, 'alignment': ALIGN_CENTER, 'fill': FILL_ROSA},
+    'matricula_atestado':   {'font': FONT_NORMAL, 'alignment': ALIGN_CENTER, 'fill': FILL_AMARELO},
+    'total':                {'font': FONT_BOLD, 'alignment': ALIGN_CENTER},
+    'total_licenca':        {'font': FONT_BOLD, 'alignment': ALIGN_CENTER, 'fill': FILL_ROSA},
+
+    # Células de turno (com código) e vazias, por fundo
+    'turno':                {'font': FONT_SHIFT, 'alignment': ALIGN_CENTER, 'border': THIN_BORDER},
+    'turno_fds':            {'font': FONT_SHIFT, 'alignment': ALIGN_CENTER, 'border': THIN_BORDER,
+                             'fill': FILL_VERDE_CLARO},
+    'turno_licenca':        {'font': FONT_SHIFT, 'alignment': ALIGN_CENTER, 'border': THIN_BORDER,
+                             'fill': FILL_ROSA},
+    'turno_atestado':       {'font': FONT_SHIFT, 'alignment': ALIGN_CENTER, 'border': THIN_BORDER,
+                             'fill': FILL_AMARELO},
+    'turno_vazio':          {'alignment': ALIGN_CENTER, 'border': THIN_BORDER},
+    'turno_vazio_fds':      {'alignment': ALIGN_CENTER, 'border': THIN_BORDER, 'fill': FILL_VERDE_CLARO},
+    'turno_vazio_licenca':  {'alignment': ALIGN_CENTER, 'border': THIN_BORDER, 'fill': FILL_ROSA},
+    'turno_vazio_atestado': {'alignment': ALIGN_CENTER, 'border': THIN_BORDER, 'fill': FILL_AMARELO},
+    'turno_ferias':         {'font': FONT_SHIFT, 'alignment': ALIGN_CENTER, 'border': THIN_BORDER,
+                             'fill': FILL_AZUL},
+    'turno_sindicato':      {'font': FONT_SHIFT, 'alignment': ALIGN_CENTER, 'border': THIN_BORDER,
+                             'fill': FILL_LILAS},
+
+    # Linhas RPA, atestado e alertas
+    'rpa_nome':      {'font': FONT_NORMAL, 'fill': FILL_BRANCO},
+    'atestado':      {'font': FONT_BOLD, 'alignment': ALIGN_LEFT, 'fill': FILL_CINZA},
+    'alerta':        {'font': FONT_ALERTA, 'alignment': ALIGN_LEFT},
+
+    # Turnos vagos (FALTAM PREENCHER)
+    'vagos_titulo':  {'font': FONT_BOLD, 'alignment': ALIGN_CENTER, 'fill': FILL_LARANJA},
+    'vago':          {'font': FONT_BOLD, 'alignment': ALIGN_CENTER, 'border': THIN_BORDER,
+                      'fill': FILL_LARANJA},
+    'coberto':       {'font': FONT_BOLD, 'alignment': ALIGN_CENTER, 'border': THIN_BORDER,
+                      'fill': FILL_BRANCO},
+
+    # Legenda de cores
+    'negrito':       {'font': FONT_BOLD},
+    'legenda':       {'font': FONT_NORMAL},
+    'cor_laranja':   {'fill': FILL_LARANJA},
+    'cor_verde':     {'fill': FILL_VERDE_CLARO},
+    'cor_rosa':      {'fill': FILL_ROSA},
+    'cor_amarelo':   {'fill': FILL_AMARELO},
+    'cor_azul':      {'fill': FILL_AZUL},
+    'cor_lilas':     {'fill': FILL_LILAS},
+
+    # Bloco "DATAS PARA PREENCHER"
+    'rpa_titulo':    {'font': FONT_RPA_TITULO, 'alignment': ALIGN_CENTER,
+                      'fill': FILL_LARANJA_TITULO, 'border': THIN_BORDER_RPA},
+    'rpa_cabecalho': {'font': FONT_RPA_CAB, 'alignment': ALIGN_CENTER,
+                      'fill': FILL_RPA_CABECALHO, 'border': THIN_BORDER_RPA},
+    'rpa_vazio':     {'fill': FILL_RPA_CABECALHO, 'border': THIN_BORDER_RPA},
+    'rpa_data':      {'font': FONT_RPA_DATA, 'alignment': ALIGN_CENTER,
+                      'fill': FILL_LARANJA_LINHA, 'border': THIN_BORDER_RPA},
+    'rpa_data_fds':  {'font': FONT_RPA_DATA, 'alignment': ALIGN_CENTER,
+                      'fill': FILL_FDS_RPA, 'border': THIN_BORDER_RPA},
+    'rpa_turno':     {'font': FONT_RPA_TURNO, 'alignment': ALIGN_CENTER,
+                      'fill': FILL_LARANJA_LINHA, 'border': THIN_BORDER_RPA},
+    'rpa_turno_fds': {'font': FONT_RPA_TURNO, 'alignment': ALIGN_CENTER,
+                      'fill': FILL_FDS_RPA, 'border': THIN_BORDER_RPA},
+}
+
+
+# ============================================================
+# LAYOUT E BACKENDS
+# ============================================================
+# Posições fixas da grade na planilha (lidas de volta por escala_importar)
+LINHA_UNIDADE = 1
+LINHA_ESPECIALIDADE = 3
+LINHA_PERIODO = 5
+LINHA_DIA_SEMANA = 11
+LINHA_DIA_NUMERO = 12
+LINHA_PRIMEIRO_MEDICO = 13
+COL_NOME = 1
+COL_MATRICULA = 2
+COL_PRIMEIRO_DIA = 3
+
+
+class PlanoPlanilha:
+    """
+    Layout da planilha montado uma única vez, independente do backend:
+    linha → coluna → (valor, estilo), mesclagens, larguras e alturas.
+    O estilo é uma chave de ESTILOS_EXCEL.
+    """
+
+    __slots__ = ('titulo', 'linhas', 'mesclas', 'larguras', 'alturas')
+
+    def __init__(self, titulo):
+        self.titulo = titulo
+        self.linhas = {}
+        self.mesclas = []
+        self.larguras = {}
+        self.alturas = {}
+
+    def celula(self, row, column, valor=None, estilo=None):
+        self.linhas.setdefault(row, {})[column] = (valor, estilo)
+
+    def mesclar(self, start_row, start_column, end_row, end_column):
+        self.mesclas.append((start_row, start_column, end_row, end_column))
+
+    def largura(self, column, valor):
+        self.larguras[get_column_letter(column)] = valor
+
+    def altura(self, row, valor):
+        self.alturas[row] = valor
+
+    def max_row(self):
+        return max(self.linhas, default=0)
+
+
+# Células de ausência: cor do código, acima do fim de semana e do fundo da linha
+ESTILO_AUSENCIA = {
+    COD_TURNO['F']: 'turno_ferias',
+    COD_TURNO['A']: 'turno_atestado',
+    COD_TURNO['SD']: 'turno_sindicato',
+}
+
+# Legenda das ausências que só aparece quando o código é usado na planilha
+LEGENDA_AUSENCIA = (
+    (COD_TURNO['F'], 'Azul = Férias', 'cor_azul'),
+    (COD_TURNO['SD'], 'Lilás = Folga Sindicato', 'cor_lilas'),
+)
+
+
+def montar_plano_excel(dados):
+    """Monta o PlanoPlanilha da escala formatada (sem tocar no openpyxl)."""
+    unidade = config_de_dados(dados)
+    plano = PlanoPlanilha(unidade['especialidade'])
+    cel = plano.celula
+
+    dias = dados['dias']
+    grade = grade_de_dados(dados)
+    alertas = dados['alertas']
+    slots_vagos = dados['slots_vagos']
+    ano = dados['ano']
+    mes = dados['mes']
+    num_dias = len(dias)
+    fds = [d.weekday() >= 5 for d in dias]
+
+    # Configurar largura de colunas
+    plano.largura(1, 30.5)
+    plano.largura(2, 14.9)
+    for i in range(num_dias):
+        plano.largura(3 + i, 4.6)  # C = 3
+    col_total_idx = 3 + num_dias + 2  # 2 colunas de espaço
+    plano.largura(col_total_idx, 9.0)
+
+    # ---- CABEÇALHO (Linhas 1-9) ----
+    with span('excel.cabecalho'):
+        plano.mesclar(1, 1, 9, 2)
+        plano.mesclar(1, 3, 2, 12)
+        cel(LINHA_UNIDADE, COL_PRIMEIRO_DIA, unidade['unidade'], 'titulo')
+        cel(LINHA_ESPECIALIDADE, COL_PRIMEIRO_DIA, unidade['especialidade'], 'cabecalho')
+        cel(LINHA_PERIODO, COL_PRIMEIRO_DIA, nome_periodo(ano, mes), 'cabecalho')
+
+        # Legenda de horários (coluna M-T)
+        col_leg = 13  # M
+        plano.mesclar(1, col_leg, 1, col_leg + 7)
+        cel(1, col_leg, 'HORÁRIOS', 'cabecalho')
+
+        for row, cod in ((2, 'V'), (3, 'D'), (4, 'N'), (5, 'M'), (6, 'T')):
+            turno = TURNOS[cod]
+            cel(row, col_leg, cod, 'cabecalho')
+            plano.mesclar(row, col_leg + 1, row, col_leg + 5)
+            cel(row, col_leg + 1, f"{turno['inicio']} às {turno['fim']}", 'cabecalho')
+            plano.mesclar(row, col_leg + 6, row, col_leg + 7)
+            cel(row, col_leg + 6, f"{turno['horas']} Horas", 'cabecalho')
+
+        # SD, F, A
+        cel(7, col_leg, 'SD', 'cabecalho')
+        plano.mesclar(7, col_leg + 2, 7, col_leg + 4)
+        cel(7, col_leg + 2, 'Folga Sindicato', 'cabecalho')
+
+        cel(8, col_leg, 'F', 'cabecalho')
+        plano.mesclar(8, col_leg + 1, 8, col_leg + 7)
+        cel(8, col_leg + 1, 'Férias', 'cabecalho')
+
+        cel(9, col_leg, 'A', 'cabecalho')
+        plano.mesclar(9, col_leg + 1, 9, col_leg + 7)
+        cel(9, col_leg + 1, 'Atestado/Congresso', 'cabecalho')
+
+        # ---- LINHA 10: Médicos / MATRÍCULA ----
+        plano.altura(10, 7.5)
+        plano.mesclar(10, 1, 12, 1)
+        cel(10, 1, 'Médicos:', 'cabecalho')
+        cel(10, 2, 'MATRÍCULA', 'cabecalho')
+
+        # ---- LINHAS 11-12: Dias da semana e números dos dias ----
+        plano.altura(LINHA_DIA_SEMANA, 13.5)
+        plano.altura(LINHA_DIA_NUMERO, 13.5)
+        for i, d in enumerate(dias):
+            cel(LINHA_DIA_SEMANA, COL_PRIMEIRO_DIA + i, DIAS_SEMANA_PT[d.weekday()], 'dia_semana')
+            cel(LINHA_DIA_NUMERO, COL_PRIMEIRO_DIA + i, d.day, 'dia_numero')
+
+    # ---- LINHAS DE MÉDICOS (13 em diante) ----
+    with span('excel.medicos'):
+        row_atual = LINHA_PRIMEIRO_MEDICO
+        usados = set()
+        for config in unidade['medicos']:
+            nome = config['nome']
+            plano.altura(row_atual, 11.25)
+            codigos = grade.codigos(nome)
+
+            # Fundo da linha: licença = rosa, Mariana em atestado = amarelo
+            if config.get('regra') == 'licenca':
+                sufixo = '_licenca'
+            elif not dados['mariana_ativa'] and config.get('regra') == 'mariana':
+                sufixo = '_atestado'
+            else:
+                sufixo = ''
+
+            cel(row_atual, COL_NOME, nome, 'nome' + sufixo)
+            cel(row_atual, COL_MATRICULA, config.get('matricula', ''), 'matricula' + sufixo)
+
+            # Turnos — fim de semana = verde claro, prevalece sobre o fundo da linha;
+            # ausências (F/A/SD) têm a cor própria por cima de ambos
+            usados.update(codigos)
+            for i, cod in enumerate(codigos):
+                estilo = ESTILO_AUSENCIA.get(cod)
+                if estilo is None:
+                    base = 'turno' if cod else 'turno_vazio'
+                    estilo = base + ('_fds' if fds[i] else sufixo)
+                cel(row_atual, COL_PRIMEIRO_DIA + i, CODIGOS_TURNO[cod] if cod else None, estilo)
+
+            # Total de plantões
+            meta = config.get('meta')
+            total = contar_plantoes(grade.linha(nome))
+            if meta is not None and meta > 0:
+                valor_total = int(total) if total == int(total) else total
+            elif config.get('regra') in ('bruna', 'licenca'):
+                valor_total = '1fd'
+            else:
+                valor_total = None
+            cel(row_atual, col_total_idx, valor_total,
+                'total_licenca' if sufixo == '_licenca' else 'total')
+
+            row_atual += 1
+
+    # ---- LINHAS RPA (vazias para preenchimento manual, ou de alocar_rpa) ----
+    with span('excel.rpa'):
+        for rpa in unidade['rpa']:
+            plano.altura(row_atual, 11.25)
+            cel(row_atual, COL_NOME, rpa['nome'], 'rpa_nome')
+            cel(row_atual, COL_MATRICULA, 'RPA', 'cabecalho')
+            for i, cod in enumerate(grade.codigos(rpa['nome'])):
+                base = 'turno' if cod else 'turno_vazio'
+                cel(row_atual, COL_PRIMEIRO_DIA + i, CODIGOS_TURNO[cod] if cod else None,
+                    base + ('_fds' if fds[i] else ''))
+            row_atual += 1
+
+    # ---- LINHA VAZIA ----
+    with span('excel.alertas'):
+        row_atual += 1
+
+        # ---- ATESTADO ----
+        plano.mesclar(row_atual, 1, row_atual, 2)
+        cel(row_atual, 1, 'Atestado', 'atestado')
+        row_atual += 2
+
+        # ---- FALTAM (alertas por médico) ----
+        plano.mesclar(row_atual, 1, row_atual, 2)
+        cel(row_atual, 1, 'FALTAM', 'cabecalho')
+        row_atual += 1
+
+        # Mostrar alertas de plantões faltantes
+        for alerta in alertas:
+            cel(row_atual, 1, alerta, 'alerta')
+            row_atual += 1
+
+        row_atual += 1
+
+    # ---- FALTAM (slots vagos com cor laranja) ----
+    with span('excel.vagos'):
+        plano.mesclar(row_atual, 1, row_atual, 3 + num_dias - 1)
+        cel(row_atual, 1, 'FALTAM PREENCHER (alocar RPA)', 'vagos_titulo')
+        row_atual += 1
+
+        for bloco, rotulo in (('M', 'MANHÃ'), ('T', 'TARDE'), ('N', 'NOITE')):
+            plano.mesclar(row_atual, 1, row_atual, 2)
+            cel(row_atual, 1, rotulo, 'cabecalho')
+            vagos = slots_vagos[bloco]
+            for i, d in enumerate(dias):
+                if d in vagos:
+                    cel(row_atual, 3 + i, 1, 'vago')
+                else:
+                    cel(row_atual, 3 + i, 0, 'coberto')
+            row_atual += 1
+
+    # ---- LEGENDA ----
+    with span('excel.legenda'):
+        row_atual += 1
+        cel(row_atual, 1, 'LEGENDA DE CORES:', 'negrito')
+        for texto, estilo in (('Laranja = Slots vagos para RPA', 'cor_laranja'),
+                              ('Verde = Final de semana', 'cor_verde'),
+                              ('Rosa = Licença maternidade', 'cor_rosa'),
+                              ('Amarelo = Atestado', 'cor_amarelo'),
+                              *((texto, estilo) for cod, texto, estilo in LEGENDA_AUSENCIA
+                                if cod in usados)):
+            row_atual += 1
+            cel(row_atual, 1, texto, 'legenda')
+            cel(row_atual, 2, None, estilo)
+
+    # ---- BLOCO "DATAS PARA PREENCHER" (canto superior direito) ----
+    with span('excel.bloco_rpa'):
+        # Posicionado 2 colunas após o total, alinhado ao topo da tabela
+        col_rpa_bloco = col_total_idx + 2       # coluna inicial do bloco
+        dias_semana_full = ['Segunda', 'Terça', 'Quarta', 'Quinta',
+                            'Sexta', 'Sábado', 'Domingo']
+
+        # Consolidar datas com pelo menos 1 turno vago
+        todas_datas_rpa = sorted(
+            set(slots_vagos['M']) | set(slots_vagos['T']) | set(slots_vagos['N'])
+        )
+
+        # Larguras das colunas do bloco
+        plano.largura(col_rpa_bloco, 11)        # data
+        plano.largura(col_rpa_bloco + 1, 10)    # dia semana
+        plano.largura(col_rpa_bloco + 2, 24)    # turnos vagos
+
+        # Linha 10 — título do bloco (mesclado nas 3 colunas)
+        plano.mesclar(10, col_rpa_bloco, 10, col_rpa_bloco + 2)
+        cel(10, col_rpa_bloco, 'DATAS PARA PREENCHER (RPA)', 'rpa_titulo')
+
+        # Linha 11 — sub-cabeçalho de colunas; linha 12 vazia (alinha com os dias)
+        for col_off, label in enumerate(['Data', 'Dia', 'Turnos vagos']):
+            cel(11, col_rpa_bloco + col_off, label, 'rpa_cabecalho')
+            cel(12, col_rpa_bloco + col_off, None, 'rpa_vazio')
+
+        # Linhas de dados — uma por data descoberta, a partir da linha 13
+        for idx, d in enumerate(todas_datas_rpa):
+            row_d = 13 + idx
+            sufixo = '_fds' if d.weekday() >= 5 else ''
+            vagos = [b for b in ('M', 'T', 'N') if d in slots_vagos[b]]
+            cel(row_d, col_rpa_bloco, d.strftime('%d/%m/%Y'), 'rpa_data' + sufixo)
+            cel(row_d, col_rpa_bloco + 1, dias_semana_full[d.weekday()], 'rpa_data' + sufixo)
+            cel(row_d, col_rpa_bloco + 2, '  ·  '.join(vagos), 'rpa_turno' + sufixo)
+
+        # Rodapé do bloco: total de datas
+        row_rod = 13 + len(todas_datas_rpa)
+        plano.mesclar(row_rod, col_rpa_bloco, row_rod, col_rpa_bloco + 2)
+        total_slots = (len(slots_vagos['M']) + len(slots_vagos['T']) + len(slots_vagos['N']))
+        cel(row_rod, col_rpa_bloco,
+            f"{len(todas_datas_rpa)} datas  |  {total_slots} slots vagos", 'rpa_cabecalho')
+
+    return plano
+
+
+def _salvar_padrao(plano, destino):
+    """Backend padrão: Workbook em memória, um acesso por célula."""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = plano.titulo
+
+    for letra, largura in plano.larguras.items():
+        ws.column_dimensions[letra].width = largura
+    for row, altura in plano.alturas.items():
+        ws.row_dimensions[row].height = altura
+
+    # Mesclagens antes dos valores: só a célula superior esquerda é escrita
+    for (r1, c1, r2, c2) in plano.mesclas:
+        ws.merge_cells(start_row=r1, start_column=c1, end_row=r2, end_column=c2)
+
+    with span('excel.celulas'):
+        for row, colunas in plano.linhas.items():
+            for col, (valor, estilo) in colunas.items():
+                c = ws.cell(row=row, column=col, value=valor)
+                for attr, v in ESTILOS_EXCEL[estilo].items():
+                    setattr(c, attr, v)
+
+    with span('wb.save'):
+        wb.save(destino)
+
+
+def _estilos_nomeados():
+    """Um NamedStyle por entrada de ESTILOS_EXCEL (novo a cada workbook)."""
+    return [
+        NamedStyle(
+            name=nome,
+            font=spec.get('font', DEFAULT_FONT),
+            fill=spec.get('fill', DEFAULT_EMPTY_FILL),
+            border=spec.get('border', DEFAULT_BORDER),
+            alignment=spec.get('alignment', Alignment()),
+        )
+        for nome, spec in ESTILOS_EXCEL.items()
+    ]
+
+
+def _salvar_streaming(plano, destino):
+    """
+    Backend 'streaming': workbook write-only, cada linha montada uma vez e
+    gravada em ordem, com estilos vindos do registro de NamedStyle.
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(plano.titulo)
+    for estilo in _estilos_nomeados():
+        wb.add_named_style(estilo)
+
+    # Dimensões e mesclagens precisam existir antes da primeira linha
+    for letra, largura in plano.larguras.items():
+        ws.column_dimensions[letra].width = largura
+    for row, altura in plano.alturas.items():
+        ws.row_dimensions[row].height = altura
+    for (r1, c1, r2, c2) in plano.mesclas:
+        ws.merged_cells.add(CellRange(min_row=r1, min_col=c1, max_row=r2, max_col=c2))
+
+    # Em write-only as linhas só são serializadas no save
+    with span('excel.celulas'):
+        for row in range(1, plano.max_row() + 1):
+            colunas = plano.linhas.get(row)
+            if not colunas:
+                ws.append([])
+                continue
+            linha = [None] * max(colunas)
+            for col, (valor, estilo) in colunas.items():
+                c = WriteOnlyCell(ws, value=valor)
+                c.style = estilo
+                linha[col - 1] = c
+            ws.append(linha)
+
+    with span('wb.save'):
+        wb.save(destino)
+
+
+BACKENDS = {
+    'padrao': _salvar_padrao,
+    'streaming': _salvar_streaming,
+}
@@ -0,0 +1,193 @@
+"""
+Exportação da escala em formatos de máquina — CSV, JSON Lines e iCalendar
+
+Tudo é gerador: dados['escalas'] é percorrido uma vez e cada linha/evento é
+escrito no arquivo assim que sai, sem montar a saída inteira em memória.
+Qualquer objeto de texto com .write serve (arquivo aberto, sys.stdout,
+io.StringIO, resposta HTTP).
+
+Uso:
+    exportar_csv(dados, sys.stdout)
+    exportar_jsonl(dados, open('escala.jsonl', 'w', encoding='utf-8'))
+    exportar_ics_pasta(dados, 'calendarios/')      # um .ics por médico
+"""
+
+import csv
+import json
+import os
+import unicodedata
+from datetime import datetime, timedelta, timezone
+
+from gerador_escala import TURNOS, config_de_dados
+
+CAMPOS_LINHA = ('data', 'medico', 'matricula', 'turno', 'horas', 'inicio', 'fim')
+FORMATOS_EXPORTACAO = ('csv', 'jsonl', 'ics')
+
+# Uberlândia: UTC−3 o ano todo (sem horário de verão desde 2019)
+TZID = 'America/Sao_Paulo'
+VTIMEZONE = (
+    'BEGIN:VTIMEZONE',
+    f'TZID:{TZID}',
+    'BEGIN:STANDARD',
+    'DTSTART:19700101T000000',
+    'TZOFFSETFROM:-0300',
+    'TZOFFSETTO:-0300',
+    'TZNAME:-03',
+    'END:STANDARD',
+    'END:VTIMEZONE',
+)
+
+
+# ============================================================
+# LINHAS (uma por turno atribuído)
+# ============================================================
+def _matriculas(config):
+    return {p['nome']: p.get('matricula', '') for p in (*config['medicos'], *config['rpa'])}
+
+
+def inicio_fim(d, turno):
+    """(início, fim) do turno no dia d como datetimes locais, ou (None, None) para ausências."""
+    info = TURNOS[turno]
+    if info['inicio'] is None:
+        return None, None
+    h, m = (int(x) for x in info['inicio'].split(':'))
+    inicio = datetime(d.year, d.month, d.day, h, m)
+    return inicio, inicio + timedelta(hours=info['horas'])
+
+
+def linhas_plantao(dados, medico=None):
+    """
+    Gera um dict por turno atribuído (CAMPOS_LINHA), pessoa a pessoa na
+    ordem da escala e, dentro de cada uma, por data. medico filtra um nome.
+    """
+    matriculas = _matriculas(config_de_dados(dados))
+    for nome, escala in dados['escalas'].items():
+        if medico is not None and nome != medico:
+            continue
+        for d, turno in escala.items():
+            inicio, fim = inicio_fim(d, turno)
+            yield {
+                'data': d.isoformat(),
+                'medico': nome,
+                'matricula': matriculas.get(nome, ''),
+                'turno': turno,
+                'horas': TURNOS[turno]['horas'],
+                'inicio': inicio.isoformat(timespec='minutes') if inicio else '',
+                'fim': fim.isoformat(timespec='minutes') if fim else '',
+            }
+
+
+def exportar_csv(dados, arquivo, medico=None):
+    """Escreve as linhas em CSV (com cabeçalho) no arquivo de texto; retorna quantas."""
+    escritor = csv.DictWriter(arquivo, fieldnames=CAMPOS_LINHA)
+    escritor.writeheader()
+    n = 0
+    for linha in linhas_plantao(dados, medico):
+        escritor.writerow(linha)
+        n += 1
+    return n
+
+
+def exportar_jsonl(dados, arquivo, medico=None):
+    """Escreve uma linha JSON por turno no arquivo de texto; retorna quantas."""
+    n = 0
+    for linha in linhas_plantao(dados, medico):
+        arquivo.write(json.dumps(linha, ensure_ascii=False))
+        arquivo.write('\n')
+        n += 1
+    return n
+
+
+# ============================================================
+# iCALENDAR (um calendário por médico)
+# ============================================================
+def _texto_ics(texto):
+    return (texto.replace('\\', '\\\\').replace(';', '\\;')
+            .replace(',', '\\,').replace('\n', '\\n'))
+
+
+def _dobrar(linha):
+    """Quebra a linha em trechos de até 75 octetos (RFC 5545, 3.1)."""
+    bruto = linha.encode('utf-8')
+    if len(bruto) <= 75:
+        yield linha
+        return
+    partes, atual, tam = [], [], 0
+    for ch in linha:
+        n = len(ch.encode('utf-8'))
+        if tam + n > (75 if not partes else 74):
+            partes.append(''.join(atual))
+            atual, tam = [], 0
+        atual.append(ch)
+        tam += n
+    partes.append(''.join(atual))
+    yield partes[0]
+    for p in partes[1:]:
+        yield ' ' + p
+
+
+def _uid(nome, d, turno):
+    ascii_ = unicodedata.normalize('NFKD', nome).encode('ascii', 'ignore').decode()
+    base = ''.join(c if c.isalnum() else '-' for c in ascii_.lower())
+    return f"{d.strftime('%Y%m%d')}-{turno.replace('/', '')}-{base}@escala-uai"
+
+
+def linhas_ics(dados, medico, agora=None):
+    """Gera as linhas (sem CRLF) do VCALENDAR com os turnos de um médico."""
+    config = config_de_dados(dados)
+    carimbo = (agora or datetime.now(timezone.utc)).strftime('%Y%m%dT%H%M%SZ')
+    local = _texto_ics(f"{config['unidade']} — {config['especialidade']}")
+    cabecalho = (
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//UAI Luizote//Gerador de Escala//PT-BR',
+        'CALSCALE:GREGORIAN',
+        f"X-WR-CALNAME:{_texto_ics(f'Escala — {medico}')}",
+        f'X-WR-TIMEZONE:{TZID}',
+    )
+    for linha in cabecalho + VTIMEZONE:
+        yield from _dobrar(linha)
+
+    for d, turno in dados['escalas'].get(medico, {}).items():
+        inicio, fim = inicio_fim(d, turno)
+        info = TURNOS[turno]
+        evento = ['BEGIN:VEVENT', f'UID:{_uid(medico, d, turno)}', f'DTSTAMP:{carimbo}']
+        if inicio is None:
+            # Ausência (férias, atestado...): evento de dia inteiro
+            evento += [f"DTSTART;VALUE=DATE:{d.strftime('%Y%m%d')}",
+                       f"DTEND;VALUE=DATE:{(d + timedelta(days=1)).strftime('%Y%m%d')}",
+                       f"SUMMARY:{_texto_ics(info['carga'])}",
+                       'TRANSP:TRANSPARENT']
+        else:
+            resumo = _texto_ics(f"Plantão {turno} — {info['carga']}")
+            evento += [f"DTSTART;TZID={TZID}:{inicio.strftime('%Y%m%dT%H%M%S')}",
+                       f"DTEND;TZID={TZID}:{fim.strftime('%Y%m%dT%H%M%S')}",
+                       f'SUMMARY:{resumo}',
+                       f'LOCATION:{local}']
+        evento.append('END:VEVENT')
+        for linha in evento:
+            yield from _dobrar(linha)
+    yield 'END:VCALENDAR'
+
+
+def exportar_ics(dados, medico, arquivo, agora=None):
+    """Escreve o .ics de um médico no arquivo de texto (linhas CRLF); retorna o arquivo."""
+    for linha in linhas_ics(dados, medico, agora=agora):
+        arquivo.write(linha)
+        arquivo.write('\r\n')
+    return arquivo
+
+
+def exportar_ics_pasta(dados, pasta, agora=None):
+    """Um '<nome>.ics' por médico (quem tem ao menos um turno) na pasta; retorna os caminhos."""
+    os.makedirs(pasta, exist_ok=True)
+    caminhos = []
+    for cfg in config_de_dados(dados)['medicos']:
+        nome = cfg['nome']
+        if not dados['escalas'].get(nome):
+            continue
+        caminho = os.path.join(pasta, f"{nome}.ics")
+        with open(caminho, 'w', encoding='utf-8', newline='') as f:
+            exportar_ics(dados, nome, f, agora=agora)
+        caminhos.append(caminho)
+    return caminhos
@@ -0,0 +1,217 @@
+"""
+Histórico das escalas geradas — base SQLite local
+
+Cada período salvo guarda, por médico, a linha da grade (um código de turno
+por dia) e o resumo do que ele fez: turnos em fim de semana, noites, D/N,
+meios plantões e déficit em relação à meta. Ao lado, a tabela `contadores`
+acumula esses números por (unidade, especialidade, médico) para leitura por
+chave primária. gerar_escala(historico=...) usa a contagem de D/N dos
+períodos anteriores ao gerado para fazer o rodízio do sábado D/N de Gustavo;
+os demais contadores (fds, noites, déficit) servem para consulta e relatório.
+
+Uso:
+    with HistoricoEscala('historico.db') as hist:
+        dados = gerar_escala(2026, 2, historico=hist)
+        hist.salvar(dados)
+        hist.ultimos_periodos('Gustavo Garcia Gonçalves', n=6)
+"""
+
+import sqlite3
+
+from gerador_escala import (
+    BLOCO_N, BLOCOS_POR_COD, COD_TURNO, MEIOS_POR_COD, UNIDADE_PADRAO,
+    grade_de_dados, config_de_dados,
+)
+
+# ============================================================
+# ESQUEMA
+# ============================================================
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS periodos (
+    id            INTEGER PRIMARY KEY,
+    unidade       TEXT    NOT NULL,
+    especialidade TEXT    NOT NULL,
+    ano           INTEGER NOT NULL,
+    mes           INTEGER NOT NULL,
+    mariana_ativa INTEGER NOT NULL,
+    inicio        TEXT    NOT NULL,
+    UNIQUE (unidade, especialidade, ano, mes)
+);
+CREATE TABLE IF NOT EXISTS plantoes_medico (
+    periodo_id    INTEGER NOT NULL REFERENCES periodos(id) ON DELETE CASCADE,
+    unidade       TEXT    NOT NULL,
+    especialidade TEXT    NOT NULL,
+    medico        TEXT    NOT NULL,
+    ano           INTEGER NOT NULL,
+    mes           INTEGER NOT NULL,
+    fds           INTEGER NOT NULL,
+    noites        INTEGER NOT NULL,
+    dn            INTEGER NOT NULL,
+    meios         INTEGER NOT NULL,
+    deficit_meios INTEGER NOT NULL,
+    codigos       BLOB    NOT NULL,
+    PRIMARY KEY (periodo_id, medico)
+);
+CREATE INDEX IF NOT EXISTS ix_plantoes_medico_periodo
+    ON plantoes_medico (unidade, especialidade, medico, ano DESC, mes DESC);
+CREATE TABLE IF NOT EXISTS contadores (
+    unidade       TEXT    NOT NULL,
+    especialidade TEXT    NOT NULL,
+    medico        TEXT    NOT NULL,
+    periodos      INTEGER NOT NULL DEFAULT 0,
+    fds           INTEGER NOT NULL DEFAULT 0,
+    noites        INTEGER NOT NULL DEFAULT 0,
+    dn            INTEGER NOT NULL DEFAULT 0,
+    deficit_meios INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (unidade, especialidade, medico)
+) WITHOUT ROWID;
+"""
+
+CAMPOS_CONTADOR = ('periodos', 'fds', 'noites', 'dn', 'deficit_meios')
+COD_DN = COD_TURNO['D/N']
+
+
+def resumo_codigos(codigos, fds_mask, meta_meios):
+    """
+    Resumo de uma linha da grade: dict com fds, noites, dn, meios e
+    deficit_meios. fds_mask[i] é 1 nos sábados/domingos do período;
+    meta_meios None = sem meta (não acumula déficit).
+    """
+    fds = noites = dn = meios = 0
+    for cod, e_fds in zip(codigos, fds_mask):
+        if not cod:
+            continue
+        blocos = BLOCOS_POR_COD[cod]
+        if blocos and e_fds:
+            fds += 1
+        if blocos & BLOCO_N:
+            noites += 1
+        if cod == COD_DN:
+            dn += 1
+        meios += MEIOS_POR_COD[cod]
+    deficit = max(meta_meios - meios, 0) if meta_meios is not None else 0
+    return {'fds': fds, 'noites': noites, 'dn': dn, 'meios': meios, 'deficit_meios': deficit}
+
+
+def _meta_meios(cfg, mariana_ativa):
+    """Meta em meios plantões, com a mesma exceção dos alertas (Mariana em atestado)."""
+    if cfg.get('meta') is None:
+        return None
+    if cfg['regra'] == 'mariana' and not mariana_ativa:
+        return 0
+    return round(cfg['meta'] * 2)
+
+
+# ============================================================
+# API
+# ============================================================
+class HistoricoEscala:
+    """Base SQLite de períodos gerados + contadores acumulados por médico."""
+
+    def __init__(self, caminho=':memory:'):
+        self.caminho = caminho
+        self.conn = sqlite3.connect(caminho, timeout=30)
+        self.conn.execute('PRAGMA foreign_keys = ON')
+        self.conn.execute('PRAGMA journal_mode = WAL')
+        self.conn.executescript(ESQUEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, tb):
+        self.fechar()
+        return False
+
+    def fechar(self):
+        self.conn.close()
+
+    def salvar(self, dados):
+        """
+        Grava o período de `dados` (gerar_escala) e atualiza os contadores.
+        Salvar de novo o mesmo (unidade, especialidade, ano, mes) substitui
+        o registro anterior, descontando-o dos contadores. Retorna o id.
+        """
+        config = config_de_dados(dados)
+        unidade, especialidade = config['unidade'], config['especialidade']
+        ano, mes = dados['ano'], dados['mes']
+        grade = grade_de_dados(dados)
+        fds_mask = bytes(d.weekday() >= 5 for d in dados['dias'])
+
+        with self.conn:
+            antigo = self.conn.execute(
+                'SELECT id FROM periodos WHERE unidade = ? AND especialidade = ? AND ano = ? AND mes = ?',
+                (unidade, especialidade, ano, mes)).fetchone()
+            if antigo is not None:
+                self._descontar(antigo[0])
+
+            cur = self.conn.execute(
+                'INSERT INTO periodos (unidade, especialidade, ano, mes, mariana_ativa, inicio) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (unidade, especialidade, ano, mes, int(dados['mariana_ativa']),
+                 dados['dias'][0].isoformat()))
+            periodo_id = cur.lastrowid
+
+            linhas = []
+            for cfg in config['medicos']:
+                codigos = grade.codigos(cfg['nome'])
+                r = resumo_codigos(codigos, fds_mask, _meta_meios(cfg, dados['mariana_ativa']))
+                linhas.append((periodo_id, unidade, especialidade, cfg['nome'], ano, mes,
+                               r['fds'], r['noites'], r['dn'], r['meios'], r['deficit_meios'],
+                               codigos))
+            self.conn.executemany(
+                'INSERT INTO plantoes_medico (periodo_id, unidade, especialidade, medico, ano, mes, '
+                'fds, noites, dn, meios, deficit_meios, codigos) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', linhas)
+            self.conn.executemany(
+                'INSERT INTO contadores (unidade, especialidade, medico, periodos, fds, noites, dn, deficit_meios) '
+                'VALUES (?, ?, ?, 1, ?, ?, ?, ?) '
+                'ON CONFLICT (unidade, especialidade, medico) DO UPDATE SET '
+                'periodos = periodos + 1, fds = fds + excluded.fds, noites = noites + excluded.noites, '
+                'dn = dn + excluded.dn, deficit_meios = deficit_meios + excluded.deficit_meios',
+                [(u, e, m, fds, noites, dn, deficit)
+                 for (_, u, e, m, _, _, fds, noites, dn, _, deficit, _) in linhas])
+        return periodo_id
+
+    def _descontar(self, periodo_id):
+        """Tira um período dos contadores e apaga seu registro (dentro da transação)."""
+        self.conn.executemany(
+            'UPDATE contadores SET periodos = periodos - 1, fds = fds - ?, noites = noites - ?, '
+            'dn = dn - ?, deficit_meios = deficit_meios - ? '
+            'WHERE unidade = ? AND especialidade = ? AND medico = ?',
+            self.conn.execute(
+                'SELECT fds, noites, dn, deficit_meios, unidade, especialidade, medico '
+                'FROM plantoes_medico WHERE periodo_id = ?', (periodo_id,)).fetchall())
+        self.conn.execute('DELETE FROM periodos WHERE id = ?', (periodo_id,))
+
+    def contadores(self, medico, config=None, antes=None):
+        """
+        Contadores acumulados do médico na unidade (zeros se nunca escalado).
+        antes=(ano, mes) soma só os períodos anteriores a esse — o rodízio de
+        um mês não depende da ordem em que os meses foram gerados e salvos.
+        Só 'dn' entra nas regras (rodízio do sábado D/N de Gustavo); periodos,
+        fds, noites e deficit_meios são apenas para consulta e relatório.
+        """
+        config = config or UNIDADE_PADRAO
+        chave = (config['unidade'], config['especialidade'], medico)
+        if antes is None:
+            linha = self.conn.execute(
+                'SELECT periodos, fds, noites, dn, deficit_meios FROM contadores '
+                'WHERE unidade = ? AND especialidade = ? AND medico = ?', chave).fetchone()
+        else:
+            linha = self.conn.execute(
+                'SELECT count(*), total(fds), total(noites), total(dn), total(deficit_meios) '
+                'FROM plantoes_medico '
+                'WHERE unidade = ? AND especialidade = ? AND medico = ? AND (ano, mes) < (?, ?)',
+                chave + tuple(antes)).fetchone()
+        return dict(zip(CAMPOS_CONTADOR, (int(v) for v in linha or (0,) * len(CAMPOS_CONTADOR))))
+
+    def ultimos_periodos(self, medico, n=6, config=None):
+        """Resumo dos últimos n períodos do médico na unidade, do mais recente ao mais antigo."""
+        config = config or UNIDADE_PADRAO
+        cur = self.conn.execute(
+            'SELECT ano, mes, fds, noites, dn, meios, deficit_meios, codigos FROM plantoes_medico '
+            'WHERE unidade = ? AND especialidade = ? AND medico = ? '
+            'ORDER BY ano DESC, mes DESC LIMIT ?',
+            (config['unidade'], config['especialidade'], medico, n))
+        campos = [c[0] for c in cur.description]
+        return [dict(zip(campos, linha)) for linha in cur]
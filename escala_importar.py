@@ -0,0 +1,220 @@
+"""
+Leitura de planilhas da escala — o .xlsx de gerar_excel, editado à mão
+
+ler_excel() percorre a planilha em modo read-only (linhas em streaming, só
+as colunas da grade) e reconstrói o dict `dados`: período pelas linhas de
+cabeçalho, dias pelas linhas 11-12, médicos a partir da linha 13 e as
+linhas RPA logo depois (matrícula 'RPA'). A leitura para na lista de
+alertas "FALTAM"; o restante da planilha nem é lido.
+
+diff_escalas() compara duas escalas do mesmo período célula a célula, e
+comparar_com_gerada() compara a planilha editada com a escala gerada de
+novo para o mesmo período.
+
+Uso:
+    editada = ler_excel('ESCALA UAI Fev_Março 2026.xlsx')
+    for m in comparar_com_gerada(editada):
+        print(m['medico'], m['data'], m['antes'], '→', m['depois'])
+"""
+
+import zipfile
+
+import openpyxl
+from openpyxl.utils.exceptions import InvalidFileException
+
+from escala_excel import (
+    LINHA_UNIDADE, LINHA_ESPECIALIDADE, LINHA_PERIODO, LINHA_DIA_NUMERO,
+    LINHA_PRIMEIRO_MEDICO, COL_NOME, COL_MATRICULA, COL_PRIMEIRO_DIA,
+)
+from escala_perfil import span
+from gerador_escala import (
+    MESES_ABREV, COD_TURNO, CODIGOS_TURNO, COR_AMARELO_ATESTADO, UNIDADE_PADRAO,
+    Ausencias, GradeEscala, config_de_dados, get_periodo, gerar_escala, grade_de_dados,
+)
+
+# Período mais longo: 16/mes → 15/mes seguinte com 31 dias
+MAX_DIAS = 31
+MAX_COL = COL_PRIMEIRO_DIA + MAX_DIAS - 1
+
+
+def periodo_de_nome(texto):
+    """'Fev/Março 2026' (nome_periodo) → (2026, 2). ValueError se não reconhecer."""
+    try:
+        abrev, resto = str(texto).split('/', 1)
+        ano = int(resto.rsplit(' ', 1)[1])
+        mes = MESES_ABREV.index(abrev.strip(), 1)
+    except (ValueError, IndexError):
+        raise ValueError(f"período não reconhecido: {texto!r}") from None
+    # Dezembro: nome_periodo usa o ano do mês seguinte
+    return (ano - 1, mes) if mes == 12 else (ano, mes)
+
+
+def _turno(valor):
+    """Valor da célula → código de turno normalizado (None = vazio)."""
+    if valor is None:
+        return None
+    texto = str(valor).strip().upper()
+    return texto or None
+
+
+def _celula(linha, col):
+    return linha[col - 1] if len(linha) >= col else None
+
+
+# ============================================================
+# API
+# ============================================================
+def ler_excel(arquivo, config=None, mariana_ativa=None):
+    """
+    Lê a planilha (caminho ou arquivo binário) e retorna o dict `dados`
+    com a grade reconstruída. Médicos são casados pelo nome com
+    config['medicos'] (padrão: UNIDADE_PADRAO); nomes desconhecidos entram
+    sem regra. Células com turno inválido ficam fora da grade e são listadas
+    em dados['celulas_invalidas']. slots_vagos é recalculado da grade e
+    dados['ausencias'] vem das células F/A/SD.
+    ValueError se o arquivo não é .xlsx ou não tem o layout da escala.
+    mariana_ativa=None lê o estado da cor da linha de Mariana (amarelo = atestado).
+    """
+    config_base = config or UNIDADE_PADRAO
+    por_nome = {m['nome']: m for m in config_base['medicos']}
+
+    cabecalho = {}
+    medicos, rpas, alertas, invalidas = [], [], [], []
+    grade = dias = None
+    atestado = False
+    estado = 'cabecalho'
+
+    with span('importar.leitura'):
+        try:
+            wb = openpyxl.load_workbook(arquivo, read_only=True, data_only=True)
+        except (zipfile.BadZipFile, InvalidFileException) as e:
+            raise ValueError(f"não é uma planilha .xlsx: {e}") from None
+        try:
+            for n, celulas in enumerate(wb.worksheets[0].iter_rows(max_col=MAX_COL), start=1):
+                linha = tuple(c.value for c in celulas)
+                if estado == 'cabecalho':
+                    cabecalho[n] = linha
+                    if n < LINHA_PRIMEIRO_MEDICO - 1:
+                        continue
+                    ano, mes = periodo_de_nome(_celula(cabecalho[LINHA_PERIODO], COL_PRIMEIRO_DIA))
+                    dias = get_periodo(ano, mes)
+                    lidos = [_celula(linha, COL_PRIMEIRO_DIA + i) for i in range(len(dias))]
+                    if lidos != [d.day for d in dias]:
+                        raise ValueError(f"dias da linha {LINHA_DIA_NUMERO} não batem com "
+                                         f"o período {ano}-{mes:02d}")
+                    grade = GradeEscala(dias)
+                    estado = 'pessoas'
+
+                elif estado == 'pessoas':
+                    nome = _celula(linha, COL_NOME)
+                    if nome is None or not str(nome).strip():
+                        estado = 'rodape'
+                        continue
+                    nome = str(nome).strip()
+                    matricula = _celula(linha, COL_MATRICULA)
+                    matricula = '' if matricula is None else str(matricula)
+                    if matricula == 'RPA':
+                        rpas.append({'nome': nome, 'matricula': 'RPA'})
+                    else:
+                        medico = por_nome.get(nome) or {
+                            'nome': nome, 'matricula': matricula, 'meta': None, 'regra': None}
+                        medicos.append(medico)
+                        if medico.get('regra') == 'mariana':
+                            # Linha amarela = Mariana em atestado (ver estilo 'nome_atestado')
+                            cor = celulas[COL_NOME - 1].fill.fgColor.rgb
+                            atestado = cor == COR_AMARELO_ATESTADO
+                    grade.indice(nome)
+                    for i, d in enumerate(dias):
+                        turno = _turno(_celula(linha, COL_PRIMEIRO_DIA + i))
+                        if turno is None:
+                            continue
+                        if turno in COD_TURNO:
+                            grade.definir(nome, d, turno)
+                        else:
+                            invalidas.append({'medico': nome, 'data': d, 'valor': turno})
+
+                elif estado == 'rodape':
+                    texto = _celula(linha, COL_NOME)
+                    if texto == 'FALTAM':
+                        estado = 'alertas'
+
+                else:  # alertas: até a primeira linha vazia
+                    texto = _celula(linha, COL_NOME)
+                    if texto is None:
+                        break
+                    alertas.append(str(texto))
+        finally:
+            wb.close()
+
+    if grade is None:
+        raise ValueError("planilha sem a grade da escala (cabeçalho incompleto)")
+
+    if mariana_ativa is None:
+        mariana_ativa = not atestado
+    escalas = grade.escalas()
+    return {
+        'dias': dias,
+        'escalas': escalas,
+        'alertas': alertas,
+        'slots_vagos': grade.vagos(),
+        'ano': ano,
+        'mes': mes,
+        'mariana_ativa': mariana_ativa,
+        'grade': grade,
+        'config': {
+            'unidade': _celula(cabecalho[LINHA_UNIDADE], COL_PRIMEIRO_DIA) or config_base['unidade'],
+            'especialidade': (_celula(cabecalho[LINHA_ESPECIALIDADE], COL_PRIMEIRO_DIA)
+                              or config_base['especialidade']),
+            'medicos': medicos,
+            'rpa': rpas,
+            **({'regras': config_base['regras']} if config_base.get('regras') else {}),
+        },
+        'ausencias': Ausencias.de_escalas(dias, escalas),
+        'celulas_invalidas': invalidas,
+    }
+
+
+def diff_escalas(base, editada):
+    """
+    Células diferentes entre duas escalas do mesmo período: lista de dicts
+    (medico, data, antes, depois), pessoa a pessoa e por data; turno vazio
+    = None. Linhas iguais são descartadas comparando os bytes da grade.
+    """
+    if (base['ano'], base['mes']) != (editada['ano'], editada['mes']):
+        raise ValueError("as escalas são de períodos diferentes")
+    g_base, g_edit = grade_de_dados(base), grade_de_dados(editada)
+    dias = g_base.dias
+    mudancas = []
+    for nome in dict.fromkeys([*g_base.nomes, *g_edit.nomes]):
+        antes, depois = g_base.codigos(nome), g_edit.codigos(nome)
+        if antes == depois:
+            continue
+        for i, (a, b) in enumerate(zip(antes, depois)):
+            if a != b:
+                mudancas.append({'medico': nome, 'data': dias[i],
+                                 'antes': CODIGOS_TURNO[a] or None,
+                                 'depois': CODIGOS_TURNO[b] or None})
+    return mudancas
+
+
+def comparar_com_gerada(editada, engine='greedy', config=None):
+    """
+    Gera de novo o período da planilha, com as ausências lidas das células
+    F/A/SD (editada['ausencias']), e devolve diff_escalas(gerada, editada):
+    só as edições feitas à mão. config padrão: a lida da planilha (editada['config']); médicos sem regra
+    não são gerados e suas células aparecem como mudanças. ValueError se
+    nenhum médico da planilha tem regra — passe a config da unidade.
+    """
+    if config is None:
+        config = config_de_dados(editada)
+        medicos = [m for m in config['medicos'] if m.get('regra') is not None]
+        if not medicos:
+            raise ValueError(f"nenhum médico da planilha tem regra na configuração "
+                             f"({config['unidade']} / {config['especialidade']}): "
+                             f"passe a config da unidade")
+        config = dict(config, medicos=medicos)
+    with span('importar.regerar'):
+        gerada = gerar_escala(editada['ano'], editada['mes'],
+                              mariana_ativa=editada['mariana_ativa'], engine=engine, config=config,
+                              ausencias=editada.get('ausencias'))
+    return diff_escalas(gerada, editada)
@@ -0,0 +1,243 @@
+"""
+Otimização local da escala — busca "anytime" a partir de gerar_escala
+
+Parte do resultado do motor guloso (ou do CP) e aplica recozimento simulado
+sobre dois movimentos por médico:
+  - trocar: mudar o turno de um dia por outro permitido (ou folga);
+  - mover:  levar um turno de um dia para outro dia livre.
+Domínios, tetos, grupos e preferências são os do modelo CP
+(escala_cp.montar_modelo), e o custo segue a mesma ordem lexicográfica:
+turnos vagos ≫ déficit de meta ≫ penalidade de preferência. Cada candidato
+é avaliado pelo delta do livro-razão de cobertura (GradeEscala.simular),
+sem recontar o período; movimentos que criariam sobreposição de turnos são
+descartados. Ao fim do tempo, devolve o melhor estado encontrado.
+
+Uso: otimizar_escala(gerar_escala(2026, 2), limite_s=0.2)
+"""
+
+import math
+import random
+import time
+
+from escala_perfil import span
+from escala_cp import (
+    FOLGA, TURNOS_CP, MEIOS_TURNO, PESO_VAGO, PESO_DEFICIT, montar_modelo,
+)
+from gerador_escala import (
+    COD_TURNO, GradeEscala, apelido_medico, como_calendario,
+    config_de_dados, contar_meios_plantoes, plantoes_de_meios, regras_com_alerta,
+)
+
+# Código da grade (0 = sem turno) ↔ índice em TURNOS_CP
+COD_DE_IDX = [0] + [COD_TURNO[cod] for cod, _, _ in TURNOS_CP[1:]]
+IDX_DE_COD = {cod: i for i, cod in enumerate(COD_DE_IDX)}
+
+# Temperatura do recozimento, em unidades de custo: começa aceitando perder
+# até ~2 meios plantões de meta e termina aceitando só melhoras.
+TEMPERATURA_INICIAL = 2 * PESO_DEFICIT
+TEMPERATURA_FINAL = 0.5
+
+
+class _Otimizador:
+    """Estado da busca local sobre uma GradeEscala (alterada no lugar)."""
+
+    def __init__(self, grade, medicos, semente):
+        self.grade = grade
+        self.dias = grade.dias
+        self.medicos = medicos
+        self.rng = random.Random(semente)
+
+        self.usado = []
+        self.contagem = []
+        self.grupo_do_dia = []
+        self.variaveis = []   # (j, dias com mais de uma opção no domínio)
+        self.penal = 0
+        for j, med in enumerate(medicos):
+            grupo_do_dia = {}
+            for g, (conj, _) in enumerate(med.grupos):
+                for i in conj:
+                    grupo_do_dia[i] = g
+            self.grupo_do_dia.append(grupo_do_dia)
+            contagem = [0] * len(med.grupos)
+            usado = 0
+            livres = []
+            for i, cod in enumerate(grade.codigos(med.nome)):
+                i_t = IDX_DE_COD.get(cod)
+                if i_t is None:
+                    continue          # turno fora do modelo (V, férias...): fica como está
+                usado += MEIOS_TURNO[i_t]
+                self.penal += med.penalidades.get((i, i_t), 0)
+                if i_t != FOLGA and i in grupo_do_dia:
+                    contagem[grupo_do_dia[i]] += 1
+                dom = med.dominios[i]
+                if dom >> i_t & 1 and dom & (dom - 1):
+                    livres.append(i)
+            self.usado.append(usado)
+            self.contagem.append(contagem)
+            if livres:
+                self.variaveis.append((j, livres))
+
+        cob = grade.cobertura
+        self.vagos = sum(3 - bin(cob.mascara(i)).count('1') for i in range(len(self.dias)))
+
+    # ── custo ──
+    def deficit(self):
+        return sum(med.alvo - u for med, u in zip(self.medicos, self.usado)
+                   if med.alvo is not None and u < med.alvo)
+
+    def custo(self):
+        return self.vagos * PESO_VAGO + self.deficit() * PESO_DEFICIT + self.penal
+
+    def valor(self, j, i):
+        return IDX_DE_COD.get(self.grade.codigo(self.medicos[j].nome, self.dias[i]), FOLGA)
+
+    # ── vizinhança ──
+    def sortear(self):
+        """Sorteia um movimento: (j, [(dia, turno antigo, turno novo), ...]) ou None."""
+        rng = self.rng
+        j, livres = rng.choice(self.variaveis)
+        dom = self.medicos[j].dominios
+        i = rng.choice(livres)
+        atual = self.valor(j, i)
+        if atual != FOLGA and rng.random() < 0.5:
+            i2 = rng.choice(livres)
+            if i2 == i or self.valor(j, i2) != FOLGA or not dom[i2] >> atual & 1:
+                return None
+            return j, [(i, atual, FOLGA), (i2, FOLGA, atual)]
+        opcoes = [i_t for i_t in range(len(TURNOS_CP)) if dom[i] >> i_t & 1 and i_t != atual]
+        return j, [(i, atual, rng.choice(opcoes))]
+
+    def avaliar(self, j, mudancas):
+        """(Δ custo, Δ vagos) do movimento, ou None se ele viola teto, grupo ou sobreposição."""
+        med = self.medicos[j]
+        grade = self.grade
+        d_meios = d_penal = d_vagos = 0
+        d_grupos = {}
+        for (i, antigo, novo) in mudancas:
+            dv, dc = grade.simular(med.nome, self.dias[i], TURNOS_CP[novo][0])
+            if dc > 0:
+                return None
+            d_vagos += dv
+            d_meios += MEIOS_TURNO[novo] - MEIOS_TURNO[antigo]
+            d_penal += med.penalidades.get((i, novo), 0) - med.penalidades.get((i, antigo), 0)
+            g = self.grupo_do_dia[j].get(i)
+            if g is not None:
+                d_grupos[g] = d_grupos.get(g, 0) + (novo != FOLGA) - (antigo != FOLGA)
+        usado = self.usado[j] + d_meios
+        if med.teto is not None and usado > med.teto:
+            return None
+        for g, dg in d_grupos.items():
+            if dg > 0 and self.contagem[j][g] + dg > med.grupos[g][1]:
+                return None
+        d_deficit = 0
+        if med.alvo is not None:
+            d_deficit = max(med.alvo - usado, 0) - max(med.alvo - self.usado[j], 0)
+        return d_vagos * PESO_VAGO + d_deficit * PESO_DEFICIT + d_penal, d_vagos
+
+    def aplicar(self, j, mudancas, d_vagos):
+        med = self.medicos[j]
+        for (i, antigo, novo) in mudancas:
+            self.grade.definir(med.nome, self.dias[i], TURNOS_CP[novo][0])
+            self.usado[j] += MEIOS_TURNO[novo] - MEIOS_TURNO[antigo]
+            self.penal += med.penalidades.get((i, novo), 0) - med.penalidades.get((i, antigo), 0)
+            g = self.grupo_do_dia[j].get(i)
+            if g is not None:
+                self.contagem[j][g] += (novo != FOLGA) - (antigo != FOLGA)
+        self.vagos += d_vagos
+
+    def foto(self):
+        linhas = {j: self.grade.codigos(self.medicos[j].nome) for j, _ in self.variaveis}
+        return linhas, self.vagos, self.penal, list(self.usado), [list(c) for c in self.contagem]
+
+    def restaurar(self, foto):
+        linhas, self.vagos, self.penal, self.usado, self.contagem = foto
+        for j, codigos in linhas.items():
+            nome = self.medicos[j].nome
+            for i, (cod, cod_atual) in enumerate(zip(codigos, self.grade.codigos(nome))):
+                if cod != cod_atual:
+                    self.grade.definir(nome, self.dias[i], TURNOS_CP[IDX_DE_COD[cod]][0])
+
+    # ── recozimento ──
+    def rodar(self, limite_s, max_iter=None):
+        inicio = time.perf_counter()
+        prazo = inicio + limite_s
+        custo = melhor_custo = self.custo()
+        melhor = self.foto()
+        temperatura = TEMPERATURA_INICIAL
+        razao = TEMPERATURA_FINAL / TEMPERATURA_INICIAL
+        iteracoes = aceitos = 0
+        while self.variaveis:
+            if iteracoes & 0x3F == 0:
+                agora = time.perf_counter()
+                if agora >= prazo:
+                    break
+                temperatura = TEMPERATURA_INICIAL * razao ** ((agora - inicio) / limite_s)
+            if max_iter is not None and iteracoes >= max_iter:
+                break
+            iteracoes += 1
+            movimento = self.sortear()
+            if movimento is None:
+                continue
+            j, mudancas = movimento
+            delta = self.avaliar(j, mudancas)
+            if delta is None:
+                continue
+            d_custo, d_vagos = delta
+            if d_custo > 0 and self.rng.random() >= math.exp(-d_custo / temperatura):
+                continue
+            self.aplicar(j, mudancas, d_vagos)
+            aceitos += 1
+            custo += d_custo
+            if custo < melhor_custo:
+                melhor_custo = custo
+                melhor = self.foto()
+        self.restaurar(melhor)
+        return iteracoes, aceitos, time.perf_counter() - inicio
+
+
+# ============================================================
+# API
+# ============================================================
+def otimizar_escala(dados, limite_s=0.2, semente=0, max_iter=None):
+    """
+    Melhora `dados` (gerar_escala) por busca local dentro do tempo limite
+    (em segundos) e retorna um novo dict `dados`; o original não é alterado.
+    dados['otimizacao'] traz iterações, tempo e custo/vagos antes e depois.
+    """
+    config = config_de_dados(dados)
+    dias = como_calendario(dados['dias'])
+    grade = GradeEscala.de_escalas(dias, dados['escalas'])
+    medicos = montar_modelo(dias, mariana_ativa=dados['mariana_ativa'], config=config,
+                            ausencias=dados.get('ausencias'))
+
+    with span('otimizar.busca'):
+        otim = _Otimizador(grade, medicos, semente)
+        vagos_antes, custo_antes = otim.vagos, otim.custo()
+        iteracoes, aceitos, tempo = otim.rodar(limite_s, max_iter=max_iter)
+
+    alertas = []
+    com_alerta = regras_com_alerta(config)
+    for cfg, med in zip(config['medicos'], medicos):
+        if med.regra not in com_alerta or med.alvo is None:
+            continue
+        meios = contar_meios_plantoes(grade.linha(med.nome))
+        if meios < med.alvo:
+            alertas.append(f"{apelido_medico(cfg)}: faltam {plantoes_de_meios(med.alvo - meios)} plantão(ões)")
+
+    novos = dict(dados)
+    novos.update({
+        'escalas': grade.escalas(),
+        'alertas': alertas,
+        'slots_vagos': grade.vagos(),
+        'grade': grade,
+        'otimizacao': {
+            'iteracoes': iteracoes,
+            'aceitos': aceitos,
+            'tempo_s': tempo,
+            'vagos_antes': vagos_antes,
+            'vagos_depois': otim.vagos,
+            'custo_antes': custo_antes,
+            'custo_depois': otim.custo(),
+        },
+    })
+    return novos
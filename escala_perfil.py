@@ -0,0 +1,152 @@
+"""
+Perfil por etapa do Gerador de Escala — spans de tempo nomeados
+
+Uso:
+    from escala_perfil import span
+    with span('regra_gustavo'):
+        ...
+
+Desativado (padrão), span() devolve sempre o mesmo objeto nulo: custa uma
+leitura de global e um `with` vazio, sem relógio nem alocação. Com
+ativar(), os spans aninhados formam uma árvore (mesmo nome sob o mesmo pai
+é acumulado) com tempo total, nº de chamadas e, opcionalmente, o pico de
+memória acima do início do span (tracemalloc).
+"""
+
+import time
+
+
+class _SpanNulo:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, tb):
+        return False
+
+
+_NULO = _SpanNulo()
+_perfil = None
+
+
+# ============================================================
+# ÁRVORE DE SPANS
+# ============================================================
+class NoPerfil:
+    """Um nó da árvore: tempo acumulado, chamadas, pico de memória e filhos."""
+
+    __slots__ = ('nome', 'chamadas', 'total', 'pico', 'filhos')
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.chamadas = 0
+        self.total = 0.0
+        self.pico = 0          # bytes acima da memória no início do span
+        self.filhos = {}
+
+    def filho(self, nome):
+        no = self.filhos.get(nome)
+        if no is None:
+            no = self.filhos[nome] = NoPerfil(nome)
+        return no
+
+
+class Perfil:
+    __slots__ = ('raiz', 'memoria', '_pilha', '_picos', '_iniciou_tracemalloc')
+
+    def __init__(self, memoria=False):
+        self.raiz = NoPerfil('total')
+        self.memoria = memoria
+        self._pilha = [self.raiz]
+        self._picos = [0]      # pico absoluto já visto em cada nível da pilha
+        self._iniciou_tracemalloc = False
+
+
+class _Span:
+    __slots__ = ('perfil', 'no', 't0', 'mem0')
+
+    def __init__(self, perfil, nome):
+        self.perfil = perfil
+        self.no = perfil._pilha[-1].filho(nome)
+
+    def __enter__(self):
+        p = self.perfil
+        p._pilha.append(self.no)
+        if p.memoria:
+            import tracemalloc
+            atual, pico = tracemalloc.get_traced_memory()
+            p._picos[-1] = max(p._picos[-1], pico)
+            p._picos.append(0)
+            tracemalloc.reset_peak()
+            self.mem0 = atual
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, valor, tb):
+        dt = time.perf_counter() - self.t0
+        p = self.perfil
+        no = self.no
+        no.total += dt
+        no.chamadas += 1
+        p._pilha.pop()
+        if p.memoria:
+            import tracemalloc
+            pico = max(p._picos.pop(), tracemalloc.get_traced_memory()[1])
+            no.pico = max(no.pico, pico - self.mem0)
+            p._picos[-1] = max(p._picos[-1], pico)
+        return False
+
+
+# ============================================================
+# API
+# ============================================================
+def span(nome):
+    """Context manager de um span nomeado (objeto nulo se o perfil está desativado)."""
+    p = _perfil
+    if p is None:
+        return _NULO
+    return _Span(p, nome)
+
+
+def ativar(memoria=False):
+    """Liga a coleta de spans (e o tracemalloc, se memoria=True)."""
+    global _perfil
+    _perfil = Perfil(memoria=memoria)
+    if memoria:
+        # tracemalloc (e o que ele importa) só é carregado quando pedido
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _perfil._iniciou_tracemalloc = True
+    return _perfil
+
+
+def desativar():
+    """Desliga a coleta e devolve o Perfil acumulado (ou None)."""
+    global _perfil
+    p, _perfil = _perfil, None
+    if p is not None and p._iniciou_tracemalloc:
+        import tracemalloc
+        tracemalloc.stop()
+    return p
+
+
+def linhas_arvore(perfil):
+    """
+    Linhas (profundidade, nome, total_s, chamadas, pico_bytes, fração do pai)
+    em pré-ordem, filhos na ordem em que foram abertos.
+    """
+    raiz = perfil.raiz
+    raiz.total = sum(f.total for f in raiz.filhos.values())
+    linhas = []
+
+    def visitar(no, nivel, total_pai):
+        fracao = no.total / total_pai if total_pai else 1.0
+        linhas.append((nivel, no.nome, no.total, no.chamadas, no.pico, fracao))
+        for f in no.filhos.values():
+            visitar(f, nivel + 1, no.total)
+
+    for f in raiz.filhos.values():
+        visitar(f, 0, raiz.total)
+    return linhas
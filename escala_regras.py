@@ -0,0 +1,282 @@
+"""
+Regras declarativas — política de um médico descrita em dados, sem código
+
+Em vez de uma função regra_* nova, o médico aponta para uma regra definida
+em config['regras'] (o mesmo JSON das unidades, ao lado de 'medicos'):
+
+    'medicos': [{'nome': 'Ana Souza', 'matricula': '123', 'meta': 8,
+                 'regra': 'ana'}, ...],
+    'regras': {
+        'ana': {
+            'passos': [
+                {'dias': 'seg', 'turno': 'N'},
+                {'dias': {'semana': 'sab', 'ordinal': 4}, 'turno': 'D/N'},
+                {'dias': {'semana': 'dom', 'ordinal': [2, 4]}, 'turno': 'D'},
+                {'dias': 'dom', 'turno': 'D'},
+            ],
+        },
+    }
+
+Os passos são faixas de prioridade: cada um percorre seus dias em ordem de
+data e atribui o turno enquanto couber na meta do médico (config['meta'];
+None = sem teto). Dia já atribuído ou de ausência é pulado.
+
+Passo:
+    'dias':  seletor ou lista de seletores (união, em ordem de data)
+    'turno': código de TURNOS ou lista — o primeiro que ainda cabe na meta
+    'max':   máximo de dias que o passo atribui (opcional)
+
+Seletor: 'seg' ... 'dom', 'uteis', 'fds', 'todos', ou um dict com
+    'semana':               dia(s) da semana, como acima
+    'ordinal':              n-ésimo(s) desse dia no período (1, 2, ..., -1 = último)
+    'primeiro_do_mes_novo': só o primeiro desse dia no segundo mês do período
+    'exceto':               'ultimo_do_mes' e/ou seletores a descontar
+    'sem_turno_de':         regras — pula dias em que elas têm qualquer turno
+    'sem_noite_de':         regras — pula dias em que elas têm turno noturno
+
+'sem_turno_de' e 'sem_noite_de' viram entradas da regra no PlanoRegras.
+Outras chaves da regra: 'alerta' (padrão True: avisa quando faltar plantão
+para a meta).
+
+Cada regra é compilada uma vez (regras_declarativas / plano_declarativo,
+em cache pela definição) e guarda, por período, as listas de índices de dia candidatos de
+cada passo; só os filtros que leem outras regras rodam a cada avaliação.
+"""
+
+from functools import lru_cache
+import json
+
+from gerador_escala import (
+    REGRAS_ESCALA, TURNOS, PlanoRegras, RegraEscala, como_calendario, plantoes_de_meios,
+    turno_noite_ocupado, _sempre_disponivel,
+)
+
+DIAS_SELETOR = {'seg': (0,), 'ter': (1,), 'qua': (2,), 'qui': (3,), 'sex': (4,), 'sab': (5,),
+                'dom': (6,), 'uteis': (0, 1, 2, 3, 4), 'fds': (5, 6), 'todos': tuple(range(7))}
+CHAVES_SELETOR = ('semana', 'ordinal', 'primeiro_do_mes_novo', 'exceto', 'sem_turno_de',
+                  'sem_noite_de')
+CHAVES_PASSO = ('dias', 'turno', 'max')
+CHAVES_REGRA = ('passos', 'alerta')
+
+MAX_PERIODOS_CACHE = 256   # períodos em cache por regra (~20 anos de meses)
+
+
+def _lista(valor):
+    return list(valor) if isinstance(valor, (list, tuple)) else [valor]
+
+
+def _dias_semana(valor, onde):
+    dias = set()
+    for v in _lista(valor):
+        if v not in DIAS_SELETOR:
+            raise ValueError(f"{onde}: dia da semana desconhecido {v!r} "
+                             f"(use {', '.join(DIAS_SELETOR)})")
+        dias.update(DIAS_SELETOR[v])
+    return tuple(sorted(dias))
+
+
+def _checar_chaves(spec, validas, onde):
+    if not isinstance(spec, dict):
+        raise ValueError(f"{onde}: esperado um objeto, veio {spec!r}")
+    sobra = [k for k in spec if k not in validas]
+    if sobra:
+        raise ValueError(f"{onde}: chave(s) desconhecida(s) {', '.join(map(repr, sobra))}")
+
+
+# ============================================================
+# SELETORES DE DIAS
+# ============================================================
+class _Seletor:
+    """Parte fixa (calendário) de um seletor, mais os filtros que leem outras regras."""
+
+    __slots__ = ('semana', 'ordinais', 'mes_novo', 'sem_ultimo', 'exceto', 'sem_turno', 'sem_noite')
+
+    def __init__(self, spec, onde):
+        if isinstance(spec, str):
+            spec = {'semana': spec}
+        _checar_chaves(spec, CHAVES_SELETOR, onde)
+        self.semana = _dias_semana(spec.get('semana', 'todos'), onde)
+        ordinais = spec.get('ordinal')
+        self.ordinais = None if ordinais is None else tuple(_lista(ordinais))
+        if self.ordinais is not None and not all(isinstance(k, int) and k for k in self.ordinais):
+            raise ValueError(f"{onde}: ordinal deve ser inteiro diferente de zero: {ordinais!r}")
+        self.mes_novo = bool(spec.get('primeiro_do_mes_novo', False))
+        self.sem_ultimo = False
+        self.exceto = []
+        for ex in _lista(spec.get('exceto', [])):
+            if ex == 'ultimo_do_mes':
+                self.sem_ultimo = True
+            else:
+                self.exceto.append(_Seletor(ex, f"{onde}.exceto"))
+        self.sem_turno = tuple(_lista(spec.get('sem_turno_de', [])))
+        self.sem_noite = tuple(_lista(spec.get('sem_noite_de', [])))
+        if any(s.sem_turno or s.sem_noite for s in self.exceto):
+            raise ValueError(f"{onde}: 'exceto' só aceita seletores de calendário")
+
+    def entradas(self):
+        return self.sem_turno + self.sem_noite
+
+    def datas(self, cal):
+        """Datas do período escolhidas pela parte fixa do seletor."""
+        datas = set()
+        for wd in self.semana:
+            if self.mes_novo:
+                d = cal.primeiro_do_mes_novo(wd)
+                candidatas = [d] if d is not None else []
+            elif self.ordinais is not None:
+                candidatas = [d for d in (cal.ordinal(wd, k) for k in self.ordinais) if d is not None]
+            else:
+                candidatas = cal.por_weekday(wd)
+            if self.sem_ultimo:
+                ultimos = cal.ultimos_no_periodo(wd)
+                candidatas = [d for d in candidatas if d not in ultimos]
+            datas.update(candidatas)
+        for ex in self.exceto:
+            datas -= ex.datas(cal)
+        return datas
+
+    def aceita(self, d, entradas):
+        """Filtros dinâmicos: o dia segue livre depois das regras lidas?"""
+        if any(d in entradas[r] for r in self.sem_turno):
+            return False
+        return not (self.sem_noite and turno_noite_ocupado(d, *(entradas[r] for r in self.sem_noite)))
+
+
+class _Passo:
+    __slots__ = ('seletores', 'turnos', 'maximo')
+
+    def __init__(self, spec, onde):
+        _checar_chaves(spec, CHAVES_PASSO, onde)
+        if 'dias' not in spec or 'turno' not in spec:
+            raise ValueError(f"{onde}: passo precisa de 'dias' e 'turno'")
+        self.seletores = [_Seletor(s, f"{onde}.dias") for s in _lista(spec['dias'])]
+        for t in _lista(spec['turno']):
+            if t not in TURNOS or not TURNOS[t]['blocos']:
+                raise ValueError(f"{onde}: turno desconhecido {t!r}")
+        self.turnos = tuple((t, TURNOS[t]['meios']) for t in _lista(spec['turno']))
+        self.maximo = spec.get('max')
+        if self.maximo is not None and (not isinstance(self.maximo, int) or self.maximo < 0):
+            raise ValueError(f"{onde}: 'max' deve ser inteiro ≥ 0: {self.maximo!r}")
+
+    def candidatos(self, cal):
+        """
+        [(i_dia, seletor)] em ordem de data; um dia em vários seletores fica
+        com o primeiro. Seletor None = sem filtro que leia outras regras.
+        """
+        por_dia = {}
+        for sel in self.seletores:
+            filtro = sel if sel.entradas() else None
+            for d in sel.datas(cal):
+                por_dia.setdefault(cal.index(d), filtro)
+        return tuple(sorted(por_dia.items(), key=lambda x: x[0]))
+
+
+# ============================================================
+# REGRA COMPILADA
+# ============================================================
+class RegraDeclarativa:
+    """Regra de config['regras'] compilada: passos validados e candidatos em cache por período."""
+
+    def __init__(self, nome, spec):
+        onde = f"regra {nome!r}"
+        _checar_chaves(spec, CHAVES_REGRA, onde)
+        passos = spec.get('passos')
+        if not passos:
+            raise ValueError(f"{onde}: sem 'passos'")
+        self.nome = nome
+        self.passos = [_Passo(p, f"{onde}.passos[{k}]") for k, p in enumerate(_lista(passos))]
+        self.alerta = bool(spec.get('alerta', True))
+        entradas = []
+        for passo in self.passos:
+            for sel in passo.seletores:
+                entradas += [r for r in sel.entradas() if r not in entradas]
+        self.entradas = tuple(entradas)
+        self._cache = {}
+
+    def __repr__(self):
+        return f"RegraDeclarativa({self.nome!r}, {len(self.passos)} passo(s))"
+
+    def candidatos(self, cal):
+        """Listas de candidatos de cada passo no período (calculadas uma vez por período)."""
+        chave = (cal[0], len(cal)) if len(cal) else None
+        cands = self._cache.get(chave)
+        if cands is None:
+            if len(self._cache) >= MAX_PERIODOS_CACHE:
+                self._cache.clear()
+            cands = self._cache[chave] = tuple(p.candidatos(cal) for p in self.passos)
+        return cands
+
+    def avaliar(self, cal, entradas, meta=None, disponivel=None):
+        """(escala, plantões) do médico no período; entradas = {regra lida: escala}."""
+        cal = como_calendario(cal)
+        livre = disponivel or _sempre_disponivel
+        teto = round(meta * 2) if meta is not None else None
+        escala = {}
+        total = 0
+        for passo, cands in zip(self.passos, self.candidatos(cal)):
+            feitos = 0
+            for i, sel in cands:
+                if passo.maximo is not None and feitos >= passo.maximo:
+                    break
+                d = cal[i]
+                if d in escala or not livre(d) or (sel is not None and not sel.aceita(d, entradas)):
+                    continue
+                for turno, meios in passo.turnos:
+                    if teto is None or total + meios <= teto:
+                        escala[d] = turno
+                        total += meios
+                        feitos += 1
+                        break
+        return escala, plantoes_de_meios(total)
+
+    def permitidos(self, cal):
+        """
+        Para o motor CP: [(i_dia, códigos, penalidade)] com a faixa do passo
+        como penalidade, e os grupos [(índices, máximo)] dos passos com 'max'.
+        """
+        cal = como_calendario(cal)
+        por_dia = {}
+        grupos = []
+        for prio, (passo, cands) in enumerate(zip(self.passos, self.candidatos(cal))):
+            for i, _ in cands:
+                dia = por_dia.setdefault(i, {})
+                for turno, _ in passo.turnos:
+                    dia.setdefault(turno, prio)
+            if passo.maximo is not None:
+                grupos.append((frozenset(i for i, _ in cands), passo.maximo))
+        dominios = [(i, [t], prio) for i, turnos in sorted(por_dia.items()) for t, prio in turnos.items()]
+        return dominios, grupos
+
+    def como_regra_escala(self):
+        """RegraEscala para o PlanoRegras: meta e disponibilidade vêm do médico no contexto."""
+        def funcao(ctx, entradas):
+            return self.avaliar(ctx.cal, entradas, ctx.meta(self.nome), ctx.disponivel(self.nome))
+        return RegraEscala(self.nome, self.entradas, funcao, alerta=self.alerta)
+
+
+# ============================================================
+# API
+# ============================================================
+@lru_cache(maxsize=32)
+def _compilar(chave):
+    regras = {nome: RegraDeclarativa(nome, spec) for nome, spec in json.loads(chave).items()}
+    plano = dict(REGRAS_ESCALA)
+    plano.update((nome, r.como_regra_escala()) for nome, r in regras.items())
+    return regras, PlanoRegras(plano)
+
+
+def _chave(config):
+    regras = config.get('regras') or {}
+    if not isinstance(regras, dict):
+        raise ValueError("'regras' deve ser um objeto {nome: definição}")
+    return json.dumps(regras, sort_keys=True)
+
+
+def regras_declarativas(config):
+    """{nome: RegraDeclarativa} de config['regras'], compiladas uma vez por definição."""
+    return _compilar(_chave(config))[0]
+
+
+def plano_declarativo(config):
+    """PlanoRegras com as regras embutidas e as declarativas da configuração."""
+    return _compilar(_chave(config))[1]
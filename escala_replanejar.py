@@ -0,0 +1,166 @@
+"""
+Replanejamento incremental — ausência de um médico no meio do período
+
+replanejar_ausencia() parte de uma escala já publicada, libera só os dias
+da janela de ausência do médico (marcando-os com o código de ausência, A
+por padrão) e roda de novo apenas as regras que dependem dele no
+plano de regras — por exemplo, as de Melissa e Valquiria olham as noites de
+Mariana. Das propostas dessas regras só entram turnos dentro da janela que
+cobrem um bloco que ficou vago, sem sobreposição e sem passar da meta do
+médico.
+Fora da janela nada muda.
+
+Uso:
+    novos = replanejar_ausencia(dados, 'Mariana Zanatta Bechara',
+                                date(2026, 2, 20), date(2026, 2, 28))
+"""
+
+from escala_perfil import span
+from gerador_escala import (
+    TURNOS, MEIOS_POR_COD, COD_TURNO, Ausencias, ContextoRegras, GradeEscala, como_calendario,
+    config_de_dados, medicos_por_regra, medico_por_nome, apelido_medico, contar_meios_plantoes,
+    plano_de_config, plantoes_de_meios,
+)
+
+
+def _meios(turno):
+    return MEIOS_POR_COD[COD_TURNO[turno]] if turno else 0
+
+
+def _aplicar_proposta(grade, med, janela, proposta):
+    """
+    Leva para a grade a proposta da regra de `med`, só nos dias da janela.
+    Primeiro tenta a janela inteira (a regra pode trocar um turno por outro
+    que agora ficou vago); se isso cobre mais blocos vagos sem sobrepor
+    turnos nem passar da meta, mantém só as mudanças necessárias para esse
+    ganho. Senão desfaz e aceita só os dias que cobrem bloco vago sem
+    sobreposição, enquanto couber na meta. Turnos publicados que não liberam
+    nem cobrem vaga ficam como estavam. Retorna [(nome, dia, antes, depois)].
+    """
+    nome = med['nome']
+    linha = grade.linha(nome)
+    teto = round(med['meta'] * 2) if med.get('meta') is not None else None
+    usado = contar_meios_plantoes(linha)
+    mudancas = []
+    for d in janela:
+        novo, atual = proposta.get(d), linha.get(d)
+        if novo != atual and not (atual and not TURNOS[atual]['blocos']):
+            mudancas.append((nome, d, atual, novo))   # ausências do próprio médico ficam
+
+    d_vagos = d_meios = 0
+    sobrepoe = False
+    for _, d, atual, novo in mudancas:
+        dv, dc = grade.simular(nome, d, novo)
+        d_vagos += dv
+        sobrepoe = sobrepoe or dc > 0
+        d_meios += _meios(novo) - _meios(atual)
+        grade.definir(nome, d, novo)
+    if not sobrepoe and d_vagos < 0 and (teto is None or usado + d_meios <= teto):
+        # Volta cada mudança que não faz falta: desfazê-la não abre vaga
+        usado += d_meios
+        mantidas = []
+        for m in mudancas:
+            _, d, atual, novo = m
+            dv, dc = grade.simular(nome, d, atual)
+            dm = _meios(atual) - _meios(novo)
+            if dv <= 0 and dc == 0 and (teto is None or usado + dm <= teto):
+                grade.definir(nome, d, atual)
+                usado += dm
+            else:
+                mantidas.append(m)
+        return mantidas
+    for _, d, atual, _ in mudancas:
+        grade.definir(nome, d, atual)
+
+    aceitos = []
+    for m in mudancas:
+        _, d, atual, novo = m
+        if not novo:
+            continue
+        dv, dc = grade.simular(nome, d, novo)
+        dm = _meios(novo) - _meios(atual)
+        if dv >= 0 or dc > 0 or (teto is not None and usado + dm > teto):
+            continue
+        grade.definir(nome, d, novo)
+        usado += dm
+        aceitos.append(m)
+    return aceitos
+
+
+# ============================================================
+# API
+# ============================================================
+def replanejar_ausencia(dados, medico, inicio, fim, motivo='A'):
+    """
+    Retorna um novo dict `dados` com `medico` (nome ou apelido) ausente de
+    `inicio` a `fim` (datas, inclusive). motivo: código de ausência de
+    TURNOS ('A', 'F', 'SD') gravado nos dias da janela, ou None para só
+    liberar. O original não é alterado; dados['replanejamento'] traz os
+    turnos liberados e os realocados.
+    """
+    if motivo is not None and (motivo not in TURNOS or TURNOS[motivo]['blocos']):
+        raise ValueError(f"motivo deve ser um código de ausência (A, F, SD): {motivo!r}")
+    config = config_de_dados(dados)
+    cfg = medico_por_nome(config, medico)
+    nome = cfg['nome']
+    dias = como_calendario(dados['dias'])
+    janela = [d for d in dias if inicio <= d <= fim]
+    if not janela:
+        raise ValueError(f"a ausência {inicio} → {fim} não cai no período")
+
+    grade = GradeEscala.de_escalas(dias, dados['escalas'])
+    liberados = []
+    with span('replanejar.liberar'):
+        linha = grade.linha(nome)
+        for d in janela:
+            antigo = linha.get(d)
+            if antigo and TURNOS[antigo]['blocos']:
+                liberados.append((d, antigo))
+            grade.definir(nome, d, motivo)
+
+    por_regra = medicos_por_regra(config)
+    ausencias = Ausencias.de_escalas(dias, grade.escalas())
+    ctx = ContextoRegras(dias, dados.get('mariana_ativa', False), ausencias=ausencias,
+                         por_regra=por_regra)
+    realocados = []
+
+    def gravar(regra, proposta, cnt):
+        if not regra.medico:
+            return proposta
+        med = por_regra.get(regra.nome)
+        if med is None:
+            return {}
+        realocados.extend(_aplicar_proposta(grade, med, janela, proposta))
+        return grade.linha(med['nome'])
+
+    plano = plano_de_config(config)
+    afetadas = plano.abaixo([cfg['regra']]) if liberados else []
+    if afetadas:
+        saidas = {r: grade.linha(por_regra[r]['nome']) if r in por_regra else {}
+                  for r, regra in plano.regras.items() if regra.medico}
+        with span('replanejar.regras'):
+            plano.executar(ctx, gravar, saidas=saidas, apenas=afetadas)
+    meios_liberados = sum(MEIOS_POR_COD[COD_TURNO[t]] for _, t in liberados)
+    alertas = list(dados['alertas'])
+    if liberados:
+        alertas.append(f"{apelido_medico(cfg)}: ausente {janela[0].strftime('%d/%m')}–"
+                       f"{janela[-1].strftime('%d/%m')} "
+                       f"({plantoes_de_meios(meios_liberados)} plantão(ões) liberados)")
+
+    novos = dict(dados)
+    novos.update({
+        'escalas': grade.escalas(),
+        'alertas': alertas,
+        'slots_vagos': grade.vagos(),
+        'grade': grade,
+        'ausencias': ausencias,
+        'replanejamento': {
+            'medico': nome,
+            'inicio': janela[0],
+            'fim': janela[-1],
+            'motivo': motivo,
+            'liberados': liberados,
+            'realocados': realocados,
+        },
+    })
+    return novos
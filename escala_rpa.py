@@ -0,0 +1,237 @@
+"""
+Alocação automática de RPA — turnos vagos → plantonistas RPA
+
+alocar_rpa() pega os blocos vagos da escala (dia × M/T/N) e os distribui
+entre as linhas RPA de config['rpa'] como um fluxo de custo mínimo:
+
+    origem → vaga (dia, bloco) → RPA no dia → [fim de semana] → RPA → destino
+
+Cada vaga sai no máximo uma vez, cada RPA faz no máximo um turno por dia e
+até 'max_turnos' no período. Os arcos finais têm custo crescente (o k-ésimo
+turno do mesmo RPA custa k, o k-ésimo fim de semana custa k·PESO_FDS), então
+o fluxo máximo de menor custo espalha a carga e os fins de semana. Noites
+seguidas do mesmo RPA são penalizadas e noite seguida de manhã é proibida;
+como isso depende de pares de dias, a rede é resolvida de novo com os arcos
+corrigidos até não surgir conflito novo.
+
+Disponibilidade por RPA (todas opcionais) em config['rpa']:
+    'max_turnos':  turnos no período (padrão MAX_TURNOS_RPA)
+    'turnos':      blocos que aceita, ex. 'MT' (padrão 'MTN')
+    'dias_semana': dias da semana que aceita, 0=Seg ... 6=Dom (padrão todos)
+    'ausencias':   intervalos, no mesmo formato dos médicos (ver Ausencias)
+
+Uso: dados = alocar_rpa(gerar_escala(2026, 2))
+"""
+
+from collections import deque
+
+from escala_perfil import span
+from gerador_escala import (
+    BLOCO_M, BLOCO_T, BLOCO_N, BLOCOS_POR_COD, Ausencias, GradeEscala,
+    como_calendario, config_de_dados,
+)
+
+BLOCOS_RPA = (('M', BLOCO_M), ('T', BLOCO_T), ('N', BLOCO_N))
+MAX_TURNOS_RPA = 6
+
+# Custos (unidades arbitrárias; só a ordem importa)
+PESO_CARGA = 1               # k-ésimo turno do mesmo RPA
+PESO_FDS = 3                 # k-ésimo turno de fim de semana do mesmo RPA
+PESO_NOITES_SEGUIDAS = 20    # N no dia seguinte a outra N do mesmo RPA
+MAX_REPAROS = 20
+
+_INF = float('inf')
+
+
+class _Fluxo:
+    """Rede residual de fluxo de custo mínimo (caminhos mínimos sucessivos com SPFA)."""
+
+    __slots__ = ('adj', 'para', 'cap', 'custo')
+
+    def __init__(self):
+        self.adj = []
+        self.para = []
+        self.cap = []
+        self.custo = []
+
+    def no(self):
+        self.adj.append([])
+        return len(self.adj) - 1
+
+    def arco(self, u, v, cap, custo):
+        """Arco u → v (e o reverso residual); retorna o índice do arco direto."""
+        e = len(self.para)
+        self.para += (v, u)
+        self.cap += (cap, 0)
+        self.custo += (custo, -custo)
+        self.adj[u].append(e)
+        self.adj[v].append(e + 1)
+        return e
+
+    def resolver(self, s, t):
+        """Fluxo máximo de s a t com custo mínimo; retorna (fluxo, custo)."""
+        adj, para, cap, custo = self.adj, self.para, self.cap, self.custo
+        n = len(adj)
+        fluxo = total = 0
+        while True:
+            dist = [_INF] * n
+            pred = [-1] * n
+            na_fila = [False] * n
+            dist[s] = 0
+            fila = deque((s,))
+            while fila:
+                u = fila.popleft()
+                na_fila[u] = False
+                du = dist[u]
+                for e in adj[u]:
+                    if cap[e]:
+                        v = para[e]
+                        nd = du + custo[e]
+                        if nd < dist[v]:
+                            dist[v] = nd
+                            pred[v] = e
+                            if not na_fila[v]:
+                                na_fila[v] = True
+                                fila.append(v)
+            if dist[t] == _INF:
+                return fluxo, total
+            f = _INF
+            v = t
+            while v != s:
+                e = pred[v]
+                f = min(f, cap[e])
+                v = para[e ^ 1]
+            v = t
+            while v != s:
+                e = pred[v]
+                cap[e] -= f
+                cap[e ^ 1] += f
+                v = para[e ^ 1]
+            fluxo += f
+            total += f * dist[t]
+
+
+def _disponibilidade(rpa, ausencias, cal):
+    """Predicado (i_dia, letra do bloco) → o RPA aceita a vaga?"""
+    turnos = set(rpa.get('turnos', 'MTN'))
+    dias_semana = set(rpa.get('dias_semana', range(7)))
+    ausente = {cal.index(d) for d in ausencias.no_periodo(rpa['nome'], cal)}
+    return lambda i, letra: (letra in turnos and cal[i].weekday() in dias_semana
+                             and i not in ausente)
+
+
+def _resolver(cal, vagas, rpas, aceita, ocupados, usados, ajustes):
+    """
+    Monta e resolve a rede; retorna {(i_rpa, i_dia): letra}.
+    ajustes: {(i_rpa, i_dia, letra): custo extra, ou None = proibido}.
+    """
+    rede = _Fluxo()
+    origem, destino = rede.no(), rede.no()
+    n_rpa = len(rpas)
+    no_rpa = [rede.no() for _ in range(n_rpa)]
+    no_fds = [rede.no() for _ in range(n_rpa)]
+    for r, rpa in enumerate(rpas):
+        teto = rpa.get('max_turnos', MAX_TURNOS_RPA)
+        for k in range(usados[r], teto):
+            rede.arco(no_rpa[r], destino, 1, k * PESO_CARGA)
+        for k in range(teto):
+            rede.arco(no_fds[r], no_rpa[r], 1, k * PESO_FDS)
+
+    no_dia = {}
+    arcos = []   # (arco vaga → RPA no dia, i_rpa, i_dia, letra)
+    for (i, letra) in vagas:
+        fds = cal[i].weekday() >= 5
+        no_vaga = None
+        for r in range(n_rpa):
+            if (r, i) in ocupados or not aceita[r](i, letra):
+                continue
+            extra = ajustes.get((r, i, letra), 0)
+            if extra is None:
+                continue
+            if no_vaga is None:
+                no_vaga = rede.no()
+                rede.arco(origem, no_vaga, 1, 0)
+            alvo = no_dia.get((r, i))
+            if alvo is None:
+                alvo = no_dia[(r, i)] = rede.no()
+                rede.arco(alvo, no_fds[r] if fds else no_rpa[r], 1, 0)
+            arcos.append((rede.arco(no_vaga, alvo, 1, extra), r, i, letra))
+
+    rede.resolver(origem, destino)
+    return {(r, i): letra for (e, r, i, letra) in arcos if rede.cap[e] == 0}
+
+
+def _conflitos(alocacao, noites, manhas):
+    """Ajustes novos para noites seguidas (penalidade) e noite → manhã (proibido)."""
+    novos = {}
+    for (r, i), letra in alocacao.items():
+        if (r, i - 1) in noites or alocacao.get((r, i - 1)) == 'N':
+            if letra == 'N':
+                novos[(r, i, 'N')] = PESO_NOITES_SEGUIDAS
+            elif letra == 'M':
+                novos[(r, i, 'M')] = None
+        if letra == 'N' and (r, i + 1) in manhas:
+            novos[(r, i, 'N')] = None
+    return novos
+
+
+# ============================================================
+# API
+# ============================================================
+def alocar_rpa(dados):
+    """
+    Preenche as linhas RPA de `dados` com os blocos vagos e retorna um novo
+    dict `dados` (o original não é alterado). Turnos já lançados nas linhas
+    RPA (planilha editada) são mantidos e contam no limite de cada um.
+    dados['alocacao_rpa'] traz os turnos alocados e as vagas que sobraram.
+    """
+    config = config_de_dados(dados)
+    cal = como_calendario(dados['dias'])
+    rpas = list(config['rpa'])
+    grade = GradeEscala.de_escalas(cal, dados['escalas'])
+    ausencias = dados.get('ausencias') or Ausencias.de_config(config)
+
+    with span('rpa.vagas'):
+        vagas = [(i, letra) for i in range(len(cal))
+                 for letra, bloco in BLOCOS_RPA if not grade.cobertura.mascara(i) & bloco]
+        aceita = [_disponibilidade(rpa, ausencias, cal) for rpa in rpas]
+        ocupados, usados, noites, manhas = set(), [0] * len(rpas), set(), set()
+        for r, rpa in enumerate(rpas):
+            for i, cod in enumerate(grade.codigos(rpa['nome'])):
+                if cod:
+                    ocupados.add((r, i))
+                    usados[r] += 1
+                    blocos = BLOCOS_POR_COD[cod]
+                    if blocos & BLOCO_N:
+                        noites.add((r, i))
+                    if blocos & BLOCO_M:
+                        manhas.add((r, i))
+
+    with span('rpa.fluxo'):
+        ajustes = {}
+        alocacao = {}
+        for _ in range(MAX_REPAROS):
+            alocacao = _resolver(cal, vagas, rpas, aceita, ocupados, usados, ajustes)
+            novos = {k: v for k, v in _conflitos(alocacao, noites, manhas).items()
+                     if k not in ajustes}
+            if not novos:
+                break
+            ajustes.update(novos)
+
+    alocados = []
+    for (r, i), letra in sorted(alocacao.items(), key=lambda x: (x[0][1], x[0][0])):
+        grade.definir(rpas[r]['nome'], cal[i], letra)
+        alocados.append((rpas[r]['nome'], cal[i], letra))
+    cobertas = {(i, letra) for (_, i), letra in alocacao.items()}
+
+    novos = dict(dados)
+    novos.update({
+        'escalas': grade.escalas(),
+        'slots_vagos': grade.vagos(),
+        'grade': grade,
+        'alocacao_rpa': {
+            'alocados': alocados,
+            'sem_rpa': [(cal[i], letra) for (i, letra) in vagas if (i, letra) not in cobertas],
+        },
+    })
+    return novos
@@ -0,0 +1,141 @@
+"""
+Validação da escala — invariantes das regras em uma passada pela grade
+
+validar_escala(dados) confere uma escala gerada ou editada à mão e devolve
+a lista de violações encontradas (dicts com codigo, gravidade, medico, data
+e mensagem). O índice dia × bloco é o livro-razão de cobertura da
+GradeEscala: reaproveitado quando `dados` veio de gerar_escala, montado uma
+única vez quando as escalas foram editadas como dicts.
+
+Códigos:
+    turno_desconhecido  código de turno que não existe em TURNOS
+    fora_do_periodo     data fora de 16/mes → 15/mes seguinte
+    sobreposicao        duas ou mais pessoas no mesmo bloco (M/T/N) do dia
+    dia_proibido        Maurício na última sexta / Faim na última quarta do mês
+    sem_turno           turno para quem está de licença (ou Mariana em atestado)
+    ausente             turno num dia de ausência do médico (dados['ausencias'])
+    acima_meta          plantões acima da meta (teto) do médico
+    abaixo_meta         plantões abaixo da meta (aviso, como os alertas)
+"""
+
+from gerador_escala import (
+    BLOCO_M, BLOCO_T, BLOCO_N, BLOCOS_POR_COD, MEIOS_POR_COD, DIAS_SEMANA_PT, TURNOS,
+    GradeEscala, apelido_medico, como_calendario, config_de_dados, grade_de_dados,
+    plantoes_de_meios, regras_com_alerta,
+)
+
+NOMES_BLOCO = ((BLOCO_M, 'manhã'), (BLOCO_T, 'tarde'), (BLOCO_N, 'noite'))
+
+# regra → (dia da semana, descrição): o último desse dia em cada mês é proibido
+DIAS_PROIBIDOS = {
+    'mauricio': (4, 'última sexta do mês'),
+    'faim': (2, 'última quarta do mês'),
+}
+
+
+def _violacao(codigo, mensagem, medico=None, data=None, gravidade='erro'):
+    return {'codigo': codigo, 'gravidade': gravidade, 'medico': medico,
+            'data': data, 'mensagem': mensagem}
+
+
+def _fmt(d):
+    return f"{DIAS_SEMANA_PT[d.weekday()]} {d.strftime('%d/%m')}"
+
+
+def _montar_grade(dados, violacoes):
+    """
+    Grade de `dados` (reaproveitada quando possível). Se alguma célula não
+    entra na grade — turno desconhecido ou data fora do período — ela vira
+    violação e o restante é montado normalmente.
+    """
+    try:
+        return grade_de_dados(dados)
+    except (ValueError, KeyError):
+        pass
+    grade = GradeEscala(dados['dias'])
+    for nome, esc in dados['escalas'].items():
+        grade.indice(nome)
+        for d, turno in esc.items():
+            try:
+                grade.definir(nome, d, turno)
+            except KeyError:
+                violacoes.append(_violacao(
+                    'fora_do_periodo', f"{nome}: {d} fora do período", nome, d))
+            except ValueError:
+                violacoes.append(_violacao(
+                    'turno_desconhecido', f"{nome}: turno {turno!r} em {_fmt(d)}", nome, d))
+    return grade
+
+
+# ============================================================
+# API
+# ============================================================
+def validar_escala(dados):
+    """
+    Confere todas as regras da escala e retorna a lista de violações, na
+    ordem: células inválidas, sobreposições (por dia) e regras por médico.
+    Lista vazia = escala válida.
+    """
+    violacoes = []
+    grade = _montar_grade(dados, violacoes)
+    config = config_de_dados(dados)
+    com_alerta = regras_com_alerta(config)
+    cal = como_calendario(dados['dias'])
+    cobertura = grade.cobertura
+    ausencias = dados.get('ausencias')
+
+    # Sobreposições: uma consulta ao livro-razão por dia e bloco
+    for i, d in enumerate(cal):
+        for bloco, nome_bloco in NOMES_BLOCO:
+            if cobertura.contagem(i, bloco) > 1:
+                quem = grade.quem_cobre(d, bloco)
+                violacoes.append(_violacao(
+                    'sobreposicao', f"{_fmt(d)} ({nome_bloco}): {', '.join(quem)}", None, d))
+
+    # Regras por médico: uma passada pela linha de cada um
+    for cfg in config['medicos']:
+        nome, regra = cfg['nome'], cfg['regra']
+        codigos = grade.codigos(nome)
+        proibido = DIAS_PROIBIDOS.get(regra)
+        proibidos = ({cal.index(d) for d in cal.ultimos_no_periodo(proibido[0])}
+                     if proibido else ())
+        sem_turno = regra == 'licenca' or (regra == 'mariana' and not dados['mariana_ativa'])
+        ausente = {cal.index(d): cod for d, cod in ausencias.no_periodo(nome, cal).items()} if ausencias else {}
+        meios = 0
+        for i, cod in enumerate(codigos):
+            if not cod:
+                continue
+            meios += MEIOS_POR_COD[cod]
+            if not BLOCOS_POR_COD[cod]:
+                continue          # ausências (F/A/SD) não são plantão
+            if sem_turno:
+                violacoes.append(_violacao(
+                    'sem_turno', f"{apelido_medico(cfg)}: turno em {_fmt(cal[i])} "
+                                 f"({'licença' if regra == 'licenca' else 'atestado'})", nome, cal[i]))
+            elif i in proibidos:
+                violacoes.append(_violacao(
+                    'dia_proibido', f"{apelido_medico(cfg)}: {_fmt(cal[i])} é {proibido[1]}",
+                    nome, cal[i]))
+            if i in ausente:
+                violacoes.append(_violacao(
+                    'ausente', f"{apelido_medico(cfg)}: turno em {_fmt(cal[i])} "
+                               f"({TURNOS[ausente[i]]['carga'].lower()})", nome, cal[i]))
+
+        meta = cfg.get('meta')
+        if meta is None or sem_turno:
+            continue
+        teto = round(meta * 2)
+        if meios > teto:
+            violacoes.append(_violacao(
+                'acima_meta', f"{apelido_medico(cfg)}: {plantoes_de_meios(meios)} plantões "
+                              f"(meta {plantoes_de_meios(teto)})", nome))
+        elif meios < teto and regra in com_alerta:
+            violacoes.append(_violacao(
+                'abaixo_meta', f"{apelido_medico(cfg)}: faltam {plantoes_de_meios(teto - meios)} "
+                               f"plantão(ões)", nome, gravidade='aviso'))
+    return violacoes
+
+
+def erros(violacoes):
+    """Só as violações de gravidade 'erro'."""
+    return [v for v in violacoes if v['gravidade'] == 'erro']
@@ -1,1416 +1,2474 @@
-#!/usr/bin/env python3
-"""
-Gerador Automático de Escala Médica - UAI Luizote (Psiquiatria)
-Período: Dia 16 do mês atual → Dia 15 do mês seguinte
-
-Uso: python3 gerador_escala.py <ano> <mes>
-Exemplo: python3 gerador_escala.py 2026 2   → gera escala Fev/Março 2026
-"""
-
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
-from datetime import date, timedelta
-import calendar
-import sys
-import copy
-
-# ============================================================
-# CONSTANTES
-# ============================================================
-DIAS_SEMANA_PT = ['Seg', 'Ter', 'Qua', 'Qui', 'Sex', 'Sab', 'Dom']
-MESES_PT = ['', 'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
-            'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro']
-MESES_ABREV = ['', 'Jan', 'Fev', 'Março', 'Abril', 'Maio', 'Jun',
-               'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
-
-# Cores
-COR_VERDE_ESCURO = 'FF3FAF46'
-COR_VERDE_CLARO = 'FFA9D18E'
-COR_BRANCO = 'FFFFFFFF'
-COR_CINZA = 'FFB2B2B2'
-COR_ROSA_LICENCA = 'FFE134FB'
-COR_AMARELO_ATESTADO = 'FFFFFF00'
-COR_LARANJA_VAZIO = 'FFFFA07A'  # Salmon/laranja claro para slots não preenchidos
-
-# Fontes
-FONT_BOLD = Font(bold=True, size=9, color='FF000000')
-FONT_NORMAL = Font(bold=False, size=9, color='FF000000')
-FONT_SHIFT = Font(bold=True, size=9, color='FF000000')
-FONT_TITLE = Font(bold=True, size=11, color='FF000000')
-FONT_HEADER = Font(bold=True, size=9, color='FF000000')
-
-# Alinhamentos
-ALIGN_CENTER = Alignment(horizontal='center', vertical='center')
-ALIGN_LEFT = Alignment(horizontal='left', vertical='center')
-
-# Fills
-FILL_VERDE_ESCURO = PatternFill('solid', fgColor=COR_VERDE_ESCURO)
-FILL_VERDE_CLARO = PatternFill('solid', fgColor=COR_VERDE_CLARO)
-FILL_BRANCO = PatternFill('solid', fgColor=COR_BRANCO)
-FILL_CINZA = PatternFill('solid', fgColor=COR_CINZA)
-FILL_ROSA = PatternFill('solid', fgColor=COR_ROSA_LICENCA)
-FILL_AMARELO = PatternFill('solid', fgColor=COR_AMARELO_ATESTADO)
-FILL_LARANJA = PatternFill('solid', fgColor=COR_LARANJA_VAZIO)
-
-# Bordas
-THIN_BORDER = Border(
-    left=Side(style='thin', color='FF999999'),
-    right=Side(style='thin', color='FF999999'),
-    top=Side(style='thin', color='FF999999'),
-    bottom=Side(style='thin', color='FF999999')
-)
-
-# ============================================================
-# CONFIGURAÇÃO DOS MÉDICOS
-# ============================================================
-MEDICOS_CONFIG = [
-    {
-        'nome': 'Gustavo Garcia Gonçalves',
-        'matricula': '9300414',
-        'meta': 8,
-        'regra': 'gustavo',
-    },
-    {
-        'nome': 'Mariana Zanatta Bechara',
-        'matricula': '9300762',
-        'meta': 8,
-        'regra': 'mariana',
-    },
-    {
-        'nome': 'Maurício Rosa de Almeida Junior',
-        'matricula': '9300788',
-        'meta': 4,
-        'regra': 'mauricio',
-    },
-    {
-        'nome': 'Sergio Monteiro Faim',
-        'matricula': '9300962',
-        'meta': 4,
-        'regra': 'faim',
-    },
-    {
-        'nome': 'Melissa Maria R Nascimento',
-        'matricula': '9300794',
-        'meta': 8,
-        'regra': 'melissa',
-    },
-    {
-        'nome': 'Bruna Silva Freitas',
-        'matricula': '9301856',
-        'meta': None,
-        'regra': 'bruna',
-    },
-    {
-        'nome': 'Laura Jorge Diniz Povoa',
-        'matricula': '9100505',
-        'meta': 0,
-        'regra': 'licenca',
-    },
-    {
-        'nome': 'Valquiria Alves Souza',
-        'matricula': '8403489',
-        'meta': 14.5,
-        'regra': 'valquiria',
-    },
-]
-
-RPA_NOMES = [
-    {'nome': 'Marina Anovazzi Silva', 'matricula': 'RPA'},
-    {'nome': 'Lucas Valadares Motta', 'matricula': 'RPA'},
-    {'nome': 'Eduardo', 'matricula': 'RPA'},
-    {'nome': 'Mayara Gois', 'matricula': 'RPA'},
-    {'nome': 'Patricia', 'matricula': 'RPA'},
-]
-
-
-# ============================================================
-# FUNÇÕES AUXILIARES
-# ============================================================
-def get_periodo(ano, mes):
-    """Retorna lista de datas do período 16/mes até 15/mes+1."""
-    inicio = date(ano, mes, 16)
-    if mes == 12:
-        fim = date(ano + 1, 1, 15)
-    else:
-        fim = date(ano, mes + 1, 15)
-    dias = []
-    d = inicio
-    while d <= fim:
-        dias.append(d)
-        d += timedelta(days=1)
-    return dias
-
-
-def ultimo_dia_semana_no_mes(ano, mes, weekday):
-    """Retorna a data do último dia com dado weekday (0=Seg) no mês/ano."""
-    ultimo_dia = calendar.monthrange(ano, mes)[1]
-    d = date(ano, mes, ultimo_dia)
-    while d.weekday() != weekday:
-        d -= timedelta(days=1)
-    return d
-
-
-def primeiro_dia_semana_no_mes(ano, mes, weekday):
-    """Retorna a data do primeiro dia com dado weekday no mês/ano."""
-    d = date(ano, mes, 1)
-    while d.weekday() != weekday:
-        d += timedelta(days=1)
-    return d
-
-
-def filtrar_por_weekday(dias, weekday):
-    """Filtra lista de datas por dia da semana (0=Seg, 1=Ter, ... 6=Dom)."""
-    return [d for d in dias if d.weekday() == weekday]
-
-
-def meses_no_periodo(dias):
-    """Retorna lista ordenada de tuplas (ano, mes) presentes no período."""
-    return sorted(set((d.year, d.month) for d in dias))
-
-
-def contar_plantoes(escala_medico):
-    """Conta plantões em 12h. D=1, N=1, M=0.5, T=0.5, D/N=2, T/N=1.5, V=2."""
-    valores = {
-        'N': 1, 'D': 1, 'M': 0.5, 'T': 0.5,
-        'D/N': 2, 'T/N': 1.5, 'V': 2
-    }
-    total = 0
-    for turno in escala_medico.values():
-        if turno and turno in valores:
-            total += valores[turno]
-    return total
-
-
-def contar_plantoes_unidade(escala_medico):
-    """Conta quantos 'slots de plantão' (cada 12h = 1 plantão)."""
-    return contar_plantoes(escala_medico)
-
-
-def nome_periodo(ano, mes):
-    """Gera string do período, ex: 'Fev/Março 2026'."""
-    if mes == 12:
-        return f'{MESES_ABREV[mes]}/{MESES_PT[1]} {ano + 1}'
-    return f'{MESES_ABREV[mes]}/{MESES_PT[mes + 1]} {ano}'
-
-
-# ============================================================
-# REGRAS DE DISTRIBUIÇÃO
-# ============================================================
-
-def regra_gustavo(dias):
-    """
-    Gustavo: 8 plantões
-    - Toda segunda à noite (N)
-    - Prefere sábados 24h (D/N) no 4º final de semana
-    - Tentar 2º e 4º final de semana: domingos D para completar
-    """
-    escala = {}
-    meta = 8
-    plantoes = 0
-
-    # 1. Segundas à noite (N)
-    for d in filtrar_por_weekday(dias, 0):  # 0 = Segunda
-        escala[d] = 'N'
-        plantoes += 1
-
-    sabados = filtrar_por_weekday(dias, 5)
-    domingos = filtrar_por_weekday(dias, 6)
-
-    # 2. 4º sábado D/N (24h = 2 plantões de 12h)
-    if len(sabados) > 3 and plantoes + 2 <= meta:
-        escala[sabados[3]] = 'D/N'
-        plantoes += 2
-
-    # 3. Completar com domingos D do 2º e 4º FDS
-    dom_pref = []
-    if len(domingos) > 1:
-        dom_pref.append(domingos[1])  # 2º domingo
-    if len(domingos) > 3:
-        dom_pref.append(domingos[3])  # 4º domingo
-
-    for d in dom_pref:
-        if plantoes >= meta:
-            break
-        if d not in escala:
-            escala[d] = 'D'
-            plantoes += 1
-
-    # 4. Se ainda faltar, completar com outros domingos D
-    for d in domingos:
-        if plantoes >= meta:
-            break
-        if d not in escala:
-            escala[d] = 'D'
-            plantoes += 1
-
-    return escala, plantoes
-
-
-def regra_mariana(dias, ativa=True):
-    """
-    Mariana: 8 plantões
-    - Toda quinta à noite (N)
-    - Todo domingo à noite (N) até completar 8
-    - Começar contagem do primeiro domingo
-    """
-    escala = {}
-    if not ativa:
-        return escala, 0
-
-    meta = 8
-    plantoes = 0
-
-    # Quintas à noite
-    for d in filtrar_por_weekday(dias, 3):  # 3 = Quinta
-        if plantoes < meta:
-            escala[d] = 'N'
-            plantoes += 1
-
-    # Domingos à noite para completar
-    for d in filtrar_por_weekday(dias, 6):  # 6 = Domingo
-        if plantoes >= meta:
-            break
-        if d not in escala:
-            escala[d] = 'N'
-            plantoes += 1
-
-    return escala, plantoes
-
-
-def regra_mauricio(dias):
-    """
-    Maurício: 4 plantões
-    - Todas as sextas do período (N), EXCETO a última sexta de cada mês calendário
-    - Primeiro sábado do mês novo no período (D = 12h dia)
-    - Quando tem 5 sextas, fica 2 sextas sem plantão
-    """
-    escala = {}
-    meta = 4
-    plantoes = 0
-
-    meses = meses_no_periodo(dias)
-
-    # Identificar sextas proibidas (última sexta de cada mês)
-    sextas_proibidas = set()
-    for (a, m) in meses:
-        ultima_sex = ultimo_dia_semana_no_mes(a, m, 4)  # 4 = Sexta
-        if ultima_sex in dias:
-            sextas_proibidas.add(ultima_sex)
-
-    # Verificar se há 5 sextas (precisa pular 2)
-    sextas_periodo = filtrar_por_weekday(dias, 4)
-    sextas_validas = [s for s in sextas_periodo if s not in sextas_proibidas]
-
-    # Se 5 sextas no total e já tiramos as últimas de cada mês,
-    # verificar se ainda temos mais de 3 sextas válidas
-    # (precisamos de no máximo 3 sextas N + 1 sábado D = 4)
-    if len(sextas_validas) > 3:
-        # Manter apenas as 3 primeiras sextas válidas
-        sextas_validas = sextas_validas[:3]
-
-    # Atribuir N nas sextas válidas
-    for sex in sextas_validas:
-        if plantoes < meta:
-            escala[sex] = 'N'
-            plantoes += 1
-
-    # Primeiro sábado do segundo mês (mês novo) → D (12h dia)
-    if len(meses) > 1:
-        (a2, m2) = meses[1]
-        primeiro_sab = primeiro_dia_semana_no_mes(a2, m2, 5)  # 5 = Sábado
-        if primeiro_sab in dias and plantoes < meta:
-            escala[primeiro_sab] = 'D'
-            plantoes += 1
-
-    return escala, plantoes
-
-
-def regra_faim(dias, escala_mauricio):
-    """
-    Faim: 4 plantões
-    - 3 quartas à noite (N), nunca a última quarta de cada mês calendário
-    - 1 sábado noite (N) - primeiro sábado do mês novo (casado com Maurício)
-    """
-    escala = {}
-    meta = 4
-    plantoes = 0
-
-    meses = meses_no_periodo(dias)
-
-    # Quartas proibidas (última quarta de cada mês)
-    quartas_proibidas = set()
-    for (a, m) in meses:
-        ultima_qua = ultimo_dia_semana_no_mes(a, m, 2)  # 2 = Quarta
-        if ultima_qua in dias:
-            quartas_proibidas.add(ultima_qua)
-
-    # 3 quartas (excluindo proibidas)
-    quartas_validas = [q for q in filtrar_por_weekday(dias, 2) if q not in quartas_proibidas]
-    for qua in quartas_validas[:3]:
-        escala[qua] = 'N'
-        plantoes += 1
-
-    # Primeiro sábado do mês novo → N (noite, casado com Maurício que faz D)
-    if len(meses) > 1:
-        (a2, m2) = meses[1]
-        primeiro_sab = primeiro_dia_semana_no_mes(a2, m2, 5)
-        if primeiro_sab in dias and plantoes < meta:
-            escala[primeiro_sab] = 'N'
-            plantoes += 1
-
-    return escala, plantoes
-
-
-def turno_noite_ocupado(d, *escalas):
-    """Verifica se alguma escala já tem turno noturno naquele dia."""
-    turnos_noite = ('N', 'D/N', 'T/N', 'V')
-    for esc in escalas:
-        turno = esc.get(d)
-        if turno in turnos_noite:
-            return True
-    return False
-
-
-def regra_melissa(dias, escala_mauricio, escala_faim, escala_mariana, escala_gustavo, escala_valquiria=None):
-    """
-    Melissa: 8 plantões, evitar finais de semana
-    - Terças à noite (N)
-    - Quartas que Faim não cobre (N)
-    - Sextas que Maurício não cobre (N)
-    - Completar com domingos à noite (N) onde turno noturno estiver vago
-    - Quintas como último recurso
-    """
-    escala = {}
-    meta = 8
-    plantoes = 0
-
-    candidatos = []
-
-    # 1) Terças à noite (prioridade alta)
-    for d in filtrar_por_weekday(dias, 1):  # 1 = Terça
-        candidatos.append((0, d))
-
-    # 2) Quartas NÃO cobertas por Faim (prioridade alta)
-    for d in filtrar_por_weekday(dias, 2):  # 2 = Quarta
-        if d not in escala_faim:
-            candidatos.append((0, d))
-
-    # 3) Sextas NÃO cobertas por Maurício (prioridade alta)
-    for d in filtrar_por_weekday(dias, 4):  # 4 = Sexta
-        if d not in escala_mauricio:
-            candidatos.append((0, d))
-
-    # 4) Domingos à noite: OK se ninguém tem turno NOTURNO naquele dia
-    #    (Gustavo pode ter D = dia, que não conflita com N = noite)
-    for d in filtrar_por_weekday(dias, 6):  # 6 = Domingo
-        if not turno_noite_ocupado(d, escala_mariana, escala_gustavo):
-            candidatos.append((1, d))
-
-    # 5) Quintas sem turno noturno ocupado (penúltimo recurso)
-    for d in filtrar_por_weekday(dias, 3):  # 3 = Quinta
-        if not turno_noite_ocupado(d, escala_mariana):
-            candidatos.append((2, d))
-
-    # 6) Sábados à noite como último recurso (regra diz "evitar" FDS, não proibir)
-    esc_val = escala_valquiria or {}
-    for d in filtrar_por_weekday(dias, 5):  # 5 = Sábado
-        if not turno_noite_ocupado(d, escala_mauricio, escala_faim, escala_gustavo, esc_val):
-            candidatos.append((3, d))
-
-    # Ordenar por prioridade e depois por data
-    candidatos.sort(key=lambda x: (x[0], x[1]))
-    for (prio, d) in candidatos:
-        if plantoes >= meta:
-            break
-        if d not in escala:
-            escala[d] = 'N'
-            plantoes += 1
-
-    return escala, plantoes
-
-
-def regra_bruna(dias):
-    """
-    Bruna: M (manhã 07h-13h) em todos os dias úteis (Seg-Sex).
-    Sábados de plantão especial quando necessário.
-    """
-    escala = {}
-    for d in dias:
-        if d.weekday() < 5:  # Seg a Sex
-            escala[d] = 'M'
-    return escala, len([d for d in dias if d.weekday() < 5])
-
-
-def regra_valquiria(dias, escala_mariana, escala_gustavo=None, escala_mauricio=None, escala_faim=None):
-    """
-    Valquiria: EXATAMENTE ≤ 14,5 plantões (não exceder).
-    Ordem de preenchimento conforme prioridade:
-      1. TARDES (T): todos os dias úteis Seg-Sex (0,5 plantão cada)
-      2. NOTURNOS: upgrade T → T/N nas quintas sem cobertura noturna (+1,0 plantão)
-      3. FINS DE SEMANA: D/N, D ou T até completar 14,5 sem duplicata
-    """
-    META = 14.5
-    escala = {}
-    esc_gus = escala_gustavo or {}
-    esc_mau = escala_mauricio or {}
-    esc_fai = escala_faim or {}
-    total = 0.0
-
-    # ── 1. TARDES: T em todos os dias úteis (Seg a Sex), respeitando o teto ──
-    for d in sorted(d for d in dias if d.weekday() < 5):
-        if total + 0.5 > META:
-            break
-        escala[d] = 'T'
-        total += 0.5
-
-    # ── 2. NOTURNOS: upgrade T → T/N nas quintas onde noite está disponível ──
-    #   Incremento por quinta = +1,0 (N = 12 h = 1 plantão além do T já contado)
-    for d in filtrar_por_weekday(dias, 3):
-        if d not in escala:
-            continue  # Quinta não foi alocada no passo 1 (teto já atingido)
-        if turno_noite_ocupado(d, escala_mariana):
-            continue  # Mariana (ou outro) já cobre a noite → mantém só T
-        if total + 1.0 > META:
-            break  # Adicionar noite ultrapassaria 14,5 → para
-        escala[d] = 'T/N'
-        total += 1.0  # Apenas o incremento noturno (T→T/N)
-
-    # ── 3. FINS DE SEMANA: preencher o restante até 14,5 sem conflito ──
-    fds = sorted(filtrar_por_weekday(dias, 5) + filtrar_por_weekday(dias, 6))
-    for d in fds:
-        if total >= META:
-            break
-        if d in escala:
-            continue  # Já alocado
-        if turno_noite_ocupado(d, esc_gus, esc_mau, esc_fai):
-            continue  # Outro médico tem turno noturno nesse dia → pular
-        restante = round(META - total, 1)
-        if restante >= 2:
-            escala[d] = 'D/N'
-            total += 2
-        elif restante >= 1:
-            escala[d] = 'D'
-            total += 1
-        elif restante >= 0.5:
-            escala[d] = 'T'
-            total += 0.5
-
-    return escala, round(total, 1)
-
-
-# ============================================================
-# GERADOR PRINCIPAL
-# ============================================================
-
-def gerar_escala(ano, mes, mariana_ativa=False):
-    """
-    Gera a escala para o período 16/mes/ano → 15/mes+1/ano.
-    Retorna dict com todas as escalas e metadados.
-    """
-    dias = get_periodo(ano, mes)
-    resultado = {}
-    alertas = []
-
-    # 1. Bruna (manhã - não conflita com turnos N)
-    esc_bruna, cnt_bruna = regra_bruna(dias)
-    resultado['Bruna Silva Freitas'] = esc_bruna
-
-    # 2. Gustavo (Segunda N + fins de semana)
-    esc_gustavo, cnt_gustavo = regra_gustavo(dias)
-    resultado['Gustavo Garcia Gonçalves'] = esc_gustavo
-    if cnt_gustavo < 8:
-        alertas.append(f"Gustavo: faltam {8 - cnt_gustavo} plantão(ões)")
-
-    # 3. Mariana (Quinta N + Domingo N)
-    esc_mariana, cnt_mariana = regra_mariana(dias, ativa=mariana_ativa)
-    resultado['Mariana Zanatta Bechara'] = esc_mariana
-    if mariana_ativa and cnt_mariana < 8:
-        alertas.append(f"Mariana: faltam {8 - cnt_mariana} plantão(ões)")
-
-    # 4. Maurício (Sextas N + 1 Sábado D)
-    esc_mauricio, cnt_mauricio = regra_mauricio(dias)
-    resultado['Maurício Rosa de Almeida Junior'] = esc_mauricio
-    if cnt_mauricio < 4:
-        alertas.append(f"Maurício: faltam {4 - cnt_mauricio} plantão(ões)")
-
-    # 5. Faim (3 Quartas N + 1 Sábado N)
-    esc_faim, cnt_faim = regra_faim(dias, esc_mauricio)
-    resultado['Sergio Monteiro Faim'] = esc_faim
-    if cnt_faim < 4:
-        alertas.append(f"Faim: faltam {4 - cnt_faim} plantão(ões)")
-
-    # 6. Laura (licença)
-    resultado['Laura Jorge Diniz Povoa'] = {}
-
-    # 7. Pré-calcular as quintas de Valquiria (N se Mariana não cobre)
-    #    para que Melissa saiba quais noites estão livres
-    esc_valquiria_parcial = {}
-    for d in filtrar_por_weekday(dias, 3):  # Quintas
-        if d not in esc_mariana:
-            esc_valquiria_parcial[d] = 'T/N'
-
-    # 8. Melissa (Terças N + Wed/Fri gaps + Domingo + Sábado fallback)
-    esc_melissa, cnt_melissa = regra_melissa(
-        dias, esc_mauricio, esc_faim, esc_mariana, esc_gustavo, esc_valquiria_parcial)
-    resultado['Melissa Maria R Nascimento'] = esc_melissa
-    if cnt_melissa < 8:
-        alertas.append(f"Melissa: faltam {8 - cnt_melissa} plantão(ões)")
-
-    # 9. Valquiria (ÚLTIMA) — respeita limite 14,5 e evita conflitos com outros
-    esc_valquiria, cnt_valquiria = regra_valquiria(
-        dias, esc_mariana,
-        escala_gustavo=esc_gustavo,
-        escala_mauricio=esc_mauricio,
-        escala_faim=esc_faim,
-    )
-    resultado['Valquiria Alves Souza'] = esc_valquiria
-
-    # RPAs ficam vazios (preenchimento manual)
-    for rpa in RPA_NOMES:
-        resultado[rpa['nome']] = {}
-
-    # Identificar slots vagos (MANHÃ, TARDE, NOITE)
-    slots_vagos = {'M': {}, 'T': {}, 'N': {}}
-    for d in dias:
-        m_coberto = False
-        t_coberto = False
-        n_coberto = False
-
-        for nome, esc in resultado.items():
-            turno = esc.get(d)
-            if turno in ('M', 'D', 'D/N', 'V'):
-                m_coberto = True
-            if turno in ('T', 'D', 'D/N', 'V', 'T/N'):
-                t_coberto = True
-            if turno in ('N', 'D/N', 'V', 'T/N'):
-                n_coberto = True
-
-        if not m_coberto:
-            slots_vagos['M'][d] = True
-        if not t_coberto:
-            slots_vagos['T'][d] = True
-        if not n_coberto:
-            slots_vagos['N'][d] = True
-
-    return {
-        'dias': dias,
-        'escalas': resultado,
-        'alertas': alertas,
-        'slots_vagos': slots_vagos,
-        'ano': ano,
-        'mes': mes,
-        'mariana_ativa': mariana_ativa,
-    }
-
-
-# ============================================================
-# GERAÇÃO DO EXCEL
-# ============================================================
-
-def gerar_excel(dados, caminho_saida):
-    """Gera o arquivo Excel com a escala formatada."""
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = 'PSIQUIATRIA'
-
-    dias = dados['dias']
-    escalas = dados['escalas']
-    alertas = dados['alertas']
-    slots_vagos = dados['slots_vagos']
-    ano = dados['ano']
-    mes = dados['mes']
-    num_dias = len(dias)
-
-    # Configurar largura de colunas
-    ws.column_dimensions['A'].width = 30.5
-    ws.column_dimensions['B'].width = 14.9
-    for i in range(num_dias):
-        col_letter = get_column_letter(3 + i)  # C = 3
-        ws.column_dimensions[col_letter].width = 4.6
-    col_total = get_column_letter(3 + num_dias + 2)  # 2 colunas de espaço
-    ws.column_dimensions[col_total].width = 9.0
-
-    # ---- CABEÇALHO (Linhas 1-9) ----
-    ws.merge_cells(start_row=1, start_column=1, end_row=9, end_column=2)
-    ws.merge_cells(start_row=1, start_column=3, end_row=2, end_column=12)
-    c = ws.cell(row=1, column=3, value='UAI LUIZOTE')
-    c.font = FONT_TITLE
-    c.alignment = ALIGN_CENTER
-    c.fill = FILL_BRANCO
-
-    ws.cell(row=3, column=3, value='PSIQUIATRIA').font = FONT_BOLD
-    ws['C3'].alignment = ALIGN_CENTER
-    ws['C3'].fill = FILL_BRANCO
-
-    periodo_str = nome_periodo(ano, mes)
-    ws.cell(row=5, column=3, value=periodo_str).font = FONT_BOLD
-    ws['C5'].alignment = ALIGN_CENTER
-    ws['C5'].fill = FILL_BRANCO
-
-    # Legenda de horários (coluna M-T)
-    col_leg = 13  # M
-    legenda = [
-        (2, 'V', '07:00 às 07:00', '24 Horas'),
-        (3, 'D', '07:00 às 19:00', '12 Horas'),
-        (4, 'N', '19:00 às 07:00', '12 Horas'),
-        (5, 'M', '07:00 às 13:00', '6 Horas'),
-        (6, 'T', '13:00 às 19:00', '6 Horas'),
-    ]
-    ws.merge_cells(start_row=1, start_column=col_leg, end_row=1, end_column=col_leg + 7)
-    ws.cell(row=1, column=col_leg, value='HORÁRIOS').font = FONT_BOLD
-    ws.cell(row=1, column=col_leg).alignment = ALIGN_CENTER
-    ws.cell(row=1, column=col_leg).fill = FILL_BRANCO
-
-    for (row, cod, horario, duracao) in legenda:
-        ws.cell(row=row, column=col_leg, value=cod).font = FONT_BOLD
-        ws.cell(row=row, column=col_leg).alignment = ALIGN_CENTER
-        ws.cell(row=row, column=col_leg).fill = FILL_BRANCO
-        ws.merge_cells(start_row=row, start_column=col_leg + 1, end_row=row, end_column=col_leg + 5)
-        ws.cell(row=row, column=col_leg + 1, value=horario).font = FONT_BOLD
-        ws.cell(row=row, column=col_leg + 1).alignment = ALIGN_CENTER
-        ws.cell(row=row, column=col_leg + 1).fill = FILL_BRANCO
-        ws.merge_cells(start_row=row, start_column=col_leg + 6, end_row=row, end_column=col_leg + 7)
-        ws.cell(row=row, column=col_leg + 6, value=duracao).font = FONT_BOLD
-        ws.cell(row=row, column=col_leg + 6).alignment = ALIGN_CENTER
-        ws.cell(row=row, column=col_leg + 6).fill = FILL_BRANCO
-
-    # SD, F, A
-    ws.cell(row=7, column=col_leg, value='SD').font = FONT_BOLD
-    ws.cell(row=7, column=col_leg).alignment = ALIGN_CENTER
-    ws.cell(row=7, column=col_leg).fill = FILL_BRANCO
-    ws.merge_cells(start_row=7, start_column=col_leg + 2, end_row=7, end_column=col_leg + 4)
-    ws.cell(row=7, column=col_leg + 2, value='Folga Sindicato').font = FONT_BOLD
-    ws.cell(row=7, column=col_leg + 2).alignment = ALIGN_CENTER
-    ws.cell(row=7, column=col_leg + 2).fill = FILL_BRANCO
-
-    ws.cell(row=8, column=col_leg, value='F').font = FONT_BOLD
-    ws.cell(row=8, column=col_leg).alignment = ALIGN_CENTER
-    ws.cell(row=8, column=col_leg).fill = FILL_BRANCO
-    ws.merge_cells(start_row=8, start_column=col_leg + 1, end_row=8, end_column=col_leg + 7)
-    ws.cell(row=8, column=col_leg + 1, value='Férias').font = FONT_BOLD
-    ws.cell(row=8, column=col_leg + 1).alignment = ALIGN_CENTER
-    ws.cell(row=8, column=col_leg + 1).fill = FILL_BRANCO
-
-    ws.cell(row=9, column=col_leg, value='A').font = FONT_BOLD
-    ws.cell(row=9, column=col_leg).alignment = ALIGN_CENTER
-    ws.cell(row=9, column=col_leg).fill = FILL_BRANCO
-    ws.merge_cells(start_row=9, start_column=col_leg + 1, end_row=9, end_column=col_leg + 7)
-    ws.cell(row=9, column=col_leg + 1, value='Atestado/Congresso').font = FONT_BOLD
-    ws.cell(row=9, column=col_leg + 1).alignment = ALIGN_CENTER
-    ws.cell(row=9, column=col_leg + 1).fill = FILL_BRANCO
-
-    # ---- LINHA 10: Médicos / MATRÍCULA ----
-    ws.row_dimensions[10].height = 7.5
-    ws.merge_cells(start_row=10, start_column=1, end_row=12, end_column=1)
-    ws.cell(row=10, column=1, value='Médicos:').font = FONT_BOLD
-    ws.cell(row=10, column=1).alignment = ALIGN_CENTER
-    ws.cell(row=10, column=1).fill = FILL_BRANCO
-    ws.cell(row=10, column=2, value='MATRÍCULA').font = FONT_BOLD
-    ws.cell(row=10, column=2).alignment = ALIGN_CENTER
-    ws.cell(row=10, column=2).fill = FILL_BRANCO
-
-    # ---- LINHA 11: Dias da semana ----
-    ws.row_dimensions[11].height = 13.5
-    for i, d in enumerate(dias):
-        col = 3 + i
-        ws.cell(row=11, column=col, value=DIAS_SEMANA_PT[d.weekday()])
-        ws.cell(row=11, column=col).font = FONT_BOLD
-        ws.cell(row=11, column=col).alignment = ALIGN_CENTER
-        ws.cell(row=11, column=col).fill = FILL_VERDE_ESCURO
-        ws.cell(row=11, column=col).border = THIN_BORDER
-
-    # ---- LINHA 12: Números dos dias ----
-    ws.row_dimensions[12].height = 13.5
-    for i, d in enumerate(dias):
-        col = 3 + i
-        ws.cell(row=12, column=col, value=d.day)
-        ws.cell(row=12, column=col).font = FONT_BOLD
-        ws.cell(row=12, column=col).alignment = ALIGN_CENTER
-        ws.cell(row=12, column=col).fill = FILL_VERDE_CLARO
-        ws.cell(row=12, column=col).border = THIN_BORDER
-
-    # ---- LINHAS DE MÉDICOS (13 em diante) ----
-    col_total_idx = 3 + num_dias + 2  # Coluna do total
-
-    row_atual = 13
-    medicos_ordem = [
-        'Gustavo Garcia Gonçalves',
-        'Mariana Zanatta Bechara',
-        'Maurício Rosa de Almeida Junior',
-        'Sergio Monteiro Faim',
-        'Melissa Maria R Nascimento',
-        'Bruna Silva Freitas',
-        'Laura Jorge Diniz Povoa',
-        'Valquiria Alves Souza',
-    ]
-
-    config_por_nome = {c['nome']: c for c in MEDICOS_CONFIG}
-
-    for nome in medicos_ordem:
-        ws.row_dimensions[row_atual].height = 11.25
-        config = config_por_nome.get(nome, {})
-        esc = escalas.get(nome, {})
-
-        # Nome
-        c = ws.cell(row=row_atual, column=1, value=nome)
-        c.font = FONT_NORMAL
-        c.alignment = ALIGN_LEFT
-
-        # Aplicar cor de fundo para licença
-        if config.get('regra') == 'licenca':
-            c.fill = FILL_ROSA
-            ws.cell(row=row_atual, column=2).fill = FILL_ROSA
-            ws.cell(row=row_atual, column=col_total_idx).fill = FILL_ROSA
-        elif not dados['mariana_ativa'] and nome == 'Mariana Zanatta Bechara':
-            c.fill = FILL_AMARELO
-            ws.cell(row=row_atual, column=2).fill = FILL_AMARELO
-        else:
-            c.fill = FILL_BRANCO
-
-        # Matrícula
-        mat = config.get('matricula', '')
-        ws.cell(row=row_atual, column=2, value=mat)
-        ws.cell(row=row_atual, column=2).font = FONT_NORMAL
-        ws.cell(row=row_atual, column=2).alignment = ALIGN_CENTER
-
-        # Turnos
-        for i, d in enumerate(dias):
-            col = 3 + i
-            turno = esc.get(d)
-            cell = ws.cell(row=row_atual, column=col)
-            cell.border = THIN_BORDER
-            cell.alignment = ALIGN_CENTER
-
-            if turno:
-                cell.value = turno
-                cell.font = FONT_SHIFT
-
-            # Fundo: fim de semana = verde claro
-            if d.weekday() >= 5:  # Sab ou Dom
-                cell.fill = FILL_VERDE_CLARO
-            elif config.get('regra') == 'licenca':
-                cell.fill = FILL_ROSA
-            elif not dados['mariana_ativa'] and nome == 'Mariana Zanatta Bechara':
-                cell.fill = FILL_AMARELO
-
-        # Total de plantões
-        meta = config.get('meta')
-        total = contar_plantoes(esc)
-        if meta is not None and meta > 0:
-            ws.cell(row=row_atual, column=col_total_idx, value=int(total) if total == int(total) else total)
-        elif config.get('regra') == 'bruna':
-            ws.cell(row=row_atual, column=col_total_idx, value='1fd')
-        elif config.get('regra') == 'licenca':
-            ws.cell(row=row_atual, column=col_total_idx, value='1fd')
-
-        ws.cell(row=row_atual, column=col_total_idx).font = FONT_BOLD
-        ws.cell(row=row_atual, column=col_total_idx).alignment = ALIGN_CENTER
-        if config.get('regra') == 'licenca':
-            ws.cell(row=row_atual, column=col_total_idx).fill = FILL_ROSA
-
-        row_atual += 1
-
-    # ---- LINHAS RPA (vazias para preenchimento manual) ----
-    for rpa in RPA_NOMES:
-        ws.row_dimensions[row_atual].height = 11.25
-        ws.cell(row=row_atual, column=1, value=rpa['nome']).font = FONT_NORMAL
-        ws.cell(row=row_atual, column=1).fill = FILL_BRANCO
-        ws.cell(row=row_atual, column=2, value='RPA').font = FONT_BOLD
-        ws.cell(row=row_atual, column=2).alignment = ALIGN_CENTER
-        ws.cell(row=row_atual, column=2).fill = FILL_BRANCO
-
-        for i, d in enumerate(dias):
-            col = 3 + i
-            cell = ws.cell(row=row_atual, column=col)
-            cell.border = THIN_BORDER
-            cell.alignment = ALIGN_CENTER
-            if d.weekday() >= 5:
-                cell.fill = FILL_VERDE_CLARO
-
-        row_atual += 1
-
-    # ---- LINHA VAZIA ----
-    row_atual += 1
-
-    # ---- ATESTADO ----
-    ws.merge_cells(start_row=row_atual, start_column=1, end_row=row_atual, end_column=2)
-    ws.cell(row=row_atual, column=1, value='Atestado').font = FONT_BOLD
-    ws.cell(row=row_atual, column=1).fill = FILL_CINZA
-    ws.cell(row=row_atual, column=1).alignment = ALIGN_LEFT
-    row_atual += 2
-
-    # ---- FALTAM (alertas por médico) ----
-    ws.merge_cells(start_row=row_atual, start_column=1, end_row=row_atual, end_column=2)
-    ws.cell(row=row_atual, column=1, value='FALTAM').font = FONT_BOLD
-    ws.cell(row=row_atual, column=1).alignment = ALIGN_CENTER
-    ws.cell(row=row_atual, column=1).fill = FILL_BRANCO
-    row_atual += 1
-
-    # Mostrar alertas de plantões faltantes
-    for alerta in alertas:
-        ws.cell(row=row_atual, column=1, value=alerta).font = Font(bold=False, size=8, color='FFFF0000')
-        ws.cell(row=row_atual, column=1).alignment = ALIGN_LEFT
-        row_atual += 1
-
-    row_atual += 1
-
-    # ---- FALTAM (slots vagos com cor laranja) ----
-    ws.merge_cells(start_row=row_atual, start_column=1,
-                   end_row=row_atual, end_column=3 + num_dias - 1)
-    ws.cell(row=row_atual, column=1, value='FALTAM PREENCHER (alocar RPA)').font = FONT_BOLD
-    ws.cell(row=row_atual, column=1).alignment = ALIGN_CENTER
-    ws.cell(row=row_atual, column=1).fill = FILL_LARANJA
-    row_atual += 1
-
-    # MANHÃ
-    ws.merge_cells(start_row=row_atual, start_column=1, end_row=row_atual, end_column=2)
-    ws.cell(row=row_atual, column=1, value='MANHÃ').font = FONT_BOLD
-    ws.cell(row=row_atual, column=1).alignment = ALIGN_CENTER
-    ws.cell(row=row_atual, column=1).fill = FILL_BRANCO
-    for i, d in enumerate(dias):
-        col = 3 + i
-        cell = ws.cell(row=row_atual, column=col)
-        cell.font = FONT_BOLD
-        cell.alignment = ALIGN_CENTER
-        cell.border = THIN_BORDER
-        if d in slots_vagos['M']:
-            cell.value = 1
-            cell.fill = FILL_LARANJA
-        else:
-            cell.value = 0
-            cell.fill = FILL_BRANCO
-    row_atual += 1
-
-    # TARDE
-    ws.merge_cells(start_row=row_atual, start_column=1, end_row=row_atual, end_column=2)
-    ws.cell(row=row_atual, column=1, value='TARDE').font = FONT_BOLD
-    ws.cell(row=row_atual, column=1).alignment = ALIGN_CENTER
-    ws.cell(row=row_atual, column=1).fill = FILL_BRANCO
-    for i, d in enumerate(dias):
-        col = 3 + i
-        cell = ws.cell(row=row_atual, column=col)
-        cell.font = FONT_BOLD
-        cell.alignment = ALIGN_CENTER
-        cell.border = THIN_BORDER
-        if d in slots_vagos['T']:
-            cell.value = 1
-            cell.fill = FILL_LARANJA
-        else:
-            cell.value = 0
-            cell.fill = FILL_BRANCO
-    row_atual += 1
-
-    # NOITE
-    ws.merge_cells(start_row=row_atual, start_column=1, end_row=row_atual, end_column=2)
-    ws.cell(row=row_atual, column=1, value='NOITE').font = FONT_BOLD
-    ws.cell(row=row_atual, column=1).alignment = ALIGN_CENTER
-    ws.cell(row=row_atual, column=1).fill = FILL_BRANCO
-    for i, d in enumerate(dias):
-        col = 3 + i
-        cell = ws.cell(row=row_atual, column=col)
-        cell.font = FONT_BOLD
-        cell.alignment = ALIGN_CENTER
-        cell.border = THIN_BORDER
-        if d in slots_vagos['N']:
-            cell.value = 1
-            cell.fill = FILL_LARANJA
-        else:
-            cell.value = 0
-            cell.fill = FILL_BRANCO
-    row_atual += 1
-
-    # ---- LEGENDA ----
-    row_atual += 1
-    ws.cell(row=row_atual, column=1, value='LEGENDA DE CORES:').font = FONT_BOLD
-    row_atual += 1
-    ws.cell(row=row_atual, column=1, value='Laranja = Slots vagos para RPA').font = FONT_NORMAL
-    ws.cell(row=row_atual, column=2).fill = FILL_LARANJA
-    row_atual += 1
-    ws.cell(row=row_atual, column=1, value='Verde = Final de semana').font = FONT_NORMAL
-    ws.cell(row=row_atual, column=2).fill = FILL_VERDE_CLARO
-    row_atual += 1
-    ws.cell(row=row_atual, column=1, value='Rosa = Licença maternidade').font = FONT_NORMAL
-    ws.cell(row=row_atual, column=2).fill = FILL_ROSA
-    row_atual += 1
-    ws.cell(row=row_atual, column=1, value='Amarelo = Atestado').font = FONT_NORMAL
-    ws.cell(row=row_atual, column=2).fill = FILL_AMARELO
-
-    # ---- BLOCO "DATAS PARA PREENCHER" (canto superior direito) ----
-    # Posicionado 2 colunas após o total, alinhado ao topo da tabela
-    col_rpa_bloco = col_total_idx + 2       # coluna inicial do bloco
-    dias_semana_full = ['Segunda', 'Terça', 'Quarta', 'Quinta',
-                        'Sexta', 'Sábado', 'Domingo']
-
-    # Consolidar datas com pelo menos 1 turno vago
-    todas_datas_rpa = sorted(
-        set(slots_vagos['M']) | set(slots_vagos['T']) | set(slots_vagos['N'])
-    )
-
-    # Larguras das colunas do bloco
-    ws.column_dimensions[get_column_letter(col_rpa_bloco)].width     = 11   # data
-    ws.column_dimensions[get_column_letter(col_rpa_bloco + 1)].width = 10   # dia semana
-    ws.column_dimensions[get_column_letter(col_rpa_bloco + 2)].width = 24   # turnos vagos
-
-    FILL_LARANJA_TITULO = PatternFill('solid', fgColor='FFE65100')           # laranja escuro
-    FILL_LARANJA_LINHA  = PatternFill('solid', fgColor='FFFFF3E0')           # laranja muito claro
-    FILL_FDS_RPA        = PatternFill('solid', fgColor='FFFFE0B2')           # laranja/amarelo FDS
-    FONT_RPA_TITULO     = Font(bold=True,  size=9, color='FFFFFFFF')
-    FONT_RPA_CAB        = Font(bold=True,  size=8, color='FF7F3000')
-    FONT_RPA_DATA       = Font(bold=False, size=8, color='FF212121')
-    FONT_RPA_TURNO      = Font(bold=True,  size=8, color='FFE65100')
-    THIN_BORDER_RPA = Border(
-        left=Side(style='thin', color='FFFFCC80'),
-        right=Side(style='thin', color='FFFFCC80'),
-        top=Side(style='thin', color='FFFFCC80'),
-        bottom=Side(style='thin', color='FFFFCC80'),
-    )
-
-    # Linha 10 — título do bloco (mesclado nas 3 colunas)
-    ws.merge_cells(start_row=10, start_column=col_rpa_bloco,
-                   end_row=10,   end_column=col_rpa_bloco + 2)
-    c_titulo = ws.cell(row=10, column=col_rpa_bloco,
-                       value='DATAS PARA PREENCHER (RPA)')
-    c_titulo.font      = FONT_RPA_TITULO
-    c_titulo.fill      = FILL_LARANJA_TITULO
-    c_titulo.alignment = ALIGN_CENTER
-    c_titulo.border    = THIN_BORDER_RPA
-
-    # Linha 11 — sub-cabeçalho de colunas
-    for col_off, label in enumerate(['Data', 'Dia', 'Turnos vagos']):
-        c = ws.cell(row=11, column=col_rpa_bloco + col_off, value=label)
-        c.font      = FONT_RPA_CAB
-        c.fill      = PatternFill('solid', fgColor='FFFFCC80')
-        c.alignment = ALIGN_CENTER
-        c.border    = THIN_BORDER_RPA
-
-    # Linha 12 — vazia (alinha com a linha de números de dias)
-    for col_off in range(3):
-        c = ws.cell(row=12, column=col_rpa_bloco + col_off)
-        c.fill   = PatternFill('solid', fgColor='FFFFCC80')
-        c.border = THIN_BORDER_RPA
-
-    # Linhas de dados — uma por data descoberta, a partir da linha 13
-    for idx, d in enumerate(todas_datas_rpa):
-        row_d = 13 + idx
-        fds   = d.weekday() >= 5
-        fill_linha = FILL_FDS_RPA if fds else FILL_LARANJA_LINHA
-
-        # Coluna 1: data (dd/mm)
-        c_data = ws.cell(row=row_d, column=col_rpa_bloco,
-                         value=d.strftime('%d/%m/%Y'))
-        c_data.font      = FONT_RPA_DATA
-        c_data.fill      = fill_linha
-        c_data.alignment = ALIGN_CENTER
-        c_data.border    = THIN_BORDER_RPA
-
-        # Coluna 2: dia da semana
-        c_dia = ws.cell(row=row_d, column=col_rpa_bloco + 1,
-                        value=dias_semana_full[d.weekday()])
-        c_dia.font      = FONT_RPA_DATA
-        c_dia.fill      = fill_linha
-        c_dia.alignment = ALIGN_CENTER
-        c_dia.border    = THIN_BORDER_RPA
-
-        # Coluna 3: turnos vagos
-        vagos = []
-        if d in slots_vagos['M']: vagos.append('M')
-        if d in slots_vagos['T']: vagos.append('T')
-        if d in slots_vagos['N']: vagos.append('N')
-        c_turno = ws.cell(row=row_d, column=col_rpa_bloco + 2,
-                          value='  ·  '.join(vagos))
-        c_turno.font      = FONT_RPA_TURNO
-        c_turno.fill      = fill_linha
-        c_turno.alignment = ALIGN_CENTER
-        c_turno.border    = THIN_BORDER_RPA
-
-    # Rodapé do bloco: total de datas
-    row_rod = 13 + len(todas_datas_rpa)
-    ws.merge_cells(start_row=row_rod, start_column=col_rpa_bloco,
-                   end_row=row_rod,   end_column=col_rpa_bloco + 2)
-    total_slots = (len(slots_vagos['M']) + len(slots_vagos['T']) + len(slots_vagos['N']))
-    c_rod = ws.cell(row=row_rod, column=col_rpa_bloco,
-                    value=f"{len(todas_datas_rpa)} datas  |  {total_slots} slots vagos")
-    c_rod.font      = FONT_RPA_CAB
-    c_rod.fill      = PatternFill('solid', fgColor='FFFFCC80')
-    c_rod.alignment = ALIGN_CENTER
-    c_rod.border    = THIN_BORDER_RPA
-
-    wb.save(caminho_saida)
-    return caminho_saida
-
-
-# ============================================================
-# CORES ANSI (terminal)
-# ============================================================
-ANSI_RESET   = '\033[0m'
-ANSI_BOLD    = '\033[1m'
-ANSI_GREEN   = '\033[92m'   # Verde brilhante → meta atingida
-ANSI_YELLOW  = '\033[93m'   # Amarelo → incompleto / atestado
-ANSI_RED     = '\033[91m'   # Vermelho → falta crítica
-ANSI_CYAN    = '\033[96m'   # Ciano → cabeçalho / seção
-ANSI_GRAY    = '\033[90m'   # Cinza → licença / info
-ANSI_ORANGE  = '\033[33m'   # Laranja → slot vago RPA
-ANSI_WHITE   = '\033[97m'   # Branco brilhante
-
-
-def _cor(texto, codigo):
-    return f"{codigo}{texto}{ANSI_RESET}"
-
-
-# ============================================================
-# EXIBIÇÃO: CONTADOR DE PLANTÕES
-# ============================================================
-def exibir_contador_plantoes(dados):
-    """
-    Exibe tabela de contagem de plantões no terminal.
-    Linhas ficam VERDES ao atingir a meta individual.
-    """
-    escalas = dados['escalas']
-    periodo = nome_periodo(dados['ano'], dados['mes'])
-    config_por_nome = {c['nome']: c for c in MEDICOS_CONFIG}
-
-    ordem = [
-        'Gustavo Garcia Gonçalves',
-        'Mariana Zanatta Bechara',
-        'Maurício Rosa de Almeida Junior',
-        'Sergio Monteiro Faim',
-        'Melissa Maria R Nascimento',
-        'Bruna Silva Freitas',
-        'Laura Jorge Diniz Povoa',
-        'Valquiria Alves Souza',
-    ]
-
-    larg_nome  = 36
-    larg_real  = 10
-    larg_meta  = 6
-    larg_bar   = 20
-    linha_sep  = '─' * (larg_nome + larg_real + larg_meta + larg_bar + 12)
-
-    print()
-    print(_cor('═' * (larg_nome + larg_real + larg_meta + larg_bar + 12), ANSI_CYAN))
-    print(_cor(f"  CONTADOR DE PLANTÕES  —  {periodo}", ANSI_BOLD + ANSI_CYAN))
-    print(_cor('═' * (larg_nome + larg_real + larg_meta + larg_bar + 12), ANSI_CYAN))
-
-    cabecalho = (
-        f"  {'Médico':<{larg_nome}}"
-        f"{'Realizado':>{larg_real}}"
-        f"{'Meta':>{larg_meta}}"
-        f"  {'Progresso':<{larg_bar}}"
-        f"  Status"
-    )
-    print(_cor(cabecalho, ANSI_BOLD + ANSI_WHITE))
-    print(_cor(linha_sep, ANSI_GRAY))
-
-    for nome in ordem:
-        esc     = escalas.get(nome, {})
-        total   = contar_plantoes(esc)
-        cfg     = config_por_nome.get(nome, {})
-        meta    = cfg.get('meta')
-        regra   = cfg.get('regra', '')
-
-        # ── Determinar status e cor ──
-        if regra == 'licenca':
-            status_txt = '─  Licença/Maternidade'
-            cor_linha  = ANSI_GRAY
-            barra_txt  = ''
-            meta_txt   = '─'
-            real_txt   = f"{total:>5.1f}"
-
-        elif not dados['mariana_ativa'] and nome == 'Mariana Zanatta Bechara':
-            status_txt = '⚠  Atestado (desativada)'
-            cor_linha  = ANSI_YELLOW
-            barra_txt  = ''
-            meta_txt   = str(int(meta)) if meta == int(meta) else str(meta)
-            real_txt   = f"{total:>5.1f}"
-
-        elif regra == 'bruna':
-            status_txt = '─  Plantão fixo matutino'
-            cor_linha  = ANSI_GRAY
-            barra_txt  = ''
-            meta_txt   = '─'
-            real_txt   = f"{total:>5.1f}"
-
-        elif meta is None:
-            status_txt = '─'
-            cor_linha  = ANSI_GRAY
-            barra_txt  = ''
-            meta_txt   = '─'
-            real_txt   = f"{total:>5.1f}"
-
-        else:
-            meta_num  = float(meta)
-            pct       = min(total / meta_num, 1.0) if meta_num > 0 else 1.0
-            barras    = int(pct * larg_bar)
-            barra_txt = '█' * barras + '░' * (larg_bar - barras)
-            meta_txt  = str(int(meta)) if meta == int(meta) else str(meta)
-            real_txt  = f"{total:>5.1f}"
-
-            if total >= meta_num:
-                status_txt = '✅ META ATINGIDA'
-                cor_linha  = ANSI_GREEN
-            elif total >= meta_num * 0.75:
-                status_txt = f'⚠  Faltam {round(meta_num - total, 1)}'
-                cor_linha  = ANSI_YELLOW
-            else:
-                status_txt = f'✗  Faltam {round(meta_num - total, 1)}'
-                cor_linha  = ANSI_RED
-
-        linha = (
-            f"  {nome:<{larg_nome}}"
-            f"{real_txt:>{larg_real}}"
-            f"{meta_txt:>{larg_meta}}"
-            f"  {barra_txt:<{larg_bar}}"
-            f"  {status_txt}"
-        )
-        print(_cor(linha, cor_linha))
-
-    print(_cor(linha_sep, ANSI_GRAY))
-
-
-# ============================================================
-# EXIBIÇÃO: RELATÓRIO DE DATAS DESCOBERTAS (RPA)
-# ============================================================
-def exibir_relatorio_rpa(dados):
-    """
-    Exibe relatório de datas com slots vagos, por turno,
-    indicando o dia da semana — para oferta de RPA.
-    """
-    slots_vagos = dados['slots_vagos']
-    periodo     = nome_periodo(dados['ano'], dados['mes'])
-
-    # Consolidar todas as datas com pelo menos 1 vago
-    todas_datas = sorted(
-        set(slots_vagos['M']) | set(slots_vagos['T']) | set(slots_vagos['N'])
-    )
-
-    print()
-    print(_cor('═' * 62, ANSI_ORANGE))
-    print(_cor(f"  RELATÓRIO DE DATAS DESCOBERTAS  —  {periodo}", ANSI_BOLD + ANSI_ORANGE))
-    print(_cor('  Turnos para oferta de RPA', ANSI_ORANGE))
-    print(_cor('═' * 62, ANSI_ORANGE))
-
-    if not todas_datas:
-        print(_cor('  ✅  Todos os turnos estão cobertos!', ANSI_GREEN))
-        print()
-        return
-
-    # Cabeçalho da tabela
-    cab = f"  {'Data':<12}{'Dia da Semana':<16}{'M':^6}{'T':^6}{'N':^6}  Turnos vagos"
-    print(_cor(cab, ANSI_BOLD + ANSI_WHITE))
-    print(_cor('  ' + '─' * 58, ANSI_GRAY))
-
-    total_m = total_t = total_n = 0
-
-    for d in todas_datas:
-        data_str    = d.strftime('%d/%m/%Y')
-        dia_semana  = ['Segunda', 'Terça', 'Quarta', 'Quinta',
-                       'Sexta', 'Sábado', 'Domingo'][d.weekday()]
-        vago_m = d in slots_vagos['M']
-        vago_t = d in slots_vagos['T']
-        vago_n = d in slots_vagos['N']
-
-        if vago_m: total_m += 1
-        if vago_t: total_t += 1
-        if vago_n: total_n += 1
-
-        turno_m = _cor(' ○ ', ANSI_ORANGE) if vago_m else _cor(' ● ', ANSI_GREEN)
-        turno_t = _cor(' ○ ', ANSI_ORANGE) if vago_t else _cor(' ● ', ANSI_GREEN)
-        turno_n = _cor(' ○ ', ANSI_ORANGE) if vago_n else _cor(' ● ', ANSI_GREEN)
-
-        vagos_desc = []
-        if vago_m: vagos_desc.append('Manhã')
-        if vago_t: vagos_desc.append('Tarde')
-        if vago_n: vagos_desc.append('Noite')
-        desc_str = ', '.join(vagos_desc)
-
-        # Cor da linha: FDS em amarelo, dias úteis em branco
-        cor_data = ANSI_YELLOW if d.weekday() >= 5 else ANSI_WHITE
-
-        linha_base = f"  {data_str:<12}{dia_semana:<16}"
-        print(_cor(linha_base, cor_data), end='')
-        print(turno_m + turno_t + turno_n, end='')
-        print(_cor(f"  {desc_str}", ANSI_ORANGE))
-
-    print(_cor('  ' + '─' * 58, ANSI_GRAY))
-
-    # Totais por turno
-    tot_linha = (
-        f"  {'TOTAL VAGOS':<28}"
-        f"{total_m:^6}"
-        f"{total_t:^6}"
-        f"{total_n:^6}"
-        f"  ({total_m + total_t + total_n} slots)"
-    )
-    print(_cor(tot_linha, ANSI_BOLD + ANSI_ORANGE))
-
-    # Legenda
-    print()
-    print(_cor('  Legenda:', ANSI_GRAY))
-    print(_cor('  ○ = Turno vago (oferecer RPA)', ANSI_ORANGE))
-    print(_cor('  ● = Turno coberto', ANSI_GREEN))
-    print(_cor('  M = Manhã  |  T = Tarde  |  N = Noite', ANSI_GRAY))
-    print(_cor('  Linhas em amarelo = Finais de semana', ANSI_YELLOW))
-    print()
-
-    # ── Bloco copiável ───────────────────────────────────────
-    dias_semana_full = ['Segunda', 'Terça', 'Quarta', 'Quinta',
-                        'Sexta', 'Sábado', 'Domingo']
-    sep = '─' * 48
-    print(sep)
-    print(f"  DATAS PARA PREENCHER — {periodo}")
-    print(sep)
-    for d in todas_datas:
-        vagos = []
-        if d in slots_vagos['M']: vagos.append('Manhã')
-        if d in slots_vagos['T']: vagos.append('Tarde')
-        if d in slots_vagos['N']: vagos.append('Noite')
-        dia_str  = dias_semana_full[d.weekday()]
-        data_str = d.strftime('%d/%m/%Y')
-        turnos_str = ' · '.join(vagos)
-        print(f"  {data_str}  ({dia_str})  —  {turnos_str}")
-    print(sep)
-    print()
-
-
-# ============================================================
-# EXIBIÇÃO: SEQUÊNCIA CRONOLÓGICA DE PLANTÕES (copiável)
-# ============================================================
-def exibir_sequencia_plantoes(dados):
-    """
-    Exibe, em texto puro sem cores ANSI, a sequência cronológica
-    de todos os plantões de cada médico — formatada para copiar e colar.
-    """
-    escalas        = dados['escalas']
-    periodo        = nome_periodo(dados['ano'], dados['mes'])
-    config_por_nome = {c['nome']: c for c in MEDICOS_CONFIG}
-
-    ORDEM = [
-        'Gustavo Garcia Gonçalves',
-        'Mariana Zanatta Bechara',
-        'Maurício Rosa de Almeida Junior',
-        'Sergio Monteiro Faim',
-        'Melissa Maria R Nascimento',
-        'Bruna Silva Freitas',
-        'Laura Jorge Diniz Povoa',
-        'Valquiria Alves Souza',
-    ]
-
-    separador = '=' * 62
-    linha_med  = '-' * 62
-
-    print()
-    print(separador)
-    print(f"  SEQUÊNCIA DE PLANTÕES — {periodo}")
-    print(f"  (texto copiável — ordenado cronologicamente por médico)")
-    print(separador)
-
-    for nome in ORDEM:
-        esc    = escalas.get(nome, {})
-        cfg    = config_por_nome.get(nome, {})
-        meta   = cfg.get('meta')
-        regra  = cfg.get('regra', '')
-        total  = contar_plantoes(esc)
-        mat    = cfg.get('matricula', '')
-
-        print()
-        # Cabeçalho do médico
-        if meta is not None and meta > 0:
-            meta_fmt  = int(meta) if meta == int(meta) else meta
-            total_fmt = int(total) if total == int(total) else total
-            print(f"  {nome}  [{mat}]  —  {total_fmt}/{meta_fmt} plantões")
-        elif regra == 'bruna':
-            total_fmt = int(total) if total == int(total) else total
-            print(f"  {nome}  [{mat}]  —  {total_fmt} plantões (matutino fixo)")
-        elif regra == 'licenca':
-            print(f"  {nome}  [{mat}]  —  Licença / Maternidade")
-        else:
-            print(f"  {nome}  [{mat}]")
-
-        print(f"  {linha_med}")
-
-        if not esc:
-            if not dados['mariana_ativa'] and nome == 'Mariana Zanatta Bechara':
-                print(f"  (sem plantões — atestado)")
-            elif regra == 'licenca':
-                print(f"  (sem plantões — licença maternidade)")
-            else:
-                print(f"  (sem plantões alocados)")
-            continue
-
-        # Turnos ordenados por data
-        turnos = sorted(esc.items())
-        for d, turno in turnos:
-            dia_semana = DIAS_SEMANA_PT[d.weekday()]
-            data_str   = d.strftime('%d/%m/%Y')
-            # Calcular carga horária descritiva
-            carga = {
-                'N': '19h–07h (12h noite)',
-                'D': '07h–19h (12h dia)',
-                'M': '07h–13h (6h manhã)',
-                'T': '13h–19h (6h tarde)',
-                'D/N': '07h–07h (24h)',
-                'T/N': '13h–07h (18h)',
-                'V':   '07h–07h (24h)',
-            }.get(turno, turno)
-            print(f"  {data_str}  {dia_semana:<5}  {turno:<5}  {carga}")
-
-    print()
-    print(separador)
-    print()
-
-
-# ============================================================
-# MAIN
-# ============================================================
-def main():
-    if len(sys.argv) < 3:
-        print("Uso: python3 gerador_escala.py <ano> <mes> [mariana_ativa=1]")
-        print("Exemplo: python3 gerador_escala.py 2026 2")
-        print("         (gera escala Fev/Março 2026, 16/Fev → 15/Mar)")
-        sys.exit(1)
-
-    ano = int(sys.argv[1])
-    mes = int(sys.argv[2])
-    # Padrão: Mariana DESATIVADA (atestado). Passe '1' para ativar.
-    mariana_ativa = False
-    if len(sys.argv) > 3:
-        mariana_ativa = sys.argv[3] == '1'
-
-    print(f"\nGerando escala — {nome_periodo(ano, mes)}")
-    print(f"  Período : 16/{mes:02d}/{ano} → 15/{(mes % 12) + 1:02d}/{ano if mes < 12 else ano + 1}")
-    print(f"  Mariana : {'Ativa' if mariana_ativa else 'Atestado (desativada)'}")
-
-    dados = gerar_escala(ano, mes, mariana_ativa=mariana_ativa)
-
-    # ── 1. Contador de plantões ──────────────────────────────
-    exibir_contador_plantoes(dados)
-
-    # ── 2. Relatório de datas descobertas (RPA) ──────────────
-    exibir_relatorio_rpa(dados)
-
-    # ── 3. Sequência cronológica copiável ────────────────────
-    exibir_sequencia_plantoes(dados)
-
-    # ── 4. Alertas técnicos (se houver) ─────────────────────
-    if dados['alertas']:
-        print(_cor('⚠  ALERTAS:', ANSI_BOLD + ANSI_RED))
-        for a in dados['alertas']:
-            print(_cor(f"   • {a}", ANSI_RED))
-        print()
-
-    # ── 4. Gerar Excel ───────────────────────────────────────
-    if mes == 12:
-        nome_arquivo = f"ESCALA UAI {MESES_ABREV[mes]}_{MESES_PT[1]} {ano + 1}.xlsx"
-    else:
-        nome_arquivo = f"ESCALA UAI {MESES_ABREV[mes]}_{MESES_PT[mes + 1]} {ano}.xlsx"
-
-    caminho = f"/sessions/fervent-awesome-bardeen/mnt/Documents/{nome_arquivo}"
-    gerar_excel(dados, caminho)
-    print(_cor(f"  Arquivo Excel: {nome_arquivo}", ANSI_BOLD + ANSI_GREEN))
-    print()
-    return caminho
-
-
-if __name__ == '__main__':
-    main()
+#!/usr/bin/env python3
+"""
+Gerador Automático de Escala Médica - UAI Luizote (Psiquiatria)
+Período: Dia 16 do mês atual → Dia 15 do mês seguinte
+
+Uso: python3 gerador_escala.py <ano> <mes>
+Exemplo: python3 gerador_escala.py 2026 2   → gera escala Fev/Março 2026
+Perfil: python3 gerador_escala.py 2026 2 --profile   (--profile-mem inclui memória)
+Histórico: python3 gerador_escala.py 2026 2 --historico historico.db   (rodízio entre meses)
+Otimizar: python3 gerador_escala.py 2026 2 --otimizar 200   (busca local por 200 ms)
+Férias: python3 gerador_escala.py 2026 2 --ausencia "Melissa,23/02/2026,01/03/2026,F"   (F, A ou SD)
+RPA: python3 gerador_escala.py 2026 2 --rpa   (distribui os turnos vagos entre os RPAs)
+Exportar: python3 gerador_escala.py 2026 2 --format csv > escala.csv   (csv, jsonl ou ics)
+Diff: python3 gerador_escala.py diff "ESCALA UAI Fev_Março 2026.xlsx"   (planilha editada × gerada)
+Ausência: python3 gerador_escala.py replanejar "ESCALA UAI Fev_Março 2026.xlsx" Mariana 20/02/2026 28/02/2026
+Cenários: python3 gerador_escala.py cenarios 2026-02 --eixo mariana_ativa=0,1 --eixo Valquiria.meta=14.5,12
+Análise: python3 gerador_escala.py analise 2026-01 2027-12   (vacância e carga por médico, numpy/pandas)
+
+Lote: python3 gerador_escala.py batch <AAAA-MM> <AAAA-MM> --saida <pasta>
+Exemplo: python3 gerador_escala.py batch 2024-01 2030-12 --mariana 0,1 --saida escalas/
+"""
+
+from bisect import bisect_left, bisect_right
+from collections.abc import MutableMapping, Sequence
+from datetime import date, timedelta
+from functools import lru_cache, partial
+import io
+import os
+import sys
+import copy
+import heapq
+import unicodedata
+
+import escala_perfil
+from escala_perfil import span, linhas_arvore
+
+# ============================================================
+# CONSTANTES
+# ============================================================
+DIAS_SEMANA_PT = ['Seg', 'Ter', 'Qua', 'Qui', 'Sex', 'Sab', 'Dom']
+MESES_PT = ['', 'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
+            'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro']
+MESES_ABREV = ['', 'Jan', 'Fev', 'Março', 'Abril', 'Maio', 'Jun',
+               'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
+
+# ============================================================
+# REGISTRO DE TURNOS
+# ============================================================
+# Cada código é definido uma única vez: blocos cobertos (bitmask M/T/N),
+# duração em horas, peso em MEIOS plantões (12h = 2 meios) e horário.
+BLOCO_M = 1   # 07h-13h
+BLOCO_T = 2   # 13h-19h
+BLOCO_N = 4   # 19h-07h
+
+TURNOS = {
+    'M':   {'blocos': BLOCO_M, 'horas': 6, 'meios': 1, 'inicio': '07:00', 'fim': '13:00',
+            'carga': '07h–13h (6h manhã)'},
+    'T':   {'blocos': BLOCO_T, 'horas': 6, 'meios': 1, 'inicio': '13:00', 'fim': '19:00',
+            'carga': '13h–19h (6h tarde)'},
+    'N':   {'blocos': BLOCO_N, 'horas': 12, 'meios': 2, 'inicio': '19:00', 'fim': '07:00',
+            'carga': '19h–07h (12h noite)'},
+    'D':   {'blocos': BLOCO_M | BLOCO_T, 'horas': 12, 'meios': 2, 'inicio': '07:00', 'fim': '19:00',
+            'carga': '07h–19h (12h dia)'},
+    'D/N': {'blocos': BLOCO_M | BLOCO_T | BLOCO_N, 'horas': 24, 'meios': 4,
+            'inicio': '07:00', 'fim': '07:00', 'carga': '07h–07h (24h)'},
+    'T/N': {'blocos': BLOCO_T | BLOCO_N, 'horas': 18, 'meios': 3, 'inicio': '13:00', 'fim': '07:00',
+            'carga': '13h–07h (18h)'},
+    'V':   {'blocos': BLOCO_M | BLOCO_T | BLOCO_N, 'horas': 24, 'meios': 4,
+            'inicio': '07:00', 'fim': '07:00', 'carga': '07h–07h (24h)'},
+    # Ausências: não cobrem blocos nem contam plantão
+    'F':   {'blocos': 0, 'horas': 0, 'meios': 0, 'inicio': None, 'fim': None, 'carga': 'Férias'},
+    'A':   {'blocos': 0, 'horas': 0, 'meios': 0, 'inicio': None, 'fim': None,
+            'carga': 'Atestado/Congresso'},
+    'SD':  {'blocos': 0, 'horas': 0, 'meios': 0, 'inicio': None, 'fim': None,
+            'carga': 'Folga Sindicato'},
+}
+
+# Tabelas indexadas pelo código inteiro usado na grade (0 = sem turno)
+CODIGOS_TURNO = [''] + list(TURNOS)
+COD_TURNO = {t: i for i, t in enumerate(CODIGOS_TURNO) if t}
+BLOCOS_POR_COD = [0] + [t['blocos'] for t in TURNOS.values()]
+MEIOS_POR_COD = [0] + [t['meios'] for t in TURNOS.values()]
+
+# Cores
+COR_VERDE_ESCURO = 'FF3FAF46'
+COR_VERDE_CLARO = 'FFA9D18E'
+COR_BRANCO = 'FFFFFFFF'
+COR_CINZA = 'FFB2B2B2'
+COR_ROSA_LICENCA = 'FFE134FB'
+COR_AMARELO_ATESTADO = 'FFFFFF00'
+COR_AZUL_FERIAS = 'FF9BC2E6'
+COR_LILAS_SINDICATO = 'FFCDB4DB'
+COR_LARANJA_VAZIO = 'FFFFA07A'  # Salmon/laranja claro para slots não preenchidos
+
+# Fontes, preenchimentos, bordas e o registro de estilos do Excel vivem em
+# escala_excel, importado só quando uma planilha é gerada. Os nomes antigos
+# (FONT_BOLD, FILL_ROSA, ...) continuam acessíveis por este módulo.
+_NOMES_EXCEL = frozenset({
+    'FONT_BOLD', 'FONT_NORMAL', 'FONT_SHIFT', 'FONT_TITLE', 'FONT_HEADER',
+    'ALIGN_CENTER', 'ALIGN_LEFT',
+    'FILL_VERDE_ESCURO', 'FILL_VERDE_CLARO', 'FILL_BRANCO', 'FILL_CINZA',
+    'FILL_ROSA', 'FILL_AMARELO', 'FILL_LARANJA', 'FILL_AZUL', 'FILL_LILAS',
+    'THIN_BORDER', 'THIN_BORDER_RPA',
+    'FILL_LARANJA_TITULO', 'FILL_LARANJA_LINHA', 'FILL_FDS_RPA', 'FILL_RPA_CABECALHO',
+    'FONT_RPA_TITULO', 'FONT_RPA_CAB', 'FONT_RPA_DATA', 'FONT_RPA_TURNO', 'FONT_ALERTA',
+    'ESTILOS_EXCEL', 'PlanoPlanilha', 'montar_plano_excel',
+})
+
+
+def __getattr__(nome):
+    if nome in _NOMES_EXCEL:
+        import escala_excel
+        return getattr(escala_excel, nome)
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+
+
+# ============================================================
+# CONFIGURAÇÃO DOS MÉDICOS
+# ============================================================
+MEDICOS_CONFIG = [
+    {
+        'nome': 'Gustavo Garcia Gonçalves',
+        'matricula': '9300414',
+        'meta': 8,
+        'regra': 'gustavo',
+    },
+    {
+        'nome': 'Mariana Zanatta Bechara',
+        'matricula': '9300762',
+        'meta': 8,
+        'regra': 'mariana',
+    },
+    {
+        'nome': 'Maurício Rosa de Almeida Junior',
+        'matricula': '9300788',
+        'meta': 4,
+        'regra': 'mauricio',
+    },
+    {
+        'nome': 'Sergio Monteiro Faim',
+        'matricula': '9300962',
+        'meta': 4,
+        'regra': 'faim',
+        'apelido': 'Faim',
+    },
+    {
+        'nome': 'Melissa Maria R Nascimento',
+        'matricula': '9300794',
+        'meta': 8,
+        'regra': 'melissa',
+    },
+    {
+        'nome': 'Bruna Silva Freitas',
+        'matricula': '9301856',
+        'meta': None,
+        'regra': 'bruna',
+    },
+    {
+        'nome': 'Laura Jorge Diniz Povoa',
+        'matricula': '9100505',
+        'meta': 0,
+        'regra': 'licenca',
+    },
+    {
+        'nome': 'Valquiria Alves Souza',
+        'matricula': '8403489',
+        'meta': 14.5,
+        'regra': 'valquiria',
+    },
+]
+
+RPA_NOMES = [
+    {'nome': 'Marina Anovazzi Silva', 'matricula': 'RPA'},
+    {'nome': 'Lucas Valadares Motta', 'matricula': 'RPA'},
+    {'nome': 'Eduardo', 'matricula': 'RPA'},
+    {'nome': 'Mayara Gois', 'matricula': 'RPA'},
+    {'nome': 'Patricia', 'matricula': 'RPA'},
+]
+
+# ============================================================
+# UNIDADE / ESPECIALIDADE
+# ============================================================
+# Uma configuração por (unidade, especialidade) da rede. Cada médico aponta
+# para uma das regras de distribuição abaixo; só 'licenca' pode se repetir.
+# 'apelido' (opcional) é o nome usado nos alertas — padrão: primeiro nome.
+# 'ausencias' (opcional): [{'inicio': 'AAAA-MM-DD', 'fim': 'AAAA-MM-DD',
+# 'codigo': 'F' | 'A' | 'SD'}, ...] — ver Ausencias.
+# 'regras' (opcional, na unidade): {nome: definição} de regras declarativas
+# (ver escala_regras); médicos com essas regras vêm depois dos demais.
+REGRAS_MEDICO = ('gustavo', 'mariana', 'mauricio', 'faim', 'melissa', 'bruna', 'licenca', 'valquiria')
+# Ordem das linhas na planilha (independe da ordem em que as regras rodam)
+ORDEM_LINHAS = ('bruna', 'gustavo', 'mariana', 'mauricio', 'faim', 'licenca', 'melissa', 'valquiria')
+
+UNIDADE_PADRAO = {
+    'unidade': 'UAI LUIZOTE',
+    'especialidade': 'PSIQUIATRIA',
+    'medicos': MEDICOS_CONFIG,
+    'rpa': RPA_NOMES,
+}
+
+
+def validar_config(config):
+    """Confere chaves e regras de uma configuração de unidade; retorna a própria."""
+    faltando = [k for k in ('unidade', 'especialidade', 'medicos', 'rpa') if k not in config]
+    if faltando:
+        raise ValueError(f"configuração de unidade sem {', '.join(faltando)}")
+    declarativas = config.get('regras') or {}
+    for nome in declarativas:
+        if nome in REGRAS_MEDICO or nome in REGRAS_ESCALA:
+            raise ValueError(f"{config['unidade']}/{config['especialidade']}: "
+                             f"regra declarativa {nome!r} tem o nome de uma regra embutida")
+    vistas = set()
+    for med in config['medicos']:
+        regra = med.get('regra')
+        if regra not in REGRAS_MEDICO and regra not in declarativas:
+            raise ValueError(f"{config['unidade']}/{config['especialidade']}: "
+                             f"regra desconhecida {regra!r} para {med.get('nome')!r}")
+        if regra in vistas and regra != 'licenca':
+            raise ValueError(f"{config['unidade']}/{config['especialidade']}: "
+                             f"regra {regra!r} atribuída a mais de um médico")
+        vistas.add(regra)
+    try:
+        Ausencias.de_config(config)
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError(f"{config['unidade']}/{config['especialidade']}: ausências inválidas ({e})") from None
+    if declarativas:
+        try:
+            plano_de_config(config)
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"{config['unidade']}/{config['especialidade']}: {e}") from None
+    return config
+
+
+def medicos_por_regra(config):
+    """regra → config do médico (licenças ficam de fora: são várias)."""
+    return {m['regra']: m for m in config['medicos'] if m['regra'] != 'licenca'}
+
+
+def apelido_medico(cfg):
+    return cfg.get('apelido') or cfg['nome'].split()[0]
+
+
+def _chave_nome(texto):
+    sem_acento = unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode()
+    return sem_acento.strip().casefold()
+
+
+def medico_por_nome(config, texto):
+    """Config do médico pelo nome completo ou apelido (sem diferenciar maiúsculas nem acentos)."""
+    alvo = _chave_nome(texto)
+    for cfg in config['medicos']:
+        if alvo in (_chave_nome(cfg['nome']), _chave_nome(apelido_medico(cfg))):
+            return cfg
+    raise ValueError(f"médico não encontrado na escala: {texto!r}")
+
+
+def config_de_dados(dados):
+    """Configuração de unidade usada para gerar `dados` (antigos: a padrão)."""
+    return dados.get('config') or UNIDADE_PADRAO
+
+
+# ============================================================
+# FUNÇÕES AUXILIARES
+# ============================================================
+class PeriodCalendar(Sequence):
+    """
+    Índice de calendário de um período, montado uma vez por (ano, mes).
+    Comporta-se como a lista de datas (iteração, len, [i]) e acrescenta
+    posição/pertinência O(1), datas por dia da semana, dias da semana
+    ordinais ("4º sábado") e primeiro/último dia da semana de cada mês.
+    """
+
+    __slots__ = ('dias', 'meses', 'uteis', 'fins_de_semana',
+                 '_indice', '_por_weekday', '_primeiro', '_ultimo')
+
+    def __init__(self, dias):
+        self.dias = tuple(dias)
+        self._indice = {d: i for i, d in enumerate(self.dias)}
+        buckets = [[] for _ in range(7)]
+        for d in self.dias:
+            buckets[d.weekday()].append(d)
+        self._por_weekday = tuple(tuple(b) for b in buckets)
+        self.meses = tuple(sorted({(d.year, d.month) for d in self.dias}))
+        self.uteis = tuple(d for d in self.dias if d.weekday() < 5)
+        self.fins_de_semana = tuple(d for d in self.dias if d.weekday() >= 5)
+        self._primeiro = {}
+        self._ultimo = {}
+        for (a, m) in self.meses:
+            for wd in range(7):
+                self._primeiro[(a, m, wd)] = primeiro_dia_semana_no_mes(a, m, wd)
+                self._ultimo[(a, m, wd)] = ultimo_dia_semana_no_mes(a, m, wd)
+
+    def __getitem__(self, i):
+        return self.dias[i]
+
+    def __len__(self):
+        return len(self.dias)
+
+    def __iter__(self):
+        return iter(self.dias)
+
+    def __contains__(self, d):
+        return d in self._indice
+
+    def __repr__(self):
+        if not self.dias:
+            return 'PeriodCalendar([])'
+        return f'PeriodCalendar({self.dias[0]} → {self.dias[-1]})'
+
+    def index(self, d, *args):
+        """Posição da data no período (O(1)); ValueError se fora dele."""
+        try:
+            return self._indice[d]
+        except KeyError:
+            raise ValueError(f'{d} não está no período') from None
+
+    def indice(self, d):
+        """Posição da data no período, ou None se fora dele."""
+        return self._indice.get(d)
+
+    def por_weekday(self, weekday):
+        """Datas do período com o dia da semana dado (0=Seg ... 6=Dom)."""
+        return self._por_weekday[weekday]
+
+    def ordinal(self, weekday, n):
+        """n-ésimo <weekday> do período (1 = primeiro, -1 = último) ou None."""
+        datas = self._por_weekday[weekday]
+        k = n - 1 if n > 0 else n
+        if -len(datas) <= k < len(datas):
+            return datas[k]
+        return None
+
+    def primeiro_do_mes(self, ano, mes, weekday):
+        """Primeiro <weekday> do mês calendário (mesmo fora do período)."""
+        d = self._primeiro.get((ano, mes, weekday))
+        return d if d is not None else primeiro_dia_semana_no_mes(ano, mes, weekday)
+
+    def ultimo_do_mes(self, ano, mes, weekday):
+        """Último <weekday> do mês calendário (mesmo fora do período)."""
+        d = self._ultimo.get((ano, mes, weekday))
+        return d if d is not None else ultimo_dia_semana_no_mes(ano, mes, weekday)
+
+    def ultimos_no_periodo(self, weekday):
+        """Últimos <weekday> de cada mês calendário que caem dentro do período."""
+        return {d for d in (self._ultimo[(a, m, weekday)] for (a, m) in self.meses)
+                if d in self._indice}
+
+    def primeiro_do_mes_novo(self, weekday):
+        """Primeiro <weekday> do segundo mês do período, se cair dentro dele."""
+        if len(self.meses) > 1:
+            (a2, m2) = self.meses[1]
+            d = self._primeiro[(a2, m2, weekday)]
+            if d in self._indice:
+                return d
+        return None
+
+
+def como_calendario(dias):
+    """Aceita um PeriodCalendar ou uma lista de datas (legado)."""
+    return dias if isinstance(dias, PeriodCalendar) else PeriodCalendar(dias)
+
+
+@lru_cache(maxsize=256)
+def get_periodo(ano, mes):
+    """Retorna o PeriodCalendar (sequência de datas) do período 16/mes até 15/mes+1."""
+    inicio = date(ano, mes, 16)
+    if mes == 12:
+        fim = date(ano + 1, 1, 15)
+    else:
+        fim = date(ano, mes + 1, 15)
+    return PeriodCalendar(inicio + timedelta(days=k) for k in range((fim - inicio).days + 1))
+
+
+def ultimo_dia_semana_no_mes(ano, mes, weekday):
+    """Retorna a data do último dia com dado weekday (0=Seg) no mês/ano."""
+    ultimo_dia = date(ano + mes // 12, mes % 12 + 1, 1) - timedelta(days=1)
+    return ultimo_dia - timedelta(days=(ultimo_dia.weekday() - weekday) % 7)
+
+
+def primeiro_dia_semana_no_mes(ano, mes, weekday):
+    """Retorna a data do primeiro dia com dado weekday no mês/ano."""
+    d = date(ano, mes, 1)
+    return d + timedelta(days=(weekday - d.weekday()) % 7)
+
+
+def filtrar_por_weekday(dias, weekday):
+    """Filtra lista de datas por dia da semana (0=Seg, 1=Ter, ... 6=Dom)."""
+    if isinstance(dias, PeriodCalendar):
+        return list(dias.por_weekday(weekday))
+    return [d for d in dias if d.weekday() == weekday]
+
+
+def meses_no_periodo(dias):
+    """Retorna lista ordenada de tuplas (ano, mes) presentes no período."""
+    if isinstance(dias, PeriodCalendar):
+        return list(dias.meses)
+    return sorted(set((d.year, d.month) for d in dias))
+
+
+def contar_meios_plantoes(escala_medico):
+    """Soma o peso dos turnos em meios plantões (inteiro; ver TURNOS)."""
+    if isinstance(escala_medico, LinhaEscala):
+        return sum(MEIOS_POR_COD[cod] for cod in escala_medico.grade.codigos(escala_medico.nome))
+    total = 0
+    for turno in escala_medico.values():
+        if turno in TURNOS:
+            total += TURNOS[turno]['meios']
+    return total
+
+
+def plantoes_de_meios(meios):
+    """Converte meios plantões em plantões de 12h (int quando exato, ex.: 29 → 14.5)."""
+    return meios // 2 if meios % 2 == 0 else meios / 2
+
+
+def contar_plantoes(escala_medico):
+    """Conta plantões em 12h. D=1, N=1, M=0.5, T=0.5, D/N=2, T/N=1.5, V=2."""
+    return plantoes_de_meios(contar_meios_plantoes(escala_medico))
+
+
+def contar_plantoes_unidade(escala_medico):
+    """Conta quantos 'slots de plantão' (cada 12h = 1 plantão)."""
+    return contar_plantoes(escala_medico)
+
+
+def nome_arquivo_excel(ano, mes):
+    """Nome padrão do arquivo, ex: 'ESCALA UAI Fev_Março 2026.xlsx'."""
+    if mes == 12:
+        return f"ESCALA UAI {MESES_ABREV[mes]}_{MESES_PT[1]} {ano + 1}.xlsx"
+    return f"ESCALA UAI {MESES_ABREV[mes]}_{MESES_PT[mes + 1]} {ano}.xlsx"
+
+
+def nome_periodo(ano, mes):
+    """Gera string do período, ex: 'Fev/Março 2026'."""
+    if mes == 12:
+        return f'{MESES_ABREV[mes]}/{MESES_PT[1]} {ano + 1}'
+    return f'{MESES_ABREV[mes]}/{MESES_PT[mes + 1]} {ano}'
+
+
+# ============================================================
+# AUSÊNCIAS (férias, atestado, folga sindicato)
+# ============================================================
+# Códigos de TURNOS que marcam ausência: não cobrem bloco nem contam plantão
+CODIGOS_AUSENCIA = tuple(t for t, info in TURNOS.items() if not info['blocos'])
+
+
+def _data(valor):
+    """date ou 'AAAA-MM-DD' (configurações em JSON) → date."""
+    return valor if isinstance(valor, date) else date.fromisoformat(valor)
+
+
+class Ausencias:
+    """
+    Índice de intervalos de ausência por médico. Para cada nome, listas
+    paralelas de inícios, fins e códigos (F, A, SD), ordenadas e sem
+    sobreposição: "o médico está disponível no dia d?" é uma busca binária,
+    O(log n) no número de ausências dele.
+    """
+
+    __slots__ = ('_por_medico',)
+
+    def __init__(self, intervalos=()):
+        self._por_medico = {}
+        for nome, inicio, fim, codigo in intervalos:
+            self.adicionar(nome, inicio, fim, codigo)
+
+    @classmethod
+    def de_config(cls, config):
+        """Índice com as 'ausencias' declaradas em config['medicos'] e config['rpa']."""
+        ausencias = cls()
+        for med in (*config['medicos'], *config['rpa']):
+            for a in med.get('ausencias', ()):
+                ausencias.adicionar(med['nome'], a['inicio'], a['fim'], a.get('codigo', 'F'))
+        return ausencias
+
+    @classmethod
+    def de_escalas(cls, dias, escalas):
+        """Índice lido das células de ausência de uma escala (dias seguidos com o mesmo código)."""
+        ausencias = cls()
+        for nome, escala in escalas.items():
+            aberto = None
+            for d in dias:
+                cod = escala.get(d)
+                cod = cod if cod in CODIGOS_AUSENCIA else None
+                if aberto and (cod != aberto[2] or d - aberto[1] != timedelta(days=1)):
+                    ausencias.adicionar(nome, *aberto)
+                    aberto = None
+                if cod:
+                    aberto = (aberto[0], d, cod) if aberto else (d, d, cod)
+            if aberto:
+                ausencias.adicionar(nome, *aberto)
+        return ausencias
+
+    def adicionar(self, nome, inicio, fim, codigo='F'):
+        """Registra a ausência de `inicio` a `fim` (inclusive); ValueError se sobrepõe outra."""
+        inicio, fim = _data(inicio), _data(fim)
+        if codigo not in CODIGOS_AUSENCIA:
+            raise ValueError(f"código de ausência desconhecido: {codigo!r} "
+                             f"(use {', '.join(CODIGOS_AUSENCIA)})")
+        if fim < inicio:
+            raise ValueError(f"{nome}: ausência termina ({fim}) antes de começar ({inicio})")
+        inicios, fins, codigos = self._por_medico.setdefault(nome, ([], [], []))
+        k = bisect_left(inicios, inicio)
+        if (k > 0 and fins[k - 1] >= inicio) or (k < len(inicios) and inicios[k] <= fim):
+            raise ValueError(f"{nome}: ausência {inicio} → {fim} sobrepõe outra")
+        inicios.insert(k, inicio)
+        fins.insert(k, fim)
+        codigos.insert(k, codigo)
+        return self
+
+    def codigo(self, nome, d):
+        """Código da ausência do médico no dia, ou None se ele está disponível."""
+        listas = self._por_medico.get(nome)
+        if listas is None:
+            return None
+        inicios, fins, codigos = listas
+        k = bisect_right(inicios, d) - 1
+        return codigos[k] if k >= 0 and d <= fins[k] else None
+
+    def disponivel(self, nome, d):
+        return self.codigo(nome, d) is None
+
+    def filtro(self, nome):
+        """Predicado d → disponível para as regras, ou None se o médico não tem ausências."""
+        return partial(self.disponivel, nome) if nome in self._por_medico else None
+
+    def intervalos(self, nome):
+        """[(início, fim, código), ...] do médico, em ordem."""
+        listas = self._por_medico.get(nome)
+        return list(zip(*listas)) if listas else []
+
+    def no_periodo(self, nome, cal):
+        """{dia: código} das ausências do médico dentro do período."""
+        if nome not in self._por_medico:
+            return {}
+        return {d: cod for d in cal if (cod := self.codigo(nome, d))}
+
+    def __iter__(self):
+        for nome, listas in self._por_medico.items():
+            for inicio, fim, codigo in zip(*listas):
+                yield nome, inicio, fim, codigo
+
+    def __bool__(self):
+        return bool(self._por_medico)
+
+    def __repr__(self):
+        return f'Ausencias({sum(len(l[0]) for l in self._por_medico.values())} intervalos)'
+
+
+# ============================================================
+# MODELO: GRADE DE OCUPAÇÃO (pessoa × dia)
+# ============================================================
+class Cobertura:
+    """
+    Livro-razão da cobertura do período: para cada dia e bloco (M/T/N),
+    quantas pessoas o cobrem e quais (bitmask de índices de pessoa).
+    É atualizado a cada turno gravado na grade, de modo que slots vagos,
+    conflitos e simulações ("e se") são consultas O(1) por dia.
+    """
+
+    __slots__ = ('_contagem', '_quem', '_mascara')
+
+    def __init__(self, num_dias):
+        self._contagem = bytearray(3 * num_dias)
+        self._quem = [0] * (3 * num_dias)
+        self._mascara = bytearray(num_dias)
+
+    def adicionar(self, i, p, blocos):
+        """Pessoa p passa a cobrir `blocos` no dia i."""
+        for b in range(3):
+            if blocos >> b & 1:
+                k = 3 * i + b
+                self._contagem[k] += 1
+                self._quem[k] |= 1 << p
+                self._mascara[i] |= 1 << b
+
+    def remover(self, i, p, blocos):
+        """Pessoa p deixa de cobrir `blocos` no dia i."""
+        for b in range(3):
+            if blocos >> b & 1:
+                k = 3 * i + b
+                self._contagem[k] -= 1
+                self._quem[k] &= ~(1 << p)
+                if not self._contagem[k]:
+                    self._mascara[i] &= ~(1 << b)
+
+    def mascara(self, i):
+        """Blocos cobertos no dia i (BLOCO_M | BLOCO_T | BLOCO_N)."""
+        return self._mascara[i]
+
+    def contagem(self, i, bloco):
+        """Quantas pessoas cobrem o bloco (BLOCO_M, BLOCO_T ou BLOCO_N) no dia i."""
+        return self._contagem[3 * i + bloco.bit_length() - 1]
+
+    def quem(self, i, bloco):
+        """Bitmask dos índices de pessoa que cobrem o bloco no dia i."""
+        return self._quem[3 * i + bloco.bit_length() - 1]
+
+    def delta(self, i, antigos, novos):
+        """
+        Efeito de trocar, para uma pessoa, os blocos `antigos` por `novos` no
+        dia i: (Δ blocos vagos, Δ blocos com mais de uma pessoa).
+        """
+        d_vagos = d_conflitos = 0
+        for b in range(3):
+            sai = antigos >> b & 1
+            entra = novos >> b & 1
+            if sai == entra:
+                continue
+            c = self._contagem[3 * i + b]
+            depois = c - sai + entra
+            d_vagos += (depois == 0) - (c == 0)
+            d_conflitos += max(depois - 1, 0) - max(c - 1, 0)
+        return d_vagos, d_conflitos
+
+
+class GradeEscala:
+    """
+    Matriz compacta do período: uma linha por pessoa, uma coluna por dia,
+    cada célula com o código inteiro do turno (CODIGOS_TURNO). A cobertura
+    M/T/N de cada dia fica no livro-razão `cobertura`, atualizado a cada
+    turno gravado.
+    """
+
+    __slots__ = ('dias', 'nomes', 'cobertura', '_idx_nome', '_idx_dia', '_turnos')
+
+    def __init__(self, dias, nomes=()):
+        self.dias = dias
+        self.nomes = []
+        self._idx_nome = {}
+        if isinstance(dias, PeriodCalendar):
+            self._idx_dia = dias._indice  # índice já montado pelo calendário
+        else:
+            self._idx_dia = {d: i for i, d in enumerate(dias)}
+        self._turnos = bytearray()
+        self.cobertura = Cobertura(len(dias))
+        for nome in nomes:
+            self.indice(nome)
+
+    @classmethod
+    def de_escalas(cls, dias, escalas):
+        """Monta a grade a partir do dict legado {nome: {data: turno}}."""
+        grade = cls(dias)
+        for nome, esc in escalas.items():
+            grade.aplicar(nome, esc)
+        return grade
+
+    def indice(self, nome):
+        """Índice da linha da pessoa (cria a linha se ainda não existir)."""
+        p = self._idx_nome.get(nome)
+        if p is None:
+            p = len(self.nomes)
+            self.nomes.append(nome)
+            self._idx_nome[nome] = p
+            self._turnos.extend(bytes(len(self.dias)))
+        return p
+
+    def aplicar(self, nome, escala):
+        """Grava a escala {data: turno} de uma pessoa e retorna a linha dela."""
+        self.indice(nome)
+        for d, turno in escala.items():
+            self.definir(nome, d, turno)
+        return LinhaEscala(self, nome)
+
+    def definir(self, nome, d, turno):
+        """Grava (ou apaga, com turno vazio/None) o turno de uma pessoa num dia."""
+        i = self._idx_dia[d]
+        p = self.indice(nome)
+        pos = p * len(self.dias) + i
+        cod = self._cod(turno)
+        antigo = self._turnos[pos]
+        if antigo == cod:
+            return
+        self._turnos[pos] = cod
+        self.cobertura.remover(i, p, BLOCOS_POR_COD[antigo])
+        self.cobertura.adicionar(i, p, BLOCOS_POR_COD[cod])
+
+    @staticmethod
+    def _cod(turno):
+        if not turno:
+            return 0
+        if turno not in COD_TURNO:
+            raise ValueError(f"turno desconhecido: {turno!r}")
+        return COD_TURNO[turno]
+
+    def simular(self, nome, d, turno):
+        """
+        "E se" a pessoa fizer `turno` no dia d (vazio = liberar o dia)?
+        Retorna (Δ blocos vagos, Δ blocos com mais de uma pessoa) sem
+        alterar a grade.
+        """
+        i = self._idx_dia[d]
+        antigo = self.codigo(nome, d)
+        return self.cobertura.delta(i, BLOCOS_POR_COD[antigo], BLOCOS_POR_COD[self._cod(turno)])
+
+    def codigo(self, nome, d):
+        """Código inteiro do turno (0 = sem turno)."""
+        p = self._idx_nome.get(nome)
+        i = self._idx_dia.get(d)
+        if p is None or i is None:
+            return 0
+        return self._turnos[p * len(self.dias) + i]
+
+    def codigos(self, nome):
+        """Linha da pessoa como bytes (um código por dia, na ordem de `dias`)."""
+        p = self._idx_nome.get(nome)
+        n = len(self.dias)
+        if p is None:
+            return bytes(n)
+        return bytes(self._turnos[p * n:(p + 1) * n])
+
+    def matriz(self):
+        """Grade inteira como bytes: len(nomes) linhas de len(dias) códigos, na ordem de `nomes`."""
+        return bytes(self._turnos)
+
+    def blocos(self, d):
+        """Máscara de blocos (BLOCO_M | BLOCO_T | BLOCO_N) cobertos no dia."""
+        i = self._idx_dia.get(d)
+        return 0 if i is None else self.cobertura.mascara(i)
+
+    def cobre(self, nome, d, bloco):
+        """A pessoa cobre o bloco (BLOCO_M, BLOCO_T ou BLOCO_N) no dia?"""
+        p = self._idx_nome.get(nome)
+        i = self._idx_dia.get(d)
+        if p is None or i is None:
+            return False
+        return bool(self.cobertura.quem(i, bloco) >> p & 1)
+
+    def quem_cobre(self, d, bloco):
+        """Nomes de quem cobre o bloco no dia, na ordem das linhas."""
+        quem = self.cobertura.quem(self._idx_dia[d], bloco)
+        return [nome for p, nome in enumerate(self.nomes) if quem >> p & 1]
+
+    def linha(self, nome):
+        """Visão dict-like {data: turno} da linha da pessoa (lê e grava na grade)."""
+        return LinhaEscala(self, nome)
+
+    def escalas(self):
+        """Adaptador para o formato legado {nome: {data: turno}}."""
+        return {nome: LinhaEscala(self, nome) for nome in self.nomes}
+
+    def vagos(self):
+        """slots_vagos no formato legado, lido direto do livro-razão de cobertura."""
+        slots_vagos = {'M': {}, 'T': {}, 'N': {}}
+        for d, mascara in zip(self.dias, self.cobertura._mascara):
+            if not mascara & BLOCO_M:
+                slots_vagos['M'][d] = True
+            if not mascara & BLOCO_T:
+                slots_vagos['T'][d] = True
+            if not mascara & BLOCO_N:
+                slots_vagos['N'][d] = True
+        return slots_vagos
+
+
+class LinhaEscala(MutableMapping):
+    """Escala de uma pessoa vista como {data: turno}, gravando direto na grade."""
+
+    __slots__ = ('grade', 'nome')
+
+    def __init__(self, grade, nome):
+        self.grade = grade
+        self.nome = nome
+
+    def __getitem__(self, d):
+        cod = self.grade.codigo(self.nome, d)
+        if not cod:
+            raise KeyError(d)
+        return CODIGOS_TURNO[cod]
+
+    def get(self, d, padrao=None):
+        cod = self.grade.codigo(self.nome, d)
+        return CODIGOS_TURNO[cod] if cod else padrao
+
+    def __contains__(self, d):
+        return bool(self.grade.codigo(self.nome, d))
+
+    def __setitem__(self, d, turno):
+        self.grade.definir(self.nome, d, turno)
+
+    def __delitem__(self, d):
+        if d not in self:
+            raise KeyError(d)
+        self.grade.definir(self.nome, d, None)
+
+    def __iter__(self):
+        for d, cod in zip(self.grade.dias, self.grade.codigos(self.nome)):
+            if cod:
+                yield d
+
+    def __len__(self):
+        return sum(1 for cod in self.grade.codigos(self.nome) if cod)
+
+    def __repr__(self):
+        return f"LinhaEscala({self.nome!r}, {dict(self.items())!r})"
+
+
+def grade_de_dados(dados):
+    """
+    Grade do dict `dados`. Reaproveita dados['grade'] quando todas as escalas
+    ainda são linhas dela; senão remonta a partir de dados['escalas'].
+    """
+    grade = dados.get('grade')
+    escalas = dados['escalas']
+    if grade is not None and all(
+            isinstance(esc, LinhaEscala) and esc.grade is grade for esc in escalas.values()):
+        return grade
+    return GradeEscala.de_escalas(dados['dias'], escalas)
+
+
+# ============================================================
+# REGRAS DE DISTRIBUIÇÃO
+# ============================================================
+# Todas as regras recebem o PeriodCalendar do período (get_periodo);
+# listas de datas continuam aceitas e são convertidas na entrada.
+# disponivel (opcional): predicado d → bool do médico (Ausencias.filtro);
+# dias indisponíveis são pulados e, onde a regra tem alternativas, o
+# plantão vai para a próxima data candidata.
+# meta (opcional): teto em plantões; None = a meta embutida da regra.
+
+# Rodízio do sábado D/N de Gustavo quando há histórico (ver sabado_dn_rodizio):
+# começa pelo 4º, preferido, e alterna entre os finais de semana pares e ímpares.
+RODIZIO_SABADO_DN = (4, 2, 3, 1)
+
+
+def sabado_dn_rodizio(cal, dn_anteriores):
+    """
+    Ordinal do sábado D/N de Gustavo no período, dado quantos D/N ele já fez
+    (contador do histórico). Pula o 1º sábado do mês novo (Maurício/Faim).
+    """
+    cal = como_calendario(cal)
+    casado = cal.primeiro_do_mes_novo(5)
+    livres = [k for k in RODIZIO_SABADO_DN
+              if cal.ordinal(5, k) is not None and cal.ordinal(5, k) != casado]
+    return livres[dn_anteriores % len(livres)] if livres else RODIZIO_SABADO_DN[0]
+
+
+def _sempre_disponivel(d):
+    return True
+
+
+def regra_gustavo(cal, sabado_dn=4, disponivel=None, meta=None):
+    """
+    Gustavo: 8 plantões
+    - Toda segunda à noite (N)
+    - Prefere sábados 24h (D/N) no 4º final de semana
+    - Tentar 2º e 4º final de semana: domingos D para completar
+    Com sabado_dn (rodízio pelo histórico) o D/N vai para o n-ésimo sábado e
+    os domingos preferidos passam a ser os do mesmo par (1º/3º ou 2º/4º).
+    """
+    cal = como_calendario(cal)
+    livre = disponivel or _sempre_disponivel
+    escala = {}
+    meta = 8 if meta is None else meta
+    plantoes = 0
+
+    # 1. Segundas à noite (N)
+    for d in cal.por_weekday(0):  # 0 = Segunda
+        if plantoes < meta and livre(d):
+            escala[d] = 'N'
+            plantoes += 1
+
+    domingos = [d for d in cal.por_weekday(6) if livre(d)]
+
+    # 2. Sábado D/N: 4º, ou o do rodízio (24h = 2 plantões de 12h)
+    sab_dn = cal.ordinal(5, sabado_dn)
+    if sab_dn is not None and livre(sab_dn) and plantoes + 2 <= meta:
+        escala[sab_dn] = 'D/N'
+        plantoes += 2
+
+    # 3. Completar com domingos D do mesmo par de FDS (2º e 4º por padrão)
+    par = (1, 3) if sabado_dn % 2 else (2, 4)
+    dom_pref = [d for d in (cal.ordinal(6, k) for k in par) if d is not None and livre(d)]
+
+    for d in dom_pref:
+        if plantoes >= meta:
+            break
+        if d not in escala:
+            escala[d] = 'D'
+            plantoes += 1
+
+    # 4. Se ainda faltar, completar com outros domingos D
+    for d in domingos:
+        if plantoes >= meta:
+            break
+        if d not in escala:
+            escala[d] = 'D'
+            plantoes += 1
+
+    return escala, plantoes
+
+
+def regra_mariana(cal, ativa=True, disponivel=None, meta=None):
+    """
+    Mariana: 8 plantões
+    - Toda quinta à noite (N)
+    - Todo domingo à noite (N) até completar 8
+    - Começar contagem do primeiro domingo
+    """
+    escala = {}
+    if not ativa:
+        return escala, 0
+
+    cal = como_calendario(cal)
+    livre = disponivel or _sempre_disponivel
+    meta = 8 if meta is None else meta
+    plantoes = 0
+
+    # Quintas à noite
+    for d in cal.por_weekday(3):  # 3 = Quinta
+        if plantoes < meta and livre(d):
+            escala[d] = 'N'
+            plantoes += 1
+
+    # Domingos à noite para completar
+    for d in cal.por_weekday(6):  # 6 = Domingo
+        if plantoes >= meta:
+            break
+        if d not in escala and livre(d):
+            escala[d] = 'N'
+            plantoes += 1
+
+    return escala, plantoes
+
+
+def regra_mauricio(cal, disponivel=None, meta=None):
+    """
+    Maurício: 4 plantões
+    - Todas as sextas do período (N), EXCETO a última sexta de cada mês calendário
+    - Primeiro sábado do mês novo no período (D = 12h dia)
+    - Quando tem 5 sextas, fica 2 sextas sem plantão
+    """
+    cal = como_calendario(cal)
+    livre = disponivel or _sempre_disponivel
+    escala = {}
+    meta = 4 if meta is None else meta
+    plantoes = 0
+
+    # Identificar sextas proibidas (última sexta de cada mês)
+    sextas_proibidas = cal.ultimos_no_periodo(4)  # 4 = Sexta
+
+    # Verificar se há 5 sextas (precisa pular 2)
+    sextas_periodo = cal.por_weekday(4)
+    sextas_validas = [s for s in sextas_periodo if s not in sextas_proibidas and livre(s)]
+
+    # Se 5 sextas no total e já tiramos as últimas de cada mês,
+    # verificar se ainda temos mais de 3 sextas válidas
+    # (precisamos de no máximo 3 sextas N + 1 sábado D = 4)
+    if len(sextas_validas) > 3:
+        # Manter apenas as 3 primeiras sextas válidas
+        sextas_validas = sextas_validas[:3]
+
+    # Atribuir N nas sextas válidas
+    for sex in sextas_validas:
+        if plantoes < meta:
+            escala[sex] = 'N'
+            plantoes += 1
+
+    # Primeiro sábado do segundo mês (mês novo) → D (12h dia)
+    primeiro_sab = cal.primeiro_do_mes_novo(5)  # 5 = Sábado
+    if primeiro_sab is not None and livre(primeiro_sab) and plantoes < meta:
+        escala[primeiro_sab] = 'D'
+        plantoes += 1
+
+    return escala, plantoes
+
+
+def regra_faim(cal, escala_mauricio, disponivel=None, meta=None):
+    """
+    Faim: 4 plantões
+    - 3 quartas à noite (N), nunca a última quarta de cada mês calendário
+    - 1 sábado noite (N) - primeiro sábado do mês novo (casado com Maurício)
+    """
+    cal = como_calendario(cal)
+    livre = disponivel or _sempre_disponivel
+    escala = {}
+    meta = 4 if meta is None else meta
+    plantoes = 0
+
+    # Quartas proibidas (última quarta de cada mês)
+    quartas_proibidas = cal.ultimos_no_periodo(2)  # 2 = Quarta
+
+    # 3 quartas (excluindo proibidas)
+    quartas_validas = [q for q in cal.por_weekday(2) if q not in quartas_proibidas and livre(q)]
+    for qua in quartas_validas[:3]:
+        if plantoes >= meta:
+            break
+        escala[qua] = 'N'
+        plantoes += 1
+
+    # Primeiro sábado do mês novo → N (noite, casado com Maurício que faz D)
+    primeiro_sab = cal.primeiro_do_mes_novo(5)
+    if primeiro_sab is not None and livre(primeiro_sab) and plantoes < meta:
+        escala[primeiro_sab] = 'N'
+        plantoes += 1
+
+    return escala, plantoes
+
+
+def turno_noite_ocupado(d, *escalas):
+    """Verifica se alguma escala já tem turno noturno naquele dia."""
+    for esc in escalas:
+        if isinstance(esc, LinhaEscala):
+            if esc.grade.cobre(esc.nome, d, BLOCO_N):
+                return True
+        elif BLOCOS_POR_COD[COD_TURNO.get(esc.get(d), 0)] & BLOCO_N:
+            return True
+    return False
+
+
+def regra_melissa(cal, escala_mauricio, escala_faim, escala_mariana, escala_gustavo, escala_valquiria=None,
+                  disponivel=None, meta=None):
+    """
+    Melissa: 8 plantões, evitar finais de semana
+    - Terças à noite (N)
+    - Quartas que Faim não cobre (N)
+    - Sextas que Maurício não cobre (N)
+    - Completar com domingos à noite (N) onde turno noturno estiver vago
+    - Quintas como último recurso
+    """
+    cal = como_calendario(cal)
+    escala = {}
+    meta = 8 if meta is None else meta
+    plantoes = 0
+
+    candidatos = []
+
+    # 1) Terças à noite (prioridade alta)
+    for d in cal.por_weekday(1):  # 1 = Terça
+        candidatos.append((0, d))
+
+    # 2) Quartas NÃO cobertas por Faim (prioridade alta)
+    for d in cal.por_weekday(2):  # 2 = Quarta
+        if d not in escala_faim:
+            candidatos.append((0, d))
+
+    # 3) Sextas NÃO cobertas por Maurício (prioridade alta)
+    for d in cal.por_weekday(4):  # 4 = Sexta
+        if d not in escala_mauricio:
+            candidatos.append((0, d))
+
+    # 4) Domingos à noite: OK se ninguém tem turno NOTURNO naquele dia
+    #    (Gustavo pode ter D = dia, que não conflita com N = noite)
+    for d in cal.por_weekday(6):  # 6 = Domingo
+        if not turno_noite_ocupado(d, escala_mariana, escala_gustavo):
+            candidatos.append((1, d))
+
+    # 5) Quintas sem turno noturno ocupado (penúltimo recurso)
+    for d in cal.por_weekday(3):  # 3 = Quinta
+        if not turno_noite_ocupado(d, escala_mariana):
+            candidatos.append((2, d))
+
+    # 6) Sábados à noite como último recurso (regra diz "evitar" FDS, não proibir)
+    esc_val = escala_valquiria or {}
+    for d in cal.por_weekday(5):  # 5 = Sábado
+        if not turno_noite_ocupado(d, escala_mauricio, escala_faim, escala_gustavo, esc_val):
+            candidatos.append((3, d))
+
+    # Ordenar por prioridade e depois por data
+    candidatos.sort(key=lambda x: (x[0], x[1]))
+    livre = disponivel or _sempre_disponivel
+    for (prio, d) in candidatos:
+        if plantoes >= meta:
+            break
+        if d not in escala and livre(d):
+            escala[d] = 'N'
+            plantoes += 1
+
+    return escala, plantoes
+
+
+def regra_bruna(cal, disponivel=None):
+    """
+    Bruna: M (manhã 07h-13h) em todos os dias úteis (Seg-Sex).
+    Sábados de plantão especial quando necessário.
+    """
+    cal = como_calendario(cal)
+    livre = disponivel or _sempre_disponivel
+    escala = {d: 'M' for d in cal.uteis if livre(d)}  # Seg a Sex
+    return escala, len(escala)
+
+
+def regra_valquiria(cal, escala_mariana, escala_gustavo=None, escala_mauricio=None, escala_faim=None,
+                    disponivel=None, meta=None):
+    """
+    Valquiria: EXATAMENTE ≤ 14,5 plantões (não exceder).
+    Ordem de preenchimento conforme prioridade:
+      1. TARDES (T): todos os dias úteis Seg-Sex (0,5 plantão cada)
+      2. NOTURNOS: upgrade T → T/N nas quintas sem cobertura noturna (+1,0 plantão)
+      3. FINS DE SEMANA: D/N, D ou T até completar 14,5 sem duplicata
+    """
+    cal = como_calendario(cal)
+    livre = disponivel or _sempre_disponivel
+    META_MEIOS = 29 if meta is None else round(meta * 2)  # 14,5 plantões, em meios (TURNOS)
+    escala = {}
+    esc_gus = escala_gustavo or {}
+    esc_mau = escala_mauricio or {}
+    esc_fai = escala_faim or {}
+    total = 0
+
+    # ── 1. TARDES: T em todos os dias úteis (Seg a Sex), respeitando o teto ──
+    for d in cal.uteis:
+        if total + TURNOS['T']['meios'] > META_MEIOS:
+            break
+        if not livre(d):
+            continue
+        escala[d] = 'T'
+        total += TURNOS['T']['meios']
+
+    # ── 2. NOTURNOS: upgrade T → T/N nas quintas onde noite está disponível ──
+    #   Incremento por quinta = T/N − T (N = 12 h = 1 plantão além do T já contado)
+    incremento_tn = TURNOS['T/N']['meios'] - TURNOS['T']['meios']
+    for d in cal.por_weekday(3):
+        if d not in escala:
+            continue  # Quinta não foi alocada no passo 1 (teto já atingido)
+        if turno_noite_ocupado(d, escala_mariana):
+            continue  # Mariana (ou outro) já cobre a noite → mantém só T
+        if total + incremento_tn > META_MEIOS:
+            break  # Adicionar noite ultrapassaria 14,5 → para
+        escala[d] = 'T/N'
+        total += incremento_tn  # Apenas o incremento noturno (T→T/N)
+
+    # ── 3. FINS DE SEMANA: preencher o restante até 14,5 sem conflito ──
+    for d in cal.fins_de_semana:
+        if total >= META_MEIOS:
+            break
+        if d in escala or not livre(d):
+            continue  # Já alocado ou ausente
+        if turno_noite_ocupado(d, esc_gus, esc_mau, esc_fai):
+            continue  # Outro médico tem turno noturno nesse dia → pular
+        restante = META_MEIOS - total
+        # Blocos de Gustavo no dia: o domingo D dele muda de fim de semana
+        # com o rodízio do histórico (sabado_dn_rodizio)
+        ocupados = TURNOS[esc_gus[d]]['blocos'] if d in esc_gus else 0
+        # Maior turno que ainda cabe no teto e não sobrepõe esses blocos
+        for turno in ('D/N', 'D', 'T'):
+            if TURNOS[turno]['meios'] <= restante and not TURNOS[turno]['blocos'] & ocupados:
+                escala[d] = turno
+                total += TURNOS[turno]['meios']
+                break
+
+    return escala, plantoes_de_meios(total)
+
+
+# ============================================================
+# ESCALONADOR DE REGRAS (DAG)
+# ============================================================
+# Cada regra declara as regras cujas escalas lê (entradas); o PlanoRegras
+# monta o grafo, recusa entradas desconhecidas e ciclos, e roda as regras em
+# ordem topológica. Regras de um mesmo nível não dependem umas das outras.
+
+class RegraEscala:
+    """
+    Regra registrada no escalonador.
+    funcao(ctx, entradas) → (escala, plantões), com entradas = {regra lida: escala}.
+    medico: True se a escala vai para a linha do médico com essa regra; False
+        para resultados intermediários, usados só por outras regras.
+    alerta: avisa quando faltam plantões para a meta (bool ou ctx → bool).
+    ausencias: regras cujas ausências a função consulta sem ler a escala —
+        uma ausência nelas também refaz esta regra (PlanoRegras.abaixo).
+    """
+
+    __slots__ = ('nome', 'entradas', 'funcao', 'medico', 'alerta', 'ausencias')
+
+    def __init__(self, nome, entradas, funcao, medico=True, alerta=False, ausencias=()):
+        self.nome = nome
+        self.entradas = tuple(entradas)
+        self.funcao = funcao
+        self.medico = medico
+        self.alerta = alerta
+        self.ausencias = tuple(ausencias)
+
+    def deve_alertar(self, ctx):
+        return self.alerta(ctx) if callable(self.alerta) else self.alerta
+
+    def __repr__(self):
+        return f"RegraEscala({self.nome!r}, entradas={self.entradas!r})"
+
+
+class ContextoRegras:
+    """Dados comuns às regras de um período: calendário, parâmetros e ausências."""
+
+    __slots__ = ('cal', 'mariana_ativa', 'sabado_dn', 'ausencias', 'por_regra')
+
+    def __init__(self, cal, mariana_ativa=False, sabado_dn=RODIZIO_SABADO_DN[0], ausencias=None,
+                 por_regra=None):
+        self.cal = cal
+        self.mariana_ativa = mariana_ativa
+        self.sabado_dn = sabado_dn
+        self.ausencias = ausencias or Ausencias()
+        self.por_regra = por_regra or {}
+
+    def tem(self, regra):
+        return regra in self.por_regra
+
+    def meta(self, regra):
+        """Meta do médico da regra na configuração (None = a embutida na regra)."""
+        med = self.por_regra.get(regra)
+        return med.get('meta') if med is not None else None
+
+    def disponivel(self, regra):
+        """Predicado de disponibilidade do médico da regra (None = sempre disponível)."""
+        med = self.por_regra.get(regra)
+        return self.ausencias.filtro(med['nome']) if med is not None else None
+
+
+REGRAS_ESCALA = {}
+
+
+def registrar_regra(nome, entradas=(), funcao=None, **opcoes):
+    """Registra (ou substitui) uma regra em REGRAS_ESCALA; ver RegraEscala."""
+    REGRAS_ESCALA[nome] = RegraEscala(nome, entradas, funcao, **opcoes)
+    return REGRAS_ESCALA[nome]
+
+
+def _quintas_valquiria(ctx, e):
+    """Quintas N de Valquiria onde Mariana não cobre — para Melissa saber quais noites estão livres."""
+    if not ctx.tem('valquiria'):
+        return {}, 0
+    livre = ctx.disponivel('valquiria') or _sempre_disponivel
+    return {d: 'T/N' for d in ctx.cal.por_weekday(3) if d not in e['mariana'] and livre(d)}, 0
+
+
+# Ordem de registro = desempate da ordem topológica (a mesma da versão sequencial)
+registrar_regra('bruna', (), lambda ctx, e: regra_bruna(ctx.cal, disponivel=ctx.disponivel('bruna')))
+registrar_regra('gustavo', (),
+                lambda ctx, e: regra_gustavo(ctx.cal, sabado_dn=ctx.sabado_dn,
+                                             disponivel=ctx.disponivel('gustavo'),
+                                             meta=ctx.meta('gustavo')),
+                alerta=True)
+registrar_regra('mariana', (),
+                lambda ctx, e: regra_mariana(ctx.cal, ativa=ctx.mariana_ativa,
+                                             disponivel=ctx.disponivel('mariana'),
+                                             meta=ctx.meta('mariana')),
+                alerta=lambda ctx: ctx.mariana_ativa)
+registrar_regra('mauricio', (),
+                lambda ctx, e: regra_mauricio(ctx.cal, disponivel=ctx.disponivel('mauricio'),
+                                              meta=ctx.meta('mauricio')),
+                alerta=True)
+registrar_regra('faim', ('mauricio',),
+                lambda ctx, e: regra_faim(ctx.cal, e['mauricio'], disponivel=ctx.disponivel('faim'),
+                                          meta=ctx.meta('faim')),
+                alerta=True)
+registrar_regra('valquiria_quintas', ('mariana',), _quintas_valquiria,
+                medico=False, ausencias=('valquiria',))
+registrar_regra('melissa', ('mauricio', 'faim', 'mariana', 'gustavo', 'valquiria_quintas'),
+                lambda ctx, e: regra_melissa(ctx.cal, e['mauricio'], e['faim'], e['mariana'],
+                                             e['gustavo'], e['valquiria_quintas'],
+                                             disponivel=ctx.disponivel('melissa'),
+                                             meta=ctx.meta('melissa')),
+                alerta=True)
+registrar_regra('valquiria', ('mariana', 'gustavo', 'mauricio', 'faim'),
+                lambda ctx, e: regra_valquiria(ctx.cal, e['mariana'], escala_gustavo=e['gustavo'],
+                                               escala_mauricio=e['mauricio'], escala_faim=e['faim'],
+                                               disponivel=ctx.disponivel('valquiria'),
+                                               meta=ctx.meta('valquiria')))
+
+
+class PlanoRegras:
+    """
+    Grafo de dependências das regras: ordem topológica (desempate pela ordem
+    de registro), níveis de regras independentes e fecho dos dependentes.
+    Entrada desconhecida ou dependência circular → ValueError.
+    """
+
+    def __init__(self, regras=None):
+        self.regras = dict(REGRAS_ESCALA if regras is None else regras)
+        pos = {nome: i for i, nome in enumerate(self.regras)}
+        leitores = {nome: [] for nome in self.regras}
+        faltam = {}
+        for nome, regra in self.regras.items():
+            for x in regra.entradas + regra.ausencias:
+                if x not in self.regras:
+                    raise ValueError(f"regra {nome!r} lê {x!r}, que não está registrada")
+            for x in set(regra.entradas):
+                leitores[x].append(nome)
+            faltam[nome] = len(set(regra.entradas))
+
+        prontas = [(pos[n], n) for n, k in faltam.items() if k == 0]
+        heapq.heapify(prontas)
+        ordem, nivel = [], {}
+        while prontas:
+            _, nome = heapq.heappop(prontas)
+            ordem.append(nome)
+            nivel[nome] = max((nivel[x] + 1 for x in self.regras[nome].entradas), default=0)
+            for m in leitores[nome]:
+                faltam[m] -= 1
+                if faltam[m] == 0:
+                    heapq.heappush(prontas, (pos[m], m))
+        if len(ordem) < len(self.regras):
+            ciclo = sorted(n for n in self.regras if n not in nivel)
+            raise ValueError(f"dependência circular envolvendo as regras {', '.join(ciclo)}")
+
+        self.ordem = tuple(ordem)
+        self.niveis = tuple(tuple(n for n in ordem if nivel[n] == k)
+                            for k in range(max(nivel.values(), default=-1) + 1))
+        self._leitores = leitores
+
+    def abaixo(self, nomes):
+        """
+        Regras a refazer quando a escala (ou a disponibilidade) das regras
+        `nomes` muda: quem as lê, direta ou indiretamente, em ordem topológica.
+        As próprias `nomes` não entram; nomes fora do plano são ignorados.
+        """
+        nomes = set(nomes)
+        afetadas = {n for n, r in self.regras.items() if nomes.intersection(r.ausencias)}
+        fila = [n for n in nomes if n in self.regras] + list(afetadas)
+        while fila:
+            for m in self._leitores[fila.pop()]:
+                if m not in afetadas:
+                    afetadas.add(m)
+                    fila.append(m)
+        return [n for n in self.ordem if n in afetadas and n not in nomes]
+
+    def executar(self, ctx, gravar, saidas=None, apenas=None, executor=None):
+        """
+        Roda as regras nível a nível e retorna {regra: saída}.
+        gravar(regra, escala, plantões) → saída vista pelas regras seguintes
+            (por exemplo a linha do médico na grade); chamado em ordem topológica.
+        saidas: saídas já conhecidas, que não são recalculadas.
+        apenas: roda só estas regras (além das que faltam em `saidas`).
+        executor: concurrent.futures.Executor opcional para as regras de um
+            mesmo nível; sem ele tudo roda em sequência, com um span por regra.
+        """
+        saidas = dict(saidas or {})
+        alvo = set(self.ordem if apenas is None else apenas)
+
+        def calcular(nome):
+            regra = self.regras[nome]
+            return regra.funcao(ctx, {x: saidas[x] for x in regra.entradas})
+
+        for nivel in self.niveis:
+            lote = [n for n in nivel if n in alvo or n not in saidas]
+            if executor is not None and len(lote) > 1:
+                resultados = list(executor.map(calcular, lote))
+            else:
+                resultados = []
+                for nome in lote:
+                    with span(f'regra_{nome}'):
+                        resultados.append(calcular(nome))
+            for nome, (escala, cnt) in zip(lote, resultados):
+                saidas[nome] = gravar(self.regras[nome], escala, cnt)
+        return saidas
+
+
+PLANO_REGRAS = PlanoRegras()
+
+
+def plano_de_config(config):
+    """PLANO_REGRAS com as regras declarativas de config['regras'] (escala_regras), se houver."""
+    if not config.get('regras'):
+        return PLANO_REGRAS
+    from escala_regras import plano_declarativo
+    return plano_declarativo(config)
+
+
+def regras_com_alerta(config):
+    """Regras de médico do plano da configuração que avisam quando faltam plantões para a meta."""
+    return {nome for nome, r in plano_de_config(config).regras.items() if r.medico and r.alerta}
+
+
+# ============================================================
+# GERADOR PRINCIPAL
+# ============================================================
+
+def calcular_slots_vagos(dias, resultado):
+    """Identifica, por dia, os turnos (MANHÃ, TARDE, NOITE) sem ninguém escalado."""
+    return GradeEscala.de_escalas(dias, resultado).vagos()
+
+
+def aplicar_ausencias(grade, config, ausencias):
+    """Grava o código de ausência nos dias em que o médico não tem turno."""
+    if not ausencias:
+        return
+    for med in config['medicos']:
+        for d, cod in ausencias.no_periodo(med['nome'], grade.dias).items():
+            if not grade.codigo(med['nome'], d):
+                grade.definir(med['nome'], d, cod)
+
+
+def gerar_escala(ano, mes, mariana_ativa=False, engine='greedy', config=None, historico=None,
+                 ausencias=None):
+    """
+    Gera a escala para o período 16/mes/ano → 15/mes+1/ano.
+    Retorna dict com todas as escalas e metadados.
+
+    engine='greedy' (padrão) roda o plano de regras da configuração
+    (plano_de_config: embutidas e declarativas) em ordem topológica;
+    engine='cp' resolve pelo modelo de restrições de escala_cp.
+    config: unidade/especialidade (ver UNIDADE_PADRAO); regras sem médico
+    na unidade são puladas.
+    historico: escala_historico.HistoricoEscala opcional; os D/N de Gustavo
+    nos períodos anteriores a (ano, mes) fazem o rodízio do seu sábado D/N
+    entre os meses (só no motor guloso). Salvar o resultado fica a cargo de quem chama.
+    ausencias: Ausencias (ou [(nome, início, fim, código), ...]) somadas às
+    'ausencias' da configuração; os dias ausentes saem com o código (F, A,
+    SD) e as regras procuram outras datas. O índice vai em dados['ausencias'].
+    """
+    config = validar_config(config or UNIDADE_PADRAO)
+    ausencias = Ausencias([*Ausencias.de_config(config), *(ausencias or ())])
+    if engine == 'cp':
+        from escala_cp import resolver_escala
+        return resolver_escala(ano, mes, mariana_ativa=mariana_ativa, config=config,
+                               ausencias=ausencias)
+    if engine != 'greedy':
+        raise ValueError(f"engine desconhecido: {engine!r} (use 'greedy' ou 'cp')")
+
+    with span('get_periodo'):
+        dias = get_periodo(ano, mes)
+    grade = GradeEscala(dias)
+    alertas = []
+    por_regra = medicos_por_regra(config)
+
+    sabado_dn = RODIZIO_SABADO_DN[0]
+    if historico is not None and 'gustavo' in por_regra:
+        dn = historico.contadores(por_regra['gustavo']['nome'], config, antes=(ano, mes))['dn']
+        sabado_dn = sabado_dn_rodizio(dias, dn)
+    ctx = ContextoRegras(dias, mariana_ativa, sabado_dn, ausencias, por_regra)
+
+    # Linhas na ordem da planilha, antes de qualquer regra rodar
+    for regra in ORDEM_LINHAS:
+        for med in config['medicos']:
+            if med['regra'] == regra:
+                grade.indice(med['nome'])
+    for med in config['medicos']:
+        if med['regra'] not in ORDEM_LINHAS:
+            grade.indice(med['nome'])
+
+    def gravar(regra, escala, cnt):
+        """Grava a escala no médico da regra; sem médico na unidade, descarta."""
+        if not regra.medico:
+            return escala
+        med = por_regra.get(regra.nome)
+        if med is None:
+            return {}
+        if regra.deve_alertar(ctx) and med['meta'] is not None and cnt < med['meta']:
+            alertas.append(f"{apelido_medico(med)}: faltam {med['meta'] - cnt} plantão(ões)")
+        return grade.aplicar(med['nome'], escala)
+
+    # Regras em ordem topológica (PLANO_REGRAS): Bruna, Gustavo, Mariana e
+    # Maurício não leem ninguém; Faim lê Maurício; Melissa e Valquiria por último
+    plano_de_config(config).executar(ctx, gravar)
+
+    # Dias de ausência (férias, atestado, folga sindicato) com o código
+    aplicar_ausencias(grade, config, ausencias)
+
+    # RPAs ficam vazios (preenchimento manual ou escala_rpa.alocar_rpa)
+    for rpa in config['rpa']:
+        grade.aplicar(rpa['nome'], {})
+
+    with span('cobertura'):
+        slots_vagos = grade.vagos()
+
+    return {
+        'dias': dias,
+        'escalas': grade.escalas(),
+        'alertas': alertas,
+        'slots_vagos': slots_vagos,
+        'ano': ano,
+        'mes': mes,
+        'mariana_ativa': mariana_ativa,
+        'grade': grade,
+        'config': config,
+        'ausencias': ausencias,
+    }
+
+
+# ============================================================
+# GERAÇÃO DO EXCEL
+# ============================================================
+# Layout, estilos e backends ficam em escala_excel (openpyxl sob demanda).
+BACKENDS_EXCEL = ('padrao', 'streaming')
+
+
+def gerar_excel(dados, caminho_saida=None, backend='padrao'):
+    """
+    Gera o arquivo Excel com a escala formatada.
+
+    caminho_saida: caminho (str/PathLike) ou objeto arquivo binário
+    (BytesIO, resposta HTTP, ...) — devolvido como veio. Se None, o
+    workbook é gerado em memória e os bytes do .xlsx são retornados,
+    sem passar pelo disco.
+
+    backend='padrao'    → Workbook completo em memória (comportamento original).
+    backend='streaming' → modo write-only do openpyxl com NamedStyles; mesma
+                          aparência, menos memória e gravação mais rápida.
+    """
+    if backend not in BACKENDS_EXCEL:
+        raise ValueError(f"backend desconhecido: {backend!r} (use 'padrao' ou 'streaming')")
+    with span('excel.import'):
+        from escala_excel import montar_plano_excel, BACKENDS
+    with span('excel.plano'):
+        plano = montar_plano_excel(dados)
+    if caminho_saida is None:
+        buffer = io.BytesIO()
+        BACKENDS[backend](plano, buffer)
+        return buffer.getvalue()
+    BACKENDS[backend](plano, caminho_saida)
+    return caminho_saida
+
+
+# ============================================================
+# CORES ANSI (terminal)
+# ============================================================
+ANSI_RESET   = '\033[0m'
+ANSI_BOLD    = '\033[1m'
+ANSI_GREEN   = '\033[92m'   # Verde brilhante → meta atingida
+ANSI_YELLOW  = '\033[93m'   # Amarelo → incompleto / atestado
+ANSI_RED     = '\033[91m'   # Vermelho → falta crítica
+ANSI_CYAN    = '\033[96m'   # Ciano → cabeçalho / seção
+ANSI_GRAY    = '\033[90m'   # Cinza → licença / info
+ANSI_ORANGE  = '\033[33m'   # Laranja → slot vago RPA
+ANSI_WHITE   = '\033[97m'   # Branco brilhante
+
+
+def _cor(texto, codigo):
+    return f"{codigo}{texto}{ANSI_RESET}"
+
+
+# ============================================================
+# EXIBIÇÃO: CONTADOR DE PLANTÕES
+# ============================================================
+def exibir_contador_plantoes(dados):
+    """
+    Exibe tabela de contagem de plantões no terminal.
+    Linhas ficam VERDES ao atingir a meta individual.
+    """
+    escalas = dados['escalas']
+    periodo = nome_periodo(dados['ano'], dados['mes'])
+    medicos = config_de_dados(dados)['medicos']
+    config_por_nome = {c['nome']: c for c in medicos}
+
+    ordem = [c['nome'] for c in medicos]
+
+    larg_nome  = 36
+    larg_real  = 10
+    larg_meta  = 6
+    larg_bar   = 20
+    linha_sep  = '─' * (larg_nome + larg_real + larg_meta + larg_bar + 12)
+
+    print()
+    print(_cor('═' * (larg_nome + larg_real + larg_meta + larg_bar + 12), ANSI_CYAN))
+    print(_cor(f"  CONTADOR DE PLANTÕES  —  {periodo}", ANSI_BOLD + ANSI_CYAN))
+    print(_cor('═' * (larg_nome + larg_real + larg_meta + larg_bar + 12), ANSI_CYAN))
+
+    cabecalho = (
+        f"  {'Médico':<{larg_nome}}"
+        f"{'Realizado':>{larg_real}}"
+        f"{'Meta':>{larg_meta}}"
+        f"  {'Progresso':<{larg_bar}}"
+        f"  Status"
+    )
+    print(_cor(cabecalho, ANSI_BOLD + ANSI_WHITE))
+    print(_cor(linha_sep, ANSI_GRAY))
+
+    for nome in ordem:
+        esc     = escalas.get(nome, {})
+        total   = contar_plantoes(esc)
+        cfg     = config_por_nome.get(nome, {})
+        meta    = cfg.get('meta')
+        regra   = cfg.get('regra', '')
+
+        # ── Determinar status e cor ──
+        if regra == 'licenca':
+            status_txt = '─  Licença/Maternidade'
+            cor_linha  = ANSI_GRAY
+            barra_txt  = ''
+            meta_txt   = '─'
+            real_txt   = f"{total:>5.1f}"
+
+        elif not dados['mariana_ativa'] and regra == 'mariana':
+            status_txt = '⚠  Atestado (desativada)'
+            cor_linha  = ANSI_YELLOW
+            barra_txt  = ''
+            meta_txt   = str(int(meta)) if meta == int(meta) else str(meta)
+            real_txt   = f"{total:>5.1f}"
+
+        elif regra == 'bruna':
+            status_txt = '─  Plantão fixo matutino'
+            cor_linha  = ANSI_GRAY
+            barra_txt  = ''
+            meta_txt   = '─'
+            real_txt   = f"{total:>5.1f}"
+
+        elif meta is None:
+            status_txt = '─'
+            cor_linha  = ANSI_GRAY
+            barra_txt  = ''
+            meta_txt   = '─'
+            real_txt   = f"{total:>5.1f}"
+
+        else:
+            meta_num  = float(meta)
+            pct       = min(total / meta_num, 1.0) if meta_num > 0 else 1.0
+            barras    = int(pct * larg_bar)
+            barra_txt = '█' * barras + '░' * (larg_bar - barras)
+            meta_txt  = str(int(meta)) if meta == int(meta) else str(meta)
+            real_txt  = f"{total:>5.1f}"
+
+            if total >= meta_num:
+                status_txt = '✅ META ATINGIDA'
+                cor_linha  = ANSI_GREEN
+            elif total >= meta_num * 0.75:
+                status_txt = f'⚠  Faltam {round(meta_num - total, 1)}'
+                cor_linha  = ANSI_YELLOW
+            else:
+                status_txt = f'✗  Faltam {round(meta_num - total, 1)}'
+                cor_linha  = ANSI_RED
+
+        linha = (
+            f"  {nome:<{larg_nome}}"
+            f"{real_txt:>{larg_real}}"
+            f"{meta_txt:>{larg_meta}}"
+            f"  {barra_txt:<{larg_bar}}"
+            f"  {status_txt}"
+        )
+        print(_cor(linha, cor_linha))
+
+    print(_cor(linha_sep, ANSI_GRAY))
+
+
+# ============================================================
+# EXIBIÇÃO: RELATÓRIO DE DATAS DESCOBERTAS (RPA)
+# ============================================================
+def exibir_relatorio_rpa(dados):
+    """
+    Exibe relatório de datas com slots vagos, por turno,
+    indicando o dia da semana — para oferta de RPA.
+    """
+    slots_vagos = dados['slots_vagos']
+    periodo     = nome_periodo(dados['ano'], dados['mes'])
+
+    # Consolidar todas as datas com pelo menos 1 vago
+    todas_datas = sorted(
+        set(slots_vagos['M']) | set(slots_vagos['T']) | set(slots_vagos['N'])
+    )
+
+    print()
+    print(_cor('═' * 62, ANSI_ORANGE))
+    print(_cor(f"  RELATÓRIO DE DATAS DESCOBERTAS  —  {periodo}", ANSI_BOLD + ANSI_ORANGE))
+    print(_cor('  Turnos para oferta de RPA', ANSI_ORANGE))
+    print(_cor('═' * 62, ANSI_ORANGE))
+
+    if not todas_datas:
+        print(_cor('  ✅  Todos os turnos estão cobertos!', ANSI_GREEN))
+        print()
+        return
+
+    # Cabeçalho da tabela
+    cab = f"  {'Data':<12}{'Dia da Semana':<16}{'M':^6}{'T':^6}{'N':^6}  Turnos vagos"
+    print(_cor(cab, ANSI_BOLD + ANSI_WHITE))
+    print(_cor('  ' + '─' * 58, ANSI_GRAY))
+
+    total_m = total_t = total_n = 0
+
+    for d in todas_datas:
+        data_str    = d.strftime('%d/%m/%Y')
+        dia_semana  = ['Segunda', 'Terça', 'Quarta', 'Quinta',
+                       'Sexta', 'Sábado', 'Domingo'][d.weekday()]
+        vago_m = d in slots_vagos['M']
+        vago_t = d in slots_vagos['T']
+        vago_n = d in slots_vagos['N']
+
+        if vago_m: total_m += 1
+        if vago_t: total_t += 1
+        if vago_n: total_n += 1
+
+        turno_m = _cor(' ○ ', ANSI_ORANGE) if vago_m else _cor(' ● ', ANSI_GREEN)
+        turno_t = _cor(' ○ ', ANSI_ORANGE) if vago_t else _cor(' ● ', ANSI_GREEN)
+        turno_n = _cor(' ○ ', ANSI_ORANGE) if vago_n else _cor(' ● ', ANSI_GREEN)
+
+        vagos_desc = []
+        if vago_m: vagos_desc.append('Manhã')
+        if vago_t: vagos_desc.append('Tarde')
+        if vago_n: vagos_desc.append('Noite')
+        desc_str = ', '.join(vagos_desc)
+
+        # Cor da linha: FDS em amarelo, dias úteis em branco
+        cor_data = ANSI_YELLOW if d.weekday() >= 5 else ANSI_WHITE
+
+        linha_base = f"  {data_str:<12}{dia_semana:<16}"
+        print(_cor(linha_base, cor_data), end='')
+        print(turno_m + turno_t + turno_n, end='')
+        print(_cor(f"  {desc_str}", ANSI_ORANGE))
+
+    print(_cor('  ' + '─' * 58, ANSI_GRAY))
+
+    # Totais por turno
+    tot_linha = (
+        f"  {'TOTAL VAGOS':<28}"
+        f"{total_m:^6}"
+        f"{total_t:^6}"
+        f"{total_n:^6}"
+        f"  ({total_m + total_t + total_n} slots)"
+    )
+    print(_cor(tot_linha, ANSI_BOLD + ANSI_ORANGE))
+
+    # Legenda
+    print()
+    print(_cor('  Legenda:', ANSI_GRAY))
+    print(_cor('  ○ = Turno vago (oferecer RPA)', ANSI_ORANGE))
+    print(_cor('  ● = Turno coberto', ANSI_GREEN))
+    print(_cor('  M = Manhã  |  T = Tarde  |  N = Noite', ANSI_GRAY))
+    print(_cor('  Linhas em amarelo = Finais de semana', ANSI_YELLOW))
+    print()
+
+    # ── Bloco copiável ───────────────────────────────────────
+    dias_semana_full = ['Segunda', 'Terça', 'Quarta', 'Quinta',
+                        'Sexta', 'Sábado', 'Domingo']
+    sep = '─' * 48
+    print(sep)
+    print(f"  DATAS PARA PREENCHER — {periodo}")
+    print(sep)
+    for d in todas_datas:
+        vagos = []
+        if d in slots_vagos['M']: vagos.append('Manhã')
+        if d in slots_vagos['T']: vagos.append('Tarde')
+        if d in slots_vagos['N']: vagos.append('Noite')
+        dia_str  = dias_semana_full[d.weekday()]
+        data_str = d.strftime('%d/%m/%Y')
+        turnos_str = ' · '.join(vagos)
+        print(f"  {data_str}  ({dia_str})  —  {turnos_str}")
+    print(sep)
+    print()
+
+
+# ============================================================
+# EXIBIÇÃO: SEQUÊNCIA CRONOLÓGICA DE PLANTÕES (copiável)
+# ============================================================
+def exibir_sequencia_plantoes(dados):
+    """
+    Exibe, em texto puro sem cores ANSI, a sequência cronológica
+    de todos os plantões de cada médico — formatada para copiar e colar.
+    """
+    escalas        = dados['escalas']
+    periodo        = nome_periodo(dados['ano'], dados['mes'])
+    medicos        = config_de_dados(dados)['medicos']
+    config_por_nome = {c['nome']: c for c in medicos}
+
+    ORDEM = [c['nome'] for c in medicos]
+
+    separador = '=' * 62
+    linha_med  = '-' * 62
+
+    print()
+    print(separador)
+    print(f"  SEQUÊNCIA DE PLANTÕES — {periodo}")
+    print(f"  (texto copiável — ordenado cronologicamente por médico)")
+    print(separador)
+
+    for nome in ORDEM:
+        esc    = escalas.get(nome, {})
+        cfg    = config_por_nome.get(nome, {})
+        meta   = cfg.get('meta')
+        regra  = cfg.get('regra', '')
+        total  = contar_plantoes(esc)
+        mat    = cfg.get('matricula', '')
+
+        print()
+        # Cabeçalho do médico
+        if meta is not None and meta > 0:
+            meta_fmt  = int(meta) if meta == int(meta) else meta
+            total_fmt = int(total) if total == int(total) else total
+            print(f"  {nome}  [{mat}]  —  {total_fmt}/{meta_fmt} plantões")
+        elif regra == 'bruna':
+            total_fmt = int(total) if total == int(total) else total
+            print(f"  {nome}  [{mat}]  —  {total_fmt} plantões (matutino fixo)")
+        elif regra == 'licenca':
+            print(f"  {nome}  [{mat}]  —  Licença / Maternidade")
+        else:
+            print(f"  {nome}  [{mat}]")
+
+        print(f"  {linha_med}")
+
+        if not esc:
+            if not dados['mariana_ativa'] and regra == 'mariana':
+                print(f"  (sem plantões — atestado)")
+            elif regra == 'licenca':
+                print(f"  (sem plantões — licença maternidade)")
+            else:
+                print(f"  (sem plantões alocados)")
+            continue
+
+        # Turnos ordenados por data
+        turnos = sorted(esc.items())
+        for d, turno in turnos:
+            dia_semana = DIAS_SEMANA_PT[d.weekday()]
+            data_str   = d.strftime('%d/%m/%Y')
+            # Carga horária descritiva (registro TURNOS)
+            carga = TURNOS[turno]['carga'] if turno in TURNOS else turno
+            print(f"  {data_str}  {dia_semana:<5}  {turno:<5}  {carga}")
+
+    print()
+    print(separador)
+    print()
+
+
+def exibir_perfil(perfil, arquivo=None):
+    """
+    Árvore de spans do --profile: tempo, % do pai, chamadas e pico de memória.
+    arquivo: onde escrever (padrão: sys.stdout).
+    """
+    arquivo = arquivo or sys.stdout
+    larg = 78
+    print(_cor('═' * larg, ANSI_CYAN), file=arquivo)
+    print(_cor("  PERFIL POR ETAPA", ANSI_BOLD + ANSI_CYAN), file=arquivo)
+    print(_cor('═' * larg, ANSI_CYAN), file=arquivo)
+    cab = f"  {'Etapa':<40}{'Tempo':>11}{'% pai':>8}{'Chamadas':>10}"
+    if perfil.memoria:
+        cab += f"{'Pico':>10}"
+    print(_cor(cab, ANSI_BOLD + ANSI_WHITE), file=arquivo)
+    print(_cor('─' * larg, ANSI_GRAY), file=arquivo)
+    for nivel, nome, total, chamadas, pico, fracao in linhas_arvore(perfil):
+        rotulo = '  ' * nivel + nome
+        linha = f"  {rotulo:<40}{total * 1000:>8.2f} ms{fracao:>8.0%}{chamadas:>10}"
+        if perfil.memoria:
+            linha += f"{pico / 1024:>7.0f} KB"
+        print(_cor(linha, ANSI_WHITE if nivel == 0 else ANSI_GRAY), file=arquivo)
+    print(_cor('─' * larg, ANSI_GRAY), file=arquivo)
+    print(file=arquivo)
+
+
+# ============================================================
+# LOTE: VÁRIOS PERÍODOS EM PARALELO
+# ============================================================
+def _periodo_arg(texto):
+    """Converte 'AAAA-MM' em (ano, mes) para o argparse."""
+    import argparse
+    try:
+        ano, mes = (int(x) for x in texto.split('-'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"período inválido: {texto!r} (use AAAA-MM)")
+    if not 1 <= mes <= 12:
+        raise argparse.ArgumentTypeError(f"mês inválido em {texto!r}")
+    return ano, mes
+
+
+def periodos_entre(inicio, fim):
+    """Lista (ano, mes) de `inicio` até `fim`, inclusive."""
+    (ano, mes) = inicio
+    periodos = []
+    while (ano, mes) <= fim:
+        periodos.append((ano, mes))
+        ano, mes = (ano + 1, 1) if mes == 12 else (ano, mes + 1)
+    return periodos
+
+
+# Configurações das unidades do lote: enviadas uma vez por worker (initializer),
+# as tarefas carregam só o índice da unidade.
+_unidades_lote = (UNIDADE_PADRAO,)
+_historico_lote = None
+
+
+def _iniciar_worker_lote(unidades, historico=None):
+    global _unidades_lote, _historico_lote
+    _unidades_lote = unidades
+    if historico is not None:
+        from escala_historico import HistoricoEscala
+        _historico_lote = HistoricoEscala(historico)
+
+
+def _pasta_unidade(pasta, config):
+    """Subpasta <unidade>/<especialidade> (sem separadores de caminho)."""
+    partes = (config['unidade'], config['especialidade'])
+    return os.path.join(pasta, *(p.replace(os.sep, '-').replace('/', '-') for p in partes))
+
+
+def _gerar_periodo_lote(tarefa):
+    """Worker do lote: gera escala + Excel de (unidade, período) e devolve o resumo."""
+    i_unidade, ano, mes, mariana_ativa, engine, pasta, sufixo, backend, rpa = tarefa
+    config = _unidades_lote[i_unidade]
+    dados = gerar_escala(ano, mes, mariana_ativa=mariana_ativa, engine=engine, config=config,
+                         historico=_historico_lote)
+    if rpa:
+        from escala_rpa import alocar_rpa
+        dados = alocar_rpa(dados)
+    if _historico_lote is not None:
+        _historico_lote.salvar(dados)
+    nome_arquivo = nome_arquivo_excel(ano, mes)
+    if sufixo:
+        nome_arquivo = nome_arquivo.replace('.xlsx', f" ({'Mariana ativa' if mariana_ativa else 'Mariana atestado'}).xlsx")
+    caminho = os.path.join(pasta, nome_arquivo)
+    gerar_excel(dados, caminho, backend=backend)
+    from escala_validacao import validar_escala, erros
+    vagos = dados['slots_vagos']
+    return {
+        'unidade': config['unidade'],
+        'especialidade': config['especialidade'],
+        'ano': ano,
+        'mes': mes,
+        'mariana_ativa': mariana_ativa,
+        'alertas': dados['alertas'],
+        'vagos': {b: len(vagos[b]) for b in ('M', 'T', 'N')},
+        'violacoes': len(erros(validar_escala(dados))),
+        'arquivo': caminho,
+    }
+
+
+def gerar_lote(periodos, variantes_mariana=(False,), pasta='.', engine='greedy', workers=None,
+               backend_excel='streaming', unidades=None, historico=None, rpa=False):
+    """
+    Gera escala e Excel para cada (unidade × período × variante de Mariana)
+    num ProcessPoolExecutor (um worker por núcleo). Com mais de uma unidade,
+    cada uma grava em pasta/<unidade>/<especialidade>/. Retorna os resumos
+    na ordem unidade → período.
+
+    historico: caminho da base SQLite (escala_historico). Cada período
+    depende dos contadores do anterior, então o lote roda em sequência.
+    rpa: distribui os turnos vagos entre as linhas RPA (escala_rpa).
+    """
+    global _historico_lote
+    unidades = tuple(validar_config(u) for u in (unidades or (UNIDADE_PADRAO,)))
+    sufixo = len(variantes_mariana) > 1
+    tarefas = []
+    for i, config in enumerate(unidades):
+        destino = _pasta_unidade(pasta, config) if len(unidades) > 1 else pasta
+        os.makedirs(destino, exist_ok=True)
+        tarefas += [(i, ano, mes, ativa, engine, destino, sufixo, backend_excel, rpa)
+                    for (ano, mes) in periodos for ativa in variantes_mariana]
+    workers = workers or os.cpu_count() or 1
+    if historico is not None or workers == 1 or len(tarefas) == 1:
+        _iniciar_worker_lote(unidades, historico)
+        try:
+            return [_gerar_periodo_lote(t) for t in tarefas]
+        finally:
+            if _historico_lote is not None:
+                _historico_lote.fechar()
+                _historico_lote = None
+    from concurrent.futures import ProcessPoolExecutor
+    chunksize = max(1, len(tarefas) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_worker_lote,
+                             initargs=(unidades,)) as pool:
+        return list(pool.map(_gerar_periodo_lote, tarefas, chunksize=chunksize))
+
+
+def carregar_unidades(caminho):
+    """Lê um JSON com a lista de configurações de unidade (formato de UNIDADE_PADRAO)."""
+    import json
+    with open(caminho, encoding='utf-8') as f:
+        unidades = json.load(f)
+    if isinstance(unidades, dict):
+        unidades = [unidades]
+    return [validar_config(u) for u in unidades]
+
+
+def exibir_resumo_lote(resumos):
+    """Tabela-resumo do lote: alertas e slots vagos por unidade e período."""
+    varias = len({(r['unidade'], r['especialidade']) for r in resumos}) > 1
+    larg = 110 if varias else 78
+    print()
+    print(_cor('═' * larg, ANSI_CYAN))
+    print(_cor(f"  RESUMO DO LOTE  —  {len(resumos)} escala(s)", ANSI_BOLD + ANSI_CYAN))
+    print(_cor('═' * larg, ANSI_CYAN))
+    cab = f"  {'Unidade':<32}" if varias else "  "
+    cab += f"{'Período':<22}{'Mariana':<10}{'M':>4}{'T':>4}{'N':>4}{'Vagos':>7}  Alertas"
+    print(_cor(cab, ANSI_BOLD + ANSI_WHITE))
+    print(_cor('─' * larg, ANSI_GRAY))
+
+    total_vagos = total_alertas = total_violacoes = 0
+    for r in resumos:
+        v = r['vagos']
+        soma = v['M'] + v['T'] + v['N']
+        total_vagos += soma
+        total_alertas += len(r['alertas'])
+        total_violacoes += r.get('violacoes', 0)
+        unidade = f"{r['unidade']} / {r['especialidade']}"[:30]
+        linha = (
+            (f"  {unidade:<32}" if varias else "  ") +
+            f"{nome_periodo(r['ano'], r['mes']):<22}"
+            f"{'Ativa' if r['mariana_ativa'] else 'Atestado':<10}"
+            f"{v['M']:>4}{v['T']:>4}{v['N']:>4}{soma:>7}"
+            f"  {'; '.join(r['alertas']) or '─'}"
+        )
+        cor = ANSI_RED if r['alertas'] else (ANSI_ORANGE if soma else ANSI_GREEN)
+        print(_cor(linha, cor))
+
+    print(_cor('─' * larg, ANSI_GRAY))
+    print(_cor(f"  Total: {total_vagos} slots vagos  |  {total_alertas} alerta(s)  |  "
+               f"{total_violacoes} violação(ões) de regra", ANSI_BOLD + ANSI_WHITE))
+    print()
+
+
+def main_lote(argv):
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog='gerador_escala.py batch',
+        description='Gera escalas de vários períodos (e unidades) em paralelo.')
+    parser.add_argument('inicio', type=_periodo_arg, help='primeiro período (AAAA-MM)')
+    parser.add_argument('fim', type=_periodo_arg, help='último período (AAAA-MM)')
+    parser.add_argument('--mariana', default='0',
+                        help="variantes de mariana_ativa separadas por vírgula (ex: 0,1)")
+    parser.add_argument('--saida', required=True, help='pasta de saída dos arquivos .xlsx')
+    parser.add_argument('--engine', choices=('greedy', 'cp'), default='greedy')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='processos em paralelo (padrão: um por núcleo)')
+    parser.add_argument('--backend-excel', choices=tuple(BACKENDS_EXCEL), default='streaming',
+                        help='gravação do .xlsx (padrão: streaming, write-only)')
+    parser.add_argument('--unidades', metavar='ARQUIVO.json', default=None,
+                        help='lista JSON de configurações de unidade/especialidade '
+                             '(padrão: só a unidade embutida)')
+    parser.add_argument('--historico', metavar='ARQUIVO.db', default=None,
+                        help='base SQLite do histórico (rodízio entre meses; roda em sequência)')
+    parser.add_argument('--rpa', action='store_true',
+                        help='distribui os turnos vagos entre as linhas RPA')
+    args = parser.parse_args(argv)
+
+    variantes = tuple(dict.fromkeys(v.strip() == '1' for v in args.mariana.split(',')))
+    periodos = periodos_entre(args.inicio, args.fim)
+    if not periodos:
+        parser.error('o período final é anterior ao inicial')
+    unidades = None
+    if args.unidades:
+        try:
+            unidades = carregar_unidades(args.unidades)
+        except (OSError, ValueError) as e:
+            parser.error(f"--unidades: {e}")
+
+    resumos = gerar_lote(periodos, variantes, pasta=args.saida,
+                         engine=args.engine, workers=args.workers,
+                         backend_excel=args.backend_excel, unidades=unidades,
+                         historico=args.historico, rpa=args.rpa)
+    exibir_resumo_lote(resumos)
+    print(_cor(f"  Arquivos em: {os.path.abspath(args.saida)}", ANSI_BOLD + ANSI_GREEN))
+    print()
+    return resumos
+
+
+# ============================================================
+# PLANILHAS EDITADAS: LEITURA E DIFF
+# ============================================================
+def exibir_diff(caminho, dados, mudancas):
+    """Mudanças de uma planilha editada em relação à escala gerada."""
+    larg = 78
+    print()
+    print(_cor('═' * larg, ANSI_CYAN))
+    print(_cor(f"  {os.path.basename(caminho)}  —  {nome_periodo(dados['ano'], dados['mes'])}",
+               ANSI_BOLD + ANSI_CYAN))
+    print(_cor('═' * larg, ANSI_CYAN))
+    for m in mudancas:
+        d = m['data']
+        print(f"  {DIAS_SEMANA_PT[d.weekday()]} {d.strftime('%d/%m')}  {m['medico']:<34}"
+              f"{m['antes'] or '─':>4} → {_cor(m['depois'] or '─', ANSI_ORANGE)}")
+    for c in dados['celulas_invalidas']:
+        d = c['data']
+        print(_cor(f"  {DIAS_SEMANA_PT[d.weekday()]} {d.strftime('%d/%m')}  {c['medico']:<34}"
+                   f"turno inválido {c['valor']!r}", ANSI_RED))
+    print(_cor('─' * larg, ANSI_GRAY))
+    print(_cor(f"  {len(mudancas)} célula(s) alterada(s)  |  "
+               f"{len(dados['celulas_invalidas'])} inválida(s)", ANSI_BOLD + ANSI_WHITE))
+
+
+def main_diff(argv):
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog='gerador_escala.py diff',
+        description='Lê planilhas editadas e compara com a escala gerada de novo.')
+    parser.add_argument('arquivos', nargs='+', help='planilhas .xlsx geradas por este programa')
+    parser.add_argument('--engine', choices=('greedy', 'cp'), default='greedy')
+    args = parser.parse_args(argv)
+
+    from escala_importar import ler_excel, comparar_com_gerada
+    resultados = []
+    for caminho in args.arquivos:
+        try:
+            dados = ler_excel(caminho)
+            mudancas = comparar_com_gerada(dados, engine=args.engine)
+        except (OSError, ValueError) as e:
+            print(_cor(f"  {caminho}: {e}", ANSI_RED), file=sys.stderr)
+            continue
+        exibir_diff(caminho, dados, mudancas)
+        resultados.append((caminho, mudancas))
+    print()
+    return resultados
+
+
+# ============================================================
+# REPLANEJAMENTO (ausência no meio do período)
+# ============================================================
+def _data_arg(texto):
+    """Converte 'DD/MM/AAAA' ou 'AAAA-MM-DD' em date para o argparse."""
+    import argparse
+    try:
+        if '/' in texto:
+            dia, mes, ano = (int(x) for x in texto.split('/'))
+        else:
+            ano, mes, dia = (int(x) for x in texto.split('-'))
+        return date(ano, mes, dia)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"data inválida: {texto!r} (use DD/MM/AAAA)")
+
+
+def exibir_replanejamento(dados):
+    """Turnos liberados pela ausência e os realocados pelas regras dependentes."""
+    rep = dados['replanejamento']
+    larg = 78
+
+    def dia(d):
+        return f"{DIAS_SEMANA_PT[d.weekday()]} {d.strftime('%d/%m')}"
+
+    print()
+    print(_cor('═' * larg, ANSI_CYAN))
+    print(_cor(f"  Ausência: {rep['medico']}  —  {dia(rep['inicio'])} → {dia(rep['fim'])}",
+               ANSI_BOLD + ANSI_CYAN))
+    print(_cor('═' * larg, ANSI_CYAN))
+    for d, turno in rep['liberados']:
+        print(f"  {dia(d)}  {'liberado':<34}{_cor(turno, ANSI_ORANGE):>4}")
+    for nome, d, antes, depois in rep['realocados']:
+        print(f"  {dia(d)}  {nome:<34}{antes or '─':>4} → {_cor(depois or '─', ANSI_GREEN)}")
+    print(_cor('─' * larg, ANSI_GRAY))
+    print(_cor(f"  {len(rep['liberados'])} turno(s) liberado(s)  |  "
+               f"{len(rep['realocados'])} realocação(ões)", ANSI_BOLD + ANSI_WHITE))
+
+
+def main_replanejar(argv):
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog='gerador_escala.py replanejar',
+        description='Tira um médico da escala publicada entre duas datas e replaneja só esses dias.')
+    parser.add_argument('arquivo', help='planilha .xlsx publicada (gerada por este programa)')
+    parser.add_argument('medico', help='nome completo ou apelido')
+    parser.add_argument('inicio', type=_data_arg, help='primeiro dia da ausência (DD/MM/AAAA)')
+    parser.add_argument('fim', type=_data_arg, help='último dia da ausência (DD/MM/AAAA)')
+    parser.add_argument('--motivo', choices=('A', 'F', 'SD', '-'), default='A',
+                        help="código gravado nos dias da ausência (A, F, SD; '-' deixa em branco)")
+    parser.add_argument('--saida', default=None,
+                        help='planilha replanejada (padrão: "<arquivo> (replanejada).xlsx")')
+    args = parser.parse_args(argv)
+
+    from escala_importar import ler_excel
+    from escala_replanejar import replanejar_ausencia
+    try:
+        publicada = ler_excel(args.arquivo)
+        dados = replanejar_ausencia(publicada, args.medico, args.inicio, args.fim,
+                                    motivo=None if args.motivo == '-' else args.motivo)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    exibir_replanejamento(dados)
+    exibir_relatorio_rpa(dados)
+
+    saida = args.saida or f"{os.path.splitext(args.arquivo)[0]} (replanejada).xlsx"
+    gerar_excel(dados, saida)
+    print(_cor(f"  Arquivo: {os.path.abspath(saida)}", ANSI_BOLD + ANSI_GREEN))
+    print()
+    return dados
+
+
+# ============================================================
+# CENÁRIOS "E SE"
+# ============================================================
+def _eixo_arg(texto):
+    """Converte 'AJUSTE=v1,v2,...' em (ajuste, [valores]) para o argparse."""
+    import argparse
+    import json
+    chave, sep, valores = texto.partition('=')
+    if not sep or not chave.strip() or not valores.strip():
+        raise argparse.ArgumentTypeError(f"eixo inválido: {texto!r} (use AJUSTE=v1,v2,...)")
+
+    def valor(v):
+        try:
+            return json.loads(v)     # 0/1, 14.5, true/false
+        except ValueError:
+            return v                 # nomes de regra
+    return chave.strip(), [valor(v.strip()) for v in valores.split(',')]
+
+
+def exibir_cenarios(linhas, top=None):
+    """Tabela comparativa dos cenários, do melhor para o pior."""
+    larg = 100
+    mostradas = linhas if top is None else linhas[:top]
+    print()
+    print(_cor('═' * larg, ANSI_CYAN))
+    print(_cor(f"  CENÁRIOS  —  {len(linhas)} combinação(ões)"
+               + (f", {len(mostradas)} melhores" if len(mostradas) < len(linhas) else ''),
+               ANSI_BOLD + ANSI_CYAN))
+    print(_cor('═' * larg, ANSI_CYAN))
+    print(_cor(f"  {'#':>3}  {'M':>3}{'T':>4}{'N':>4}{'Vagos':>7}{'Déficit':>9}{'Alertas':>9}  Cenário",
+               ANSI_BOLD + ANSI_WHITE))
+    print(_cor('─' * larg, ANSI_GRAY))
+    for l in mostradas:
+        cenario = '  '.join(f"{k}={v}" for k, v in l['cenario'].items()) or '(base)'
+        if l['erro']:
+            print(_cor(f"  {l['posicao']:>3}  {'inválido':<36}  {cenario}  ({l['erro']})", ANSI_RED))
+            continue
+        v = l['vagos']
+        linha = (f"  {l['posicao']:>3}  {v['M']:>3}{v['T']:>4}{v['N']:>4}{l['total_vagos']:>7}"
+                 f"{l['deficit']:>9}{len(l['alertas']):>9}  {cenario}")
+        cor = ANSI_GREEN if not l['total_vagos'] and not l['deficit'] else (
+            ANSI_ORANGE if not l['alertas'] else ANSI_YELLOW)
+        print(_cor(linha, cor))
+    print(_cor('─' * larg, ANSI_GRAY))
+    print()
+
+
+def main_cenarios(argv):
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog='gerador_escala.py cenarios',
+        description='Compara combinações de ajustes (produto cartesiano dos eixos) para um período.',
+        epilog='Exemplo: python3 gerador_escala.py cenarios 2026-02 --eixo mariana_ativa=0,1 '
+               '--eixo Valquiria.meta=14.5,12,10 --eixo Melissa.fora=0,1')
+    parser.add_argument('periodo', type=_periodo_arg, help='período (AAAA-MM)')
+    parser.add_argument('--eixo', type=_eixo_arg, action='append', required=True,
+                        metavar='AJUSTE=v1,v2,...',
+                        help='mariana_ativa ou MEDICO.meta / MEDICO.regra / MEDICO.fora. Pode repetir')
+    parser.add_argument('--engine', choices=('greedy', 'cp'), default='greedy')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='processos em paralelo (padrão: um por núcleo)')
+    parser.add_argument('--unidades', metavar='ARQUIVO.json', default=None,
+                        help='configuração da unidade (JSON com uma unidade; padrão: a embutida)')
+    parser.add_argument('--top', type=int, default=20,
+                        help='quantos cenários mostrar (padrão: 20; 0 = todos)')
+    args = parser.parse_args(argv)
+
+    config = None
+    if args.unidades:
+        try:
+            unidades = carregar_unidades(args.unidades)
+        except (OSError, ValueError) as e:
+            parser.error(f"--unidades: {e}")
+        if len(unidades) != 1:
+            parser.error('--unidades: o arquivo deve ter uma única unidade')
+        config = unidades[0]
+
+    from escala_cenarios import explorar_cenarios
+    (ano, mes) = args.periodo
+    try:
+        linhas = explorar_cenarios(ano, mes, dict(args.eixo), config=config, engine=args.engine,
+                                   workers=args.workers)
+    except ValueError as e:
+        parser.error(str(e))
+    print(_cor(f"  {nome_periodo(ano, mes)}", ANSI_BOLD + ANSI_WHITE))
+    exibir_cenarios(linhas, top=args.top or None)
+    return linhas
+
+
+# ============================================================
+# ANÁLISE DE VÁRIOS PERÍODOS (numpy / pandas)
+# ============================================================
+def main_analise(argv):
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog='gerador_escala.py analise',
+        description='Vacância por dia da semana e carga por médico num intervalo de períodos.',
+        epilog='Exemplo: python3 gerador_escala.py analise 2026-01 2027-12 --mariana 1')
+    parser.add_argument('inicio', type=_periodo_arg, help='primeiro período (AAAA-MM)')
+    parser.add_argument('fim', type=_periodo_arg, help='último período (AAAA-MM)')
+    parser.add_argument('--mariana', choices=('0', '1'), default='0',
+                        help='Mariana ativa (padrão: 0)')
+    parser.add_argument('--engine', choices=('greedy', 'cp'), default='greedy')
+    parser.add_argument('--unidades', metavar='ARQUIVO.json', default=None,
+                        help='configuração da unidade (JSON com uma unidade; padrão: a embutida)')
+    parser.add_argument('--por-periodo', action='store_true',
+                        help='mostra também a vacância de cada período')
+    args = parser.parse_args(argv)
+    if args.fim < args.inicio:
+        parser.error('o período final é anterior ao inicial')
+
+    config = None
+    if args.unidades:
+        try:
+            unidades = carregar_unidades(args.unidades)
+        except (OSError, ValueError) as e:
+            parser.error(f"--unidades: {e}")
+        if len(unidades) != 1:
+            parser.error('--unidades: o arquivo deve ter uma única unidade')
+        config = unidades[0]
+
+    import escala_analise
+    periodos = periodos_entre(args.inicio, args.fim)
+    pilha = escala_analise.empilhar_periodos(periodos, mariana_ativa=args.mariana == '1',
+                                             config=config, engine=args.engine)
+    tabelas = [('VACÂNCIA POR DIA DA SEMANA', escala_analise.vagos_por_dia_semana(pilha))]
+    if args.por_periodo:
+        tabelas.append(('VACÂNCIA POR PERÍODO', escala_analise.vagos_por_periodo(pilha)))
+    tabelas.append(('CARGA POR MÉDICO', escala_analise.carga_por_medico(pilha)))
+
+    larg = 100
+    print(_cor(f"  {nome_periodo(*periodos[0])}  →  {nome_periodo(*periodos[-1])}"
+               f"  ({len(periodos)} período(s))", ANSI_BOLD + ANSI_WHITE))
+    for titulo, tabela in tabelas:
+        print()
+        print(_cor('═' * larg, ANSI_CYAN))
+        print(_cor(f"  {titulo}", ANSI_BOLD + ANSI_CYAN))
+        print(_cor('═' * larg, ANSI_CYAN))
+        print(tabela.to_string(float_format=lambda x: f"{x:.3f}"))
+    print()
+    return pilha
+
+
+# ============================================================
+# EXPORTAÇÃO (csv / jsonl / ics na saída padrão)
+# ============================================================
+def exportar(dados, formato, medico=None, pasta='.', arquivo=None):
+    """
+    Escreve `dados` no formato pedido (ver escala_exportar) em `arquivo`
+    (padrão: sys.stdout). ics sem médico grava um .ics por médico em `pasta`
+    e lista os caminhos no stderr.
+    """
+    import escala_exportar
+    arquivo = arquivo or sys.stdout
+    if formato == 'csv':
+        return escala_exportar.exportar_csv(dados, arquivo, medico=medico)
+    if formato == 'jsonl':
+        return escala_exportar.exportar_jsonl(dados, arquivo, medico=medico)
+    if formato == 'ics':
+        if medico is not None:
+            return escala_exportar.exportar_ics(dados, medico, arquivo)
+        caminhos = escala_exportar.exportar_ics_pasta(dados, pasta)
+        for c in caminhos:
+            print(c, file=sys.stderr)
+        return caminhos
+    raise ValueError(f"formato desconhecido: {formato!r} (use {', '.join(escala_exportar.FORMATOS_EXPORTACAO)})")
+
+
+# ============================================================
+# MAIN
+# ============================================================
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'batch':
+        return main_lote(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == 'diff':
+        return main_diff(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == 'replanejar':
+        return main_replanejar(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == 'cenarios':
+        return main_cenarios(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == 'analise':
+        return main_analise(sys.argv[2:])
+
+    # argparse só é carregado pela CLI, não por quem importa o módulo
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog='gerador_escala.py',
+        description='Gera a escala de um período (16/mes → 15/mes seguinte).',
+        epilog='Exemplo: python3 gerador_escala.py 2026 2   (gera escala Fev/Março 2026, 16/Fev → 15/Mar)\n'
+               'Lote: python3 gerador_escala.py batch <AAAA-MM> <AAAA-MM> --saida <pasta>',
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('ano', type=int)
+    parser.add_argument('mes', type=int, choices=range(1, 13), metavar='mes')
+    # Padrão: Mariana DESATIVADA (atestado). Passe '1' para ativar.
+    parser.add_argument('mariana_ativa', nargs='?', default='0',
+                        help="'1' ativa os plantões de Mariana (padrão: atestado)")
+    parser.add_argument('--profile', action='store_true',
+                        help='imprime a árvore de tempos por etapa ao final')
+    parser.add_argument('--profile-mem', action='store_true',
+                        help='como --profile, incluindo picos de memória (tracemalloc)')
+    parser.add_argument('--historico', metavar='ARQUIVO.db', default=None,
+                        help='base SQLite do histórico: faz rodízio pelos contadores e salva o período')
+    parser.add_argument('--otimizar', metavar='MS', type=float, default=None,
+                        help='melhora a escala por busca local durante MS milissegundos')
+    parser.add_argument('--rpa', action='store_true',
+                        help='distribui os turnos vagos entre as linhas RPA (escala_rpa)')
+    parser.add_argument('--ausencia', action='append', default=[], metavar='MEDICO,INICIO,FIM[,COD]',
+                        help='ausência do médico (nome ou apelido) entre as datas DD/MM/AAAA; '
+                             'COD = F (padrão), A ou SD. Pode repetir')
+    parser.add_argument('--format', dest='formato', choices=('xlsx', 'csv', 'jsonl', 'ics'),
+                        default='xlsx',
+                        help='xlsx (padrão: relatórios + planilha) ou csv/jsonl/ics na saída padrão')
+    parser.add_argument('--medico', default=None,
+                        help='exporta só este médico (nome completo); com ics, escreve na saída padrão')
+    parser.add_argument('--saida', default='.',
+                        help='pasta dos .ics por médico quando --format ics sem --medico')
+    args = parser.parse_args()
+
+    ano = args.ano
+    mes = args.mes
+    mariana_ativa = args.mariana_ativa == '1'
+    if args.profile or args.profile_mem:
+        escala_perfil.ativar(memoria=args.profile_mem)
+    # Exportando, a saída padrão é só dos dados: mensagens vão para stderr
+    saida_texto = sys.stderr if args.formato != 'xlsx' else sys.stdout
+
+    print(f"\nGerando escala — {nome_periodo(ano, mes)}", file=saida_texto)
+    print(f"  Período : 16/{mes:02d}/{ano} → 15/{(mes % 12) + 1:02d}/{ano if mes < 12 else ano + 1}",
+          file=saida_texto)
+    print(f"  Mariana : {'Ativa' if mariana_ativa else 'Atestado (desativada)'}", file=saida_texto)
+
+    ausencias = Ausencias()
+    for texto in args.ausencia:
+        partes = [p.strip() for p in texto.split(',')]
+        try:
+            if len(partes) not in (3, 4):
+                raise ValueError('use MEDICO,INICIO,FIM[,COD]')
+            medico = medico_por_nome(UNIDADE_PADRAO, partes[0])
+            ausencias.adicionar(medico['nome'], _data_arg(partes[1]), _data_arg(partes[2]),
+                                partes[3].upper() if len(partes) == 4 else 'F')
+        except (ValueError, argparse.ArgumentTypeError) as e:
+            parser.error(f"--ausencia {texto!r}: {e}")
+
+    historico = None
+    if args.historico:
+        from escala_historico import HistoricoEscala
+        historico = HistoricoEscala(args.historico)
+
+    with span('gerar_escala'):
+        dados = gerar_escala(ano, mes, mariana_ativa=mariana_ativa, historico=historico,
+                             ausencias=ausencias)
+    if args.otimizar:
+        from escala_otimizador import otimizar_escala
+        with span('otimizar_escala'):
+            dados = otimizar_escala(dados, limite_s=args.otimizar / 1000)
+        otim = dados['otimizacao']
+        print(f"  Otimizar: {otim['vagos_antes']} → {otim['vagos_depois']} blocos vagos "
+              f"({otim['iteracoes']} iterações, {otim['tempo_s'] * 1000:.0f} ms)", file=saida_texto)
+    if args.rpa:
+        from escala_rpa import alocar_rpa
+        with span('alocar_rpa'):
+            dados = alocar_rpa(dados)
+        aloc = dados['alocacao_rpa']
+        print(f"  RPA     : {len(aloc['alocados'])} de "
+              f"{len(aloc['alocados']) + len(aloc['sem_rpa'])} blocos vagos alocados", file=saida_texto)
+    if historico is not None:
+        with span('historico.salvar'):
+            historico.salvar(dados)
+        historico.fechar()
+
+    if args.formato != 'xlsx':
+        if args.medico is not None and args.medico not in dados['escalas']:
+            parser.error(f"--medico: {args.medico!r} não está na escala")
+        with span(f'exportar.{args.formato}'):
+            resultado = exportar(dados, args.formato, medico=args.medico, pasta=args.saida)
+        perfil = escala_perfil.desativar()
+        if perfil is not None:
+            exibir_perfil(perfil, arquivo=saida_texto)
+        return resultado
+
+    # ── 1. Contador de plantões ──────────────────────────────
+    with span('exibir_contador_plantoes'):
+        exibir_contador_plantoes(dados)
+
+    # ── 2. Relatório de datas descobertas (RPA) ──────────────
+    with span('exibir_relatorio_rpa'):
+        exibir_relatorio_rpa(dados)
+
+    # ── 3. Sequência cronológica copiável ────────────────────
+    with span('exibir_sequencia_plantoes'):
+        exibir_sequencia_plantoes(dados)
+
+    # ── 4. Alertas técnicos (se houver) ─────────────────────
+    if dados['alertas']:
+        print(_cor('⚠  ALERTAS:', ANSI_BOLD + ANSI_RED))
+        for a in dados['alertas']:
+            print(_cor(f"   • {a}", ANSI_RED))
+        print()
+
+    # ── 5. Violações de regra (sobreposição, dias proibidos, tetos) ──
+    from escala_validacao import validar_escala, erros
+    with span('validar_escala'):
+        violacoes = erros(validar_escala(dados))
+    if violacoes:
+        print(_cor(f'⚠  VIOLAÇÕES DE REGRA ({len(violacoes)}):', ANSI_BOLD + ANSI_RED))
+        for v in violacoes:
+            print(_cor(f"   • {v['mensagem']}", ANSI_RED))
+        print()
+
+    # ── 6. Gerar Excel ───────────────────────────────────────
+    nome_arquivo = nome_arquivo_excel(ano, mes)
+
+    caminho = f"/sessions/fervent-awesome-bardeen/mnt/Documents/{nome_arquivo}"
+    with span('gerar_excel'):
+        gerar_excel(dados, caminho)
+    print(_cor(f"  Arquivo Excel: {nome_arquivo}", ANSI_BOLD + ANSI_GREEN))
+    print()
+
+    perfil = escala_perfil.desativar()
+    if perfil is not None:
+        exibir_perfil(perfil)
+    return caminho
+
+
+if __name__ == '__main__':
+    # escala_excel e escala_cp importam "gerador_escala": reaproveita este
+    # módulo em vez de executá-lo de novo com outras classes
+    sys.modules.setdefault('gerador_escala', sys.modules[__name__])
+    main()